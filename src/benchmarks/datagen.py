@@ -0,0 +1,126 @@
+"""
+Seeded synthetic pharmacy data for benchmarks. Builds the schema with
+db.init_db() (so all migrations, triggers and indexes are in place) and
+bulk-fills it; the same seed always produces the same database.
+
+    python -m benchmarks.datagen OUT.db --medicines 10000 [--years 2] [--seed 42]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+import db
+
+NAME_PARTS = [
+    "para", "ceta", "mol", "ibu", "pro", "fen", "amoxi", "cillin", "metro", "nida",
+    "zole", "ome", "pra", "cetiri", "zine", "lora", "tadine", "dex", "tro", "methor",
+    "phan", "azi", "thro", "mycin", "cipro", "flox", "acin", "ator", "vasta", "tin",
+]
+STRENGTHS = ["5mg", "10mg", "20mg", "50mg", "100mg", "250mg", "500mg", "1g", "5ml", "100ml"]
+FIRST_NAMES = ["Ali", "Sara", "Ahmed", "Ayesha", "Usman", "Fatima", "Bilal", "Hina", "Omar", "Zara"]
+LAST_NAMES = ["Khan", "Malik", "Iqbal", "Raza", "Hussain", "Sheikh", "Butt", "Qureshi", "Javed", "Aslam"]
+
+BATCH = 5000  # rows per executemany
+
+
+def scale_profile(medicines, years=2):
+    """Default table sizes for a medicine count (the 1k / 10k / 100k scales)."""
+    return {
+        "medicines": medicines,
+        "customers": max(50, medicines // 10),
+        "suppliers": max(10, medicines // 100),
+        "years": years,
+        "sales_per_day": min(500, max(20, medicines // 200)),
+        "purchases_per_day": min(100, max(5, medicines // 1000)),
+    }
+
+
+def _medicine_rows(rng, count, today):
+    for i in range(count):
+        name = "".join(rng.sample(NAME_PARTS, rng.randint(2, 3))).capitalize()
+        expiry = today + timedelta(days=rng.randint(-60, 3 * 365))
+        quantity = 0 if rng.random() < 0.02 else rng.randint(1, 500)
+        yield (f"{name} {i}", rng.choice(STRENGTHS), f"B{i:06d}", expiry.strftime("%Y-%m-%d"),
+               quantity, round(rng.uniform(5, 2500), 2))
+
+
+def _people_rows(rng, count):
+    for i in range(count):
+        yield (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}", f"03{rng.randint(0, 999999999):09d}",
+               f"House {rng.randint(1, 999)}, Street {rng.randint(1, 99)}")
+
+
+def _movement_rows(rng, per_day, days, today, medicine_count, party_count):
+    start = today - timedelta(days=days)
+    for day in range(days):
+        date = start + timedelta(days=day)
+        for _ in range(per_day):
+            stamp = date + timedelta(seconds=rng.randint(9 * 3600, 22 * 3600))
+            party = rng.randint(1, party_count) if rng.random() < 0.6 else None
+            yield (rng.randint(1, medicine_count), rng.randint(1, 5), stamp.strftime("%Y-%m-%d %H:%M:%S"), party)
+
+
+def _insert(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(path, medicines=10000, customers=None, suppliers=None, years=2,
+             sales_per_day=None, purchases_per_day=None, seed=42, today=None):
+    """
+    Create and fill a database at path, which becomes db.py's active database.
+    Sizes left as None come from scale_profile(medicines). Returns the row counts.
+    """
+    sizes = scale_profile(medicines, years)
+    for key, value in (("customers", customers), ("suppliers", suppliers),
+                       ("sales_per_day", sales_per_day), ("purchases_per_day", purchases_per_day)):
+        if value is not None:
+            sizes[key] = value
+    rng = random.Random(seed)
+    today = today or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = int(sizes["years"] * 365)
+
+    db.use_database(path)
+    db.init_db()
+    with db.connection() as conn:
+        conn.execute("BEGIN")
+        _insert(conn, "INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price) "
+                      "VALUES (?, ?, ?, ?, ?, ?)", _medicine_rows(rng, medicines, today))
+        _insert(conn, "INSERT INTO customers (name, contact, address) VALUES (?, ?, ?)",
+                _people_rows(rng, sizes["customers"]))
+        _insert(conn, "INSERT INTO suppliers (name, contact, address) VALUES (?, ?, ?)",
+                _people_rows(rng, sizes["suppliers"]))
+        _insert(conn, "INSERT INTO sales (medicine_id, quantity, date, customer_id) VALUES (?, ?, ?, ?)",
+                _movement_rows(rng, sizes["sales_per_day"], days, today, medicines, sizes["customers"]))
+        _insert(conn, "INSERT INTO purchases (medicine_id, quantity, date, supplier_id) VALUES (?, ?, ?, ?)",
+                _movement_rows(rng, sizes["purchases_per_day"], days, today, medicines, sizes["suppliers"]))
+        conn.commit()
+        conn.execute("ANALYZE")
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("medicines", "customers", "suppliers", "sales", "purchases")}
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic pharmacy database.")
+    parser.add_argument("path")
+    parser.add_argument("--medicines", type=int, default=10000)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    counts = generate(args.path, args.medicines, years=args.years, seed=args.seed)
+    print(", ".join(f"{table}: {count:,}" for table, count in counts.items()))
+    print(f"Generated {args.path} in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Headless latency benchmarks for the widgets the counter staff wait on.
+
+    cd src && python -m benchmarks.gui [--scales 1000 10000] [--rounds 3]
+                                       [--output-dir benchmark_results]
+
+Runs under QT_QPA_PLATFORM=offscreen (set automatically if unset). For each
+scale a seeded database is generated (see datagen.py), then:
+
+  * typed search strings are replayed one keystroke at a time into the sale
+    dialog, the invoice medicine search, the inventory table and a dashboard
+    detail dialog -- each keystroke is timed from the search call to the
+    repainted table, i.e. what happens once the debounce timer fires;
+  * pages/blocks are rendered in the inventory table and the sale dialog.
+
+Reports p50/p95/p99/max per widget and writes JSON like benchmarks.suite.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+import db
+from benchmarks import datagen
+from benchmarks.suite import _git_commit
+from pos_stress import percentile
+
+DEFAULT_SCALES = [1000, 10000]
+DEFAULT_ROUNDS = 3
+PAGES = 10  # blocks/pages rendered per round
+
+
+def _sample_queries():
+    """Strings a cashier would type, taken from the generated inventory."""
+    with db.connection() as conn:
+        med = dict(conn.execute(
+            "SELECT name, strength, batch_no FROM medicines WHERE quantity > 0 "
+            "ORDER BY id LIMIT 1 OFFSET (SELECT COUNT(*) / 3 FROM medicines)"
+        ).fetchone())
+    return [med["name"].split()[0][:6], med["name"], med["batch_no"], med["strength"], "zzq"]
+
+
+def _keystrokes(queries):
+    """Every prefix of every query, then clearing the box, as typed."""
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            yield query[:end]
+        yield ""
+
+
+def _timed(samples, action, widget):
+    started = time.perf_counter()
+    action()
+    widget.repaint()
+    samples.append((time.perf_counter() - started) * 1000)
+
+
+# --- Keystroke scenarios: search call + result slot + repaint ---
+
+def bench_sale_dialog_search(queries, rounds):
+    from sale_purchase_dialog import SaleDialog
+    dialog = SaleDialog()
+    dialog.show()
+    samples = []
+    for _ in range(rounds):
+        for text in _keystrokes(queries):
+            _timed(samples, lambda: dialog.fast_filter_medicine_table(dialog._search_first_page(text)),
+                   dialog.medicine_table)
+    dialog.close()
+    return samples
+
+
+def bench_medicine_search_dialog(queries, rounds):
+    from widgets.invoice_dialog import MedicineSearchDialog
+    dialog = MedicineSearchDialog()
+    dialog.search_input.blockSignals(True)  # no debounced search behind the timed one
+    dialog.show()
+    samples = []
+    for _ in range(rounds):
+        for text in _keystrokes(queries):
+            dialog.search_input.setText(text)
+            _timed(samples, dialog.filter_medicines, dialog.medicine_table)
+    dialog.close()
+    return samples
+
+
+def bench_inventory_table_search(queries, rounds):
+    from widgets.paginated_table import PaginatedTable
+    table = PaginatedTable()
+    table.resize(1200, 700)
+    table.set_query("")
+    table.show()
+    samples = []
+    for _ in range(rounds):
+        for text in _keystrokes(queries):
+            _timed(samples, lambda: table._show_first_block(table._fetch_first_block(text)), table.table)
+    table.close()
+    return samples
+
+
+def bench_detail_dialog_filter(queries, rounds):
+    from ui.dashboard import DetailDialog
+    rows = [(m["name"], m["strength"], m["batch_no"], m["expiry_date"], m["quantity"])
+            for m in db.get_all_medicines()]
+    dialog = DetailDialog("Total Medicines", rows, ["Name", "Strength", "Batch", "Expiry", "Qty"])
+    dialog.search_input.blockSignals(True)
+    dialog.show()
+    samples = []
+    for _ in range(rounds):
+        for text in _keystrokes(queries):
+            _timed(samples, lambda: dialog._populate_table(dialog._filter_rows(text)), dialog.table)
+    dialog.close()
+    return samples
+
+
+# --- Page renders ---
+
+def bench_inventory_table_blocks(rounds):
+    """Load the full list (in-memory mode) and scroll PAGES blocks down."""
+    from widgets.paginated_table import PaginatedTable
+    table = PaginatedTable()
+    table.resize(1200, 700)
+    table.show()
+    medicines = db.get_all_medicines()
+    samples = []
+    for _ in range(rounds):
+        _timed(samples, lambda: table.set_data(medicines), table.table)
+        for _ in range(PAGES):
+            if not table.model.canFetchMore():
+                break
+            _timed(samples, lambda: (table.model.fetchMore(), table.table.scrollToBottom()), table.table)
+    table.close()
+    return samples
+
+
+def bench_sale_dialog_pages(rounds):
+    from sale_purchase_dialog import SaleDialog
+    dialog = SaleDialog()
+    dialog.show()
+    samples = []
+    for _ in range(rounds):
+        _timed(samples, dialog.load_medicines, dialog.medicine_table)
+        for _ in range(PAGES):
+            if dialog._next_key is None:
+                break
+            _timed(samples, dialog.next_page, dialog.medicine_table)
+    dialog.close()
+    return samples
+
+
+def run(app, scales, rounds, data_dir, seed=42):
+    results = []
+    for scale in scales:
+        path = os.path.join(data_dir, f"gui_bench_{scale}.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        datagen.generate(path, scale, seed=seed)
+        queries = _sample_queries()
+        print(f"\n== {scale:,} medicines, typing {queries}")
+        scenarios = [
+            ("keystroke", "sale_dialog.search", lambda: bench_sale_dialog_search(queries, rounds)),
+            ("keystroke", "medicine_search_dialog.search", lambda: bench_medicine_search_dialog(queries, rounds)),
+            ("keystroke", "inventory_table.search", lambda: bench_inventory_table_search(queries, rounds)),
+            ("keystroke", "detail_dialog.filter", lambda: bench_detail_dialog_filter(queries, rounds)),
+            ("page", "inventory_table.blocks", lambda: bench_inventory_table_blocks(rounds)),
+            ("page", "sale_dialog.pages", lambda: bench_sale_dialog_pages(rounds)),
+        ]
+        for kind, name, scenario in scenarios:
+            samples = scenario()
+            app.processEvents()
+            timing = {
+                "samples": len(samples),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": max(samples),
+            }
+            results.append(dict(scale=scale, kind=kind, benchmark=name, **timing))
+            print(f"  {kind:<9} {name:<32} p50 {timing['p50_ms']:8.2f} ms  p95 {timing['p95_ms']:8.2f} ms"
+                  f"  p99 {timing['p99_ms']:8.2f} ms  max {timing['max_ms']:8.2f} ms")
+        db.close_connections()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless widget latency benchmarks.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="medicine counts")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="times each string is typed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="benchmark_results")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(app, args.scales, args.rounds, tmp, args.seed)
+
+    commit = _git_commit()
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+        "seed": args.seed,
+        "results": results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = "gui-" + datetime.now().strftime("%Y%m%d-%H%M%S") + (f"-{commit}" if commit else "") + ".json"
+    output = os.path.join(args.output_dir, name)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
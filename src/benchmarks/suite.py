@@ -0,0 +1,188 @@
+"""
+Timings for the database paths the UI depends on, at several data scales.
+
+    cd src && python -m benchmarks [--scales 1000 10000 100000] [--repeat 7]
+                                   [--output-dir benchmark_results] [--compare OLD.json]
+
+Each scale gets a freshly generated database (see datagen.py). Every
+benchmark runs once as warm-up, then --repeat timed runs; setup steps are
+not timed. Results are written as JSON (one file per run, named by time and
+git commit) so they can be compared over time.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import db
+from benchmarks import datagen
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 7
+ZERO_STOCK_ROWS = 50  # rows zeroed before each check_and_remove_zero_stock run
+
+
+class Benchmark:
+    def __init__(self, name, func, setup=None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+
+
+def _set_zero_stock(rows=ZERO_STOCK_ROWS):
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE medicines SET quantity = 0 WHERE id IN "
+            "(SELECT id FROM medicines WHERE quantity > 0 ORDER BY id DESC LIMIT ?)", (rows,)
+        )
+        conn.commit()
+
+
+def build_benchmarks():
+    """The benchmark list for the currently active database."""
+    today = datetime.now()
+    last_30 = ((today - timedelta(days=30)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d"))
+    last_365 = ((today - timedelta(days=365)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d"))
+    with db.connection() as conn:
+        sample = dict(conn.execute(
+            "SELECT id, name, strength, batch_no, expiry_date FROM medicines "
+            "WHERE quantity > 0 ORDER BY id LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM medicines)"
+        ).fetchone())
+        conn.execute("UPDATE medicines SET quantity = 1000000000 WHERE id = ?", (sample["id"],))
+        conn.commit()
+
+    benchmarks = [
+        Benchmark("get_all_medicines", db.get_all_medicines),
+        Benchmark("get_sales_report_data[30d]", lambda: db.get_sales_report_data(*last_30)),
+        Benchmark("get_sales_report_data[365d]", lambda: db.get_sales_report_data(*last_365)),
+        Benchmark("record_sale_with_stock_update", lambda: db.record_sale_with_stock_update(sample["id"], 1)),
+        Benchmark("check_and_remove_zero_stock", db.check_and_remove_zero_stock, setup=_set_zero_stock),
+        Benchmark("dashboard[cards]", db.get_dashboard_metrics),
+        Benchmark("dashboard[details]", lambda: (db.get_sales_for_day(), db.get_low_stock_medicines(),
+                                                 db.get_expiring_medicines())),
+    ]
+    # One benchmark per search filter, first page as the UI loads it
+    searches = {
+        "name_prefix": lambda: db.search_medicines(sample["name"][:4]),
+        "name_full": lambda: db.search_medicines(sample["name"]),
+        "strength": lambda: db.search_medicines(sample["strength"]),
+        "batch_no": lambda: db.search_medicines(sample["batch_no"]),
+        "expiry_date": lambda: db.search_medicines(sample["expiry_date"][:7]),
+        "exclude_expired": lambda: db.query_medicines(exclude_expired=True),
+        "include_out_of_stock": lambda: db.query_medicines(in_stock=False),
+        "sort_expiry": lambda: db.query_medicines(sort="expiry_date"),
+        "empty": lambda: db.search_medicines(""),
+    }
+    benchmarks += [Benchmark(f"search[{name}]", func) for name, func in searches.items()]
+    return benchmarks
+
+
+def time_benchmark(bench, repeat):
+    if bench.setup:
+        bench.setup()
+    bench.func()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        if bench.setup:
+            bench.setup()
+        started = time.perf_counter()
+        bench.func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "max_ms": max(timings),
+        "stdev_ms": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, repeat, data_dir, seed=42, only=None):
+    results = []
+    for scale in scales:
+        path = os.path.join(data_dir, f"bench_{scale}.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        started = time.perf_counter()
+        counts = datagen.generate(path, scale, seed=seed)
+        print(f"\n== {scale:,} medicines ({counts['sales']:,} sales) generated in {time.perf_counter() - started:.1f} s")
+        for bench in build_benchmarks():
+            if only and not any(pattern in bench.name for pattern in only):
+                continue
+            timing = time_benchmark(bench, repeat)
+            results.append(dict(scale=scale, benchmark=bench.name, **timing))
+            print(f"  {bench.name:<36} median {timing['median_ms']:9.3f} ms   min {timing['min_ms']:9.3f} ms")
+        db.close_connections()
+    return results
+
+
+def compare(results, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {(r["scale"], r["benchmark"]): r for r in json.load(f)["results"]}
+    print(f"\n== Compared with {previous_path} (median, new / old)")
+    for r in results:
+        old = previous.get((r["scale"], r["benchmark"]))
+        if old and old["median_ms"]:
+            ratio = r["median_ms"] / old["median_ms"]
+            flag = "  SLOWER" if ratio > 1.2 else ("  faster" if ratio < 0.8 else "")
+            print(f"  {r['scale']:>7,} {r['benchmark']:<36} {ratio:6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pharmacy database paths.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="medicine counts")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", help="run benchmarks whose name contains one of these")
+    parser.add_argument("--output-dir", default="benchmark_results")
+    parser.add_argument("--data-dir", help="keep generated databases here (default: temporary)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        results = run(args.scales, args.repeat, args.data_dir, args.seed, args.only)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(args.scales, args.repeat, tmp, args.seed, args.only)
+
+    commit = _git_commit()
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "storage_profile": db.STORAGE_PROFILE,
+        "seed": args.seed,
+        "results": results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = datetime.now().strftime("%Y%m%d-%H%M%S") + (f"-{commit}" if commit else "") + ".json"
+    output = os.path.join(args.output_dir, name)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
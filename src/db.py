@@ -2,17 +2,29 @@ import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 import sqlite3
-from datetime import datetime
+import time
+import random
+from datetime import datetime, date, timedelta
 import re
 import bcrypt
 from PyQt5.QtCore import QObject, pyqtSignal
 import os
 import sys
+import atexit
+import threading
+from contextlib import contextmanager
+from db_connection import ConnectionManager
+from db_tuning import get_profile, apply_pragmas, tune_database, checkpoint
+from db_migrations import run_migrations, rebuild_sales_rollup as _rebuild_sales_rollup
 
 class DBSignals(QObject):
     medicine_updated = pyqtSignal()
     sale_recorded = pyqtSignal()
     order_updated = pyqtSignal()
+    # Fine-grained: ids of medicines whose row was added/changed or removed,
+    # emitted after commit (see InventoryCache)
+    medicines_changed = pyqtSignal(list)
+    medicines_removed = pyqtSignal(list)
 
 db_signals = DBSignals()
 
@@ -27,11 +39,173 @@ def resource_path(relative_path):
 
 DB_FILE = resource_path("pharmacy.db")
 
+# --- Connection Management ---
+# One persistent connection per thread (rows are sqlite3.Row for dict-like access).
+# Use `with connection() as conn:`; connections are closed only at exit.
+_manager = ConnectionManager(DB_FILE)
+atexit.register(_manager.close_all)
+
+def connection():
+    """Context manager yielding the calling thread's persistent connection."""
+    return _manager.connection()
+
 def get_connection():
-    # MODIFIED: Setting row_factory to sqlite3.Row for easier column access
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    conn.row_factory = sqlite3.Row  # Enable dictionary-like access to rows
-    return conn
+    """Returns the calling thread's persistent connection. Do not close it."""
+    return _manager.acquire()
+
+def add_connection_hook(hook):
+    """Register a callable run on every new connection (pragmas, tracing...)."""
+    _manager.add_connect_hook(hook)
+
+def set_connection_factory(factory):
+    """sqlite3.Connection subclass for connections opened from now on (see db_profiler.py)."""
+    _manager.factory = factory
+
+def close_connections():
+    _manager.close_all()
+
+def close_thread_connection():
+    """Close the calling thread's connection (background workers, when done)."""
+    _manager.close_thread_connection()
+
+@contextmanager
+def interruptible(should_stop, every=1000):
+    """
+    Abort queries on this thread's connection as soon as should_stop() returns
+    True; the running statement raises sqlite3.OperationalError ("interrupted").
+    Used by background searches that a newer keystroke has made stale.
+    """
+    with connection() as conn:
+        conn.set_progress_handler(lambda: 1 if should_stop() else 0, every)
+        try:
+            yield conn
+        finally:
+            conn.set_progress_handler(None, every)
+
+# --- Unit of Work ---
+# One write transaction shared by composite operations (sale = stock change
+# + sales row, invoice = many of those). Helpers take the unit and use its
+# cursor instead of committing on their own. Nested unit_of_work() blocks on
+# the same thread join the outer one, so there is exactly one BEGIN IMMEDIATE
+# and one COMMIT per business operation.
+
+_uow_local = threading.local()
+
+class UnitOfWork:
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self._after_commit = []
+
+    def execute(self, sql, params=()):
+        return self.cursor.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor.executemany(sql, seq_of_params)
+
+    def after_commit(self, func, *args):
+        """Run func(*args) once the transaction has committed (signals, cache updates)."""
+        self._after_commit.append((func, args))
+
+    @contextmanager
+    def savepoint(self, name="unit_step"):
+        """Nested step: if it raises, only its statements and queued callbacks are undone."""
+        mark = len(self._after_commit)
+        self.execute(f"SAVEPOINT {name}")
+        try:
+            yield self
+        except BaseException:
+            self.execute(f"ROLLBACK TO {name}")
+            self.execute(f"RELEASE {name}")
+            del self._after_commit[mark:]
+            raise
+        self.execute(f"RELEASE {name}")
+
+# --- Concurrent writers ---
+# Several counters may share one pharmacy.db. Within this process, writers
+# queue on _write_lock instead of fighting over the SQLite lock. Across
+# processes/PCs, busy_timeout (see db_tuning.py) makes SQLite wait for the
+# lock, and BEGIN IMMEDIATE / COMMIT are retried with jittered exponential
+# backoff if it is still busy after that.
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05  # seconds; doubled per attempt, randomized
+
+_write_lock = threading.Lock()
+_lock_wait_hooks = []
+
+def add_lock_wait_hook(hook):
+    """hook(seconds, retries) is called after every unit_of_work gets its write lock (metrics)."""
+    _lock_wait_hooks.append(hook)
+
+def _is_busy(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def _retry_busy(action):
+    """Run action(); on SQLITE_BUSY retry with jittered backoff. Returns the number of retries."""
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            action()
+            return attempt
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or attempt == BUSY_RETRIES:
+                raise
+            time.sleep(random.uniform(0, BUSY_BACKOFF * 2 ** attempt))
+
+@contextmanager
+def unit_of_work():
+    """
+    Transaction scope: BEGIN IMMEDIATE on entry, COMMIT on success, ROLLBACK
+    on any exception. Yields a UnitOfWork; inner unit_of_work() calls on the
+    same thread yield the same unit, wrapped in a savepoint. after_commit
+    callbacks run only after the outermost block commits.
+    """
+    outer = getattr(_uow_local, "current", None)
+    if outer is not None:
+        with outer.savepoint("nested_unit"):  # a failing inner operation undoes only itself
+            yield outer
+        return
+    with _write_lock, connection() as conn:
+        started = time.perf_counter()
+        retries = _retry_busy(lambda: conn.execute("BEGIN IMMEDIATE"))
+        waited = time.perf_counter() - started
+        for hook in _lock_wait_hooks:
+            hook(waited, retries)
+        uow = UnitOfWork(conn)
+        _uow_local.current = uow
+        try:
+            yield uow
+            _retry_busy(conn.commit)  # a failed COMMIT leaves the transaction open
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _uow_local.current = None
+    for func, args in uow._after_commit:
+        func(*args)
+
+def use_database(path):
+    """Switch the module to another database file (tools, benchmarks)."""
+    global DB_FILE, _fts_enabled
+    DB_FILE = path
+    _fts_enabled = None
+    _manager.configure(path)
+
+# --- Storage Tuning ---
+# Profile comes from $PHARMACY_DB_PROFILE ("durable" by default), see db_tuning.py.
+STORAGE_PROFILE, _storage_settings = get_profile()
+add_connection_hook(lambda conn: apply_pragmas(conn, _storage_settings))
+
+def set_storage_profile(name):
+    """Switch tuning profile; open connections are recycled so they pick it up."""
+    global STORAGE_PROFILE, _storage_settings
+    STORAGE_PROFILE, _storage_settings = get_profile(name)
+    _manager.close_all()
+
+def checkpoint_wal(mode="PASSIVE"):
+    """Checkpoint the WAL on the app's own schedule (see MainWindow)."""
+    with connection() as conn:
+        return checkpoint(conn, mode)
 
 
 # --- Password Policy Utils ---
@@ -55,110 +229,161 @@ def check_password(password, hashed):
 # --- DB Initialization ---
 
 def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # --- Medicines Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS medicines (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        strength TEXT,
-        batch_no TEXT,
-        expiry_date TEXT,
-        quantity INTEGER NOT NULL,
-        unit_price REAL NOT NULL,
-        last_updated TEXT DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    # --- Archived Medicines Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS archived_medicines (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL,
-        strength TEXT,
-        batch_no TEXT,
-        expiry_date TEXT,
-        quantity INTEGER DEFAULT 0,
-        unit_price REAL,
-        last_updated TEXT,
-        archive_date TEXT DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    # --- Suppliers Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS suppliers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        contact TEXT,
-        address TEXT
-    )
-    """)
-
-    # --- Customers Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS customers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        contact TEXT,
-        address TEXT
-    )
-    """)
-
-    # --- Sales Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS sales (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        medicine_id INTEGER NOT NULL,
-        quantity INTEGER NOT NULL,
-        date TEXT NOT NULL,
-        customer_id INTEGER,
-        FOREIGN KEY (medicine_id) REFERENCES medicines(id),
-        FOREIGN KEY (customer_id) REFERENCES customers(id)
-    )
-    """)
-
-    # --- Purchases Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS purchases (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        medicine_id INTEGER NOT NULL,
-        quantity INTEGER NOT NULL,
-        date TEXT NOT NULL,
-        supplier_id INTEGER,
-        FOREIGN KEY (medicine_id) REFERENCES medicines(id),
-        FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
-    )
-    """)
-
-    # --- Users Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        password_hash TEXT NOT NULL,
-        role TEXT NOT NULL,
-        full_name TEXT,
-        email TEXT
-    )
-    """)
-    
-    # --- Orders Table ---
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS orders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        medicine_name TEXT NOT NULL,
-        quantity_ordered INTEGER NOT NULL,
-        status TEXT NOT NULL CHECK(status IN ('Pending', 'Approved', 'Rejected')),
-        order_date TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    # Add default users if no users exist
-    cursor.execute("SELECT COUNT(*) FROM users")
-    if cursor.fetchone()[0] == 0:
+    global _fts_enabled
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        # --- Medicines Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS medicines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            strength TEXT,
+            batch_no TEXT,
+            expiry_date TEXT,
+            quantity INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+        # --- Archived Medicines Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archived_medicines (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            strength TEXT,
+            batch_no TEXT,
+            expiry_date TEXT,
+            quantity INTEGER DEFAULT 0,
+            unit_price REAL,
+            last_updated TEXT,
+            archive_date TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+        # --- Suppliers Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS suppliers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            contact TEXT,
+            address TEXT
+        )
+        """)
+
+        # --- Customers Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            contact TEXT,
+            address TEXT
+        )
+        """)
+
+        # --- Sales Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            medicine_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            customer_id INTEGER,
+            FOREIGN KEY (medicine_id) REFERENCES medicines(id),
+            FOREIGN KEY (customer_id) REFERENCES customers(id)
+        )
+        """)
+
+        # --- Purchases Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS purchases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            medicine_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            supplier_id INTEGER,
+            FOREIGN KEY (medicine_id) REFERENCES medicines(id),
+            FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
+        )
+        """)
+
+        # --- Users Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            full_name TEXT,
+            email TEXT
+        )
+        """)
+        
+        # --- Orders Table ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            medicine_name TEXT NOT NULL,
+            quantity_ordered INTEGER NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('Pending', 'Approved', 'Rejected')),
+            order_date TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        
+        # Add default users if no users exist
+        cursor.execute("SELECT COUNT(*) FROM users")
+        if cursor.fetchone()[0] == 0:
+            # Add default admin
+            admin_pw = hash_password("Admin@123")
+            cursor.execute("""
+                INSERT INTO users (username, password_hash, role, full_name, email) 
+                VALUES (?, ?, ?, ?, ?)
+            """, ("admin", admin_pw, "admin", "Admin", "admin@pharmacy.local"))
+            
+            # Add default receptionist
+            recep_pw = hash_password("user123")
+            cursor.execute("""
+                INSERT INTO users (username, password_hash, role, full_name, email) 
+                VALUES (?, ?, ?, ?, ?)
+            """, ("recept1", recep_pw, "user", "Receptionist One", "recept1@pharmacy.local"))
+        
+        # Add sample orders if none exist
+        cursor.execute("SELECT COUNT(*) FROM orders")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO orders (medicine_name, quantity_ordered, status, order_date) VALUES
+                ('Aspirin', 50, 'Pending', '2025-07-07 12:00:00'),
+                ('Paracetamol', 30, 'Approved', '2025-07-06 14:00:00'),
+                ('Ibuprofen', 40, 'Rejected', '2025-07-05 09:00:00')
+            """)
+        
+        conn.commit()
+
+        # --- Versioned migrations (indexes etc.), see db_migrations.py ---
+        run_migrations(conn)
+        _fts_enabled = None  # re-detect the FTS5 index
+
+        # --- Storage tuning stage (journal mode, planner stats) ---
+        tune_database(conn, _storage_settings)
+
+def reset_users_table():
+    """Drops and recreates the users table with default admin and receptionist"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("DROP TABLE IF EXISTS users")
+        cursor.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            full_name TEXT,
+            email TEXT
+        )
+        """)
+        
         # Add default admin
         admin_pw = hash_password("Admin@123")
         cursor.execute("""
@@ -172,78 +397,30 @@ def init_db():
             INSERT INTO users (username, password_hash, role, full_name, email) 
             VALUES (?, ?, ?, ?, ?)
         """, ("recept1", recep_pw, "user", "Receptionist One", "recept1@pharmacy.local"))
-    
-    # Add sample orders if none exist
-    cursor.execute("SELECT COUNT(*) FROM orders")
-    if cursor.fetchone()[0] == 0:
-        cursor.execute("""
-            INSERT INTO orders (medicine_name, quantity_ordered, status, order_date) VALUES
-            ('Aspirin', 50, 'Pending', '2025-07-07 12:00:00'),
-            ('Paracetamol', 30, 'Approved', '2025-07-06 14:00:00'),
-            ('Ibuprofen', 40, 'Rejected', '2025-07-05 09:00:00')
-        """)
-    
-    conn.commit()
-    conn.close()
-
-def reset_users_table():
-    """Drops and recreates the users table with default admin and receptionist"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("DROP TABLE IF EXISTS users")
-    cursor.execute("""
-    CREATE TABLE users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        password_hash TEXT NOT NULL,
-        role TEXT NOT NULL,
-        full_name TEXT,
-        email TEXT
-    )
-    """)
-    
-    # Add default admin
-    admin_pw = hash_password("Admin@123")
-    cursor.execute("""
-        INSERT INTO users (username, password_hash, role, full_name, email) 
-        VALUES (?, ?, ?, ?, ?)
-    """, ("admin", admin_pw, "admin", "Admin", "admin@pharmacy.local"))
-    
-    # Add default receptionist
-    recep_pw = hash_password("user123")
-    cursor.execute("""
-        INSERT INTO users (username, password_hash, role, full_name, email) 
-        VALUES (?, ?, ?, ?, ?)
-    """, ("recept1", recep_pw, "user", "Receptionist One", "recept1@pharmacy.local"))
-    
-    conn.commit()
-    conn.close()
+        
+        conn.commit()
 
 def get_user_list():
     """Returns list of all users with username, full_name, and role"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT username, full_name, role 
-        FROM users 
-        ORDER BY role, username
-    """)
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT username, full_name, role 
+            FROM users 
+            ORDER BY role, username
+        """)
+        return cursor.fetchall()
 
 def validate_login(username, password):
     """Validates user credentials and returns user data if successful"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, password_hash, role, full_name, email 
-        FROM users 
-        WHERE username=?
-    """, (username,))
-    row = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, password_hash, role, full_name, email 
+            FROM users 
+            WHERE username=?
+        """, (username,))
+        row = cursor.fetchone()
     
     if row and check_password(password, row[1]):
         return {
@@ -259,595 +436,1076 @@ def add_admin(username, password, full_name, email):
     if not is_strong_admin_password(password):
         raise ValueError("Admin password must be 8+ chars, include upper, lower, digit, and special char [@#$].")
     hash_pw = hash_password(password)
-    conn = get_connection()
-    try:
-        conn.execute(
-            "INSERT INTO users (username, password_hash, role, full_name, email) VALUES (?, ?, ?, ?, ?)",
-            (username, hash_pw, "admin", full_name, email)
-        )
-        conn.commit()
-    except sqlite3.IntegrityError:
-        raise ValueError("Username already exists")
-    finally:
-        conn.close()
+    with connection() as conn:
+        try:
+            conn.execute(
+                "INSERT INTO users (username, password_hash, role, full_name, email) VALUES (?, ?, ?, ?, ?)",
+                (username, hash_pw, "admin", full_name, email)
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise ValueError("Username already exists")
 
 def add_receptionist(username, _password_ignore, full_name, email):
     shared_pw = "user123"
     hash_pw = hash_password(shared_pw)
-    conn = get_connection()
-    try:
-        conn.execute(
-            "INSERT INTO users (username, password_hash, role, full_name, email) VALUES (?, ?, ?, ?, ?)",
-            (username, hash_pw, "user", full_name, email)
-        )
-        conn.commit()
-    except sqlite3.IntegrityError:
-        raise ValueError("Username already exists")
-    finally:
-        conn.close()
+    with connection() as conn:
+        try:
+            conn.execute(
+                "INSERT INTO users (username, password_hash, role, full_name, email) VALUES (?, ?, ?, ?, ?)",
+                (username, hash_pw, "user", full_name, email)
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise ValueError("Username already exists")
 def update_user_password(user_id, new_password):
     """
     Updates a user's password in the database.
     The new password will be hashed before storing.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        hashed_password = hash_password(new_password) # Use your existing hash_password function
-        
-        cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed_password, user_id))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise ValueError(f"User with ID {user_id} not found.")
-    except sqlite3.Error as e:
-        conn.rollback()
-        raise Exception(f"Database error updating password: {str(e)}")
-    finally:
-        conn.close()
+    with connection() as conn:
+        try:
+            cursor = conn.cursor()
+            hashed_password = hash_password(new_password) # Use your existing hash_password function
+            
+            cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed_password, user_id))
+            conn.commit()
+            if cursor.rowcount == 0:
+                raise ValueError(f"User with ID {user_id} not found.")
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise Exception(f"Database error updating password: {str(e)}")
 
 # --- SUPPLIER & CUSTOMER MANAGEMENT ---
 
 def add_supplier(name, contact, address=""):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO suppliers (name, contact, address) VALUES (?, ?, ?)",
-        (name, contact, address)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO suppliers (name, contact, address) VALUES (?, ?, ?)",
+            (name, contact, address)
+        )
+        conn.commit()
 
 def get_suppliers():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, contact, address FROM suppliers ORDER BY name")
-    suppliers = cursor.fetchall()
-    conn.close()
-    return suppliers
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, contact, address FROM suppliers ORDER BY name")
+        return cursor.fetchall()
 
 def update_supplier(supplier_id, name, contact, address):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE suppliers SET name=?, contact=?, address=? WHERE id=?",
-        (name, contact, address, supplier_id)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE suppliers SET name=?, contact=?, address=? WHERE id=?",
+            (name, contact, address, supplier_id)
+        )
+        conn.commit()
 
 def delete_supplier(supplier_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM suppliers WHERE id=?", (supplier_id,))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM suppliers WHERE id=?", (supplier_id,))
+        conn.commit()
     db_signals.medicine_updated.emit() # Assuming this signal is relevant for supplier changes as well
 
 def add_customer(name, contact, address=""):  # Make address optional
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO customers (name, contact, address) VALUES (?, ?, ?)",
-        (name, contact, address)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO customers (name, contact, address) VALUES (?, ?, ?)",
+            (name, contact, address)
+        )
+        conn.commit()
 
 def get_customers():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, contact, address FROM customers ORDER BY name")
-    customers = cursor.fetchall()
-    conn.close()
-    return customers
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, contact, address FROM customers ORDER BY name")
+        return cursor.fetchall()
 
 def update_customer(customer_id, name, contact, address):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE customers SET name=?, contact=?, address=? WHERE id=?",
-        (name, contact, address, customer_id)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE customers SET name=?, contact=?, address=? WHERE id=?",
+            (name, contact, address, customer_id)
+        )
+        conn.commit()
 
 def delete_customer(customer_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM customers WHERE id=?", (customer_id,))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM customers WHERE id=?", (customer_id,))
+        conn.commit()
+
+# --- Expiry ---
+# medicines.expiry_days holds expiry_date as days since 1970-01-01 (NULL when
+# missing/invalid), maintained by triggers (migration 8). Compare integers
+# instead of parsing expiry strings.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def day_number(day=None):
+    """Days since 1970-01-01 for a date/datetime (default: today)."""
+    return (day or date.today()).toordinal() - _EPOCH_ORDINAL
+
+def is_expired(med, today=None):
+    """True if the medicine expired before today. Unknown expiry is never expired."""
+    expiry = med.get("expiry_days")
+    return expiry is not None and expiry < (day_number() if today is None else today)
 
 # --- MEDICINE MANAGEMENT ---
 def get_all_medicines():
     """Returns only in-stock medicines (quantity > 0)"""
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price 
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
             FROM medicines 
             WHERE quantity > 0
             ORDER BY name
         """)
         rows = cursor.fetchall()
-        # Rows are already sqlite3.Row objects (dictionary-like) due to get_connection()
+        # Rows are already sqlite3.Row objects (dictionary-like) due to the connection manager
         return [dict(row) for row in rows]
-    finally:
-        conn.close()
+
+# Sort keys accepted by query_medicines -> column; id is always the tie-breaker.
+# "rank" orders full-text matches by relevance (see search_medicines).
+MEDICINE_SORT_COLUMNS = {
+    "name": "name",
+    "expiry_date": "expiry_date",
+    "quantity": "quantity",
+}
+
+# bm25 column weights for medicines_fts: name, strength, batch_no, expiry_date
+_FTS_WEIGHTS = "10.0, 2.0, 4.0, 1.0"
+_fts_enabled = None
+
+def _fts_available():
+    """True once the medicines_fts index exists (SQLite may lack FTS5)."""
+    global _fts_enabled
+    if _fts_enabled is None:
+        with connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='medicines_fts'"
+            ).fetchone()
+            _fts_enabled = row is not None
+    return _fts_enabled
+
+def _fts_match_expression(text):
+    """'para 500' -> '"para"* "500"*' (every word is a prefix, all must match)."""
+    tokens = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def _medicine_filter_sql(search=None, in_stock=True, exclude_expired=False):
+    """Builds the WHERE clause shared by the medicine list queries."""
+    clauses = []
+    params = []
+    if in_stock:
+        clauses.append("quantity > 0")
+    if exclude_expired:
+        clauses.append("(expiry_days IS NULL OR expiry_days >= ?)")
+        params.append(day_number())
+    if search:
+        match = _fts_match_expression(search)
+        if match and _fts_available():
+            clauses.append("id IN (SELECT rowid FROM medicines_fts WHERE medicines_fts MATCH ?)")
+            params.append(match)
+        else:
+            like = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("""(name LIKE ? ESCAPE '\\' OR strength LIKE ? ESCAPE '\\'
+                                OR batch_no LIKE ? ESCAPE '\\' OR expiry_date LIKE ? ESCAPE '\\')""")
+            params.extend([like] * 4)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def query_medicines(search=None, in_stock=True, exclude_expired=False, sort="name",
+                    after=None, offset=None, limit=100):
+    """
+    Returns one page of medicines plus the total number of matches, so
+    widgets only ever hold the visible page.
+
+    Args:
+        search (str, optional): Prefix search on name, strength, batch_no, expiry_date
+            (FTS5; plain substring match if FTS5 is unavailable).
+        in_stock (bool): Only quantity > 0 (default, same as get_all_medicines).
+        exclude_expired (bool): Hide medicines whose expiry_date is before today.
+        sort (str): One of MEDICINE_SORT_COLUMNS, or "rank" for relevance; id breaks ties.
+        after (optional): Cursor returned as 'next_key' by the previous page.
+        offset (int, optional): Plain OFFSET, used only when no cursor is given.
+        limit (int): Page size.
+
+    Returns:
+        dict: {'rows': [dict, ...], 'total': int, 'next_key': cursor or None}
+    """
+    ranked = sort == "rank"
+    if ranked and not (search and _fts_match_expression(search) and _fts_available()):
+        ranked, sort = False, "name"  # nothing to rank by
+    if not ranked and sort not in MEDICINE_SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort key: {sort}")
+    if after is not None:
+        # A cursor only makes sense for the same search that returned it
+        if ranked and (isinstance(after, bool) or not isinstance(after, int)):
+            raise ValueError(f"Ranked search expects an int offset cursor, got {after!r}")
+        if not ranked and (not isinstance(after, (tuple, list)) or len(after) != 2):
+            raise ValueError(f"Sorted listing expects a (value, id) cursor, got {after!r}")
+    where_sql, params = _medicine_filter_sql(search, in_stock, exclude_expired)
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM medicines{where_sql}", params)
+        total = cursor.fetchone()[0]
+
+        if ranked:
+            # Relevance order has no stable column to seek on: the cursor is an offset
+            start = after if after is not None else (offset or 0)
+            cursor.execute(f"""
+                SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+                FROM (SELECT rowid AS fts_id, bm25(medicines_fts, {_FTS_WEIGHTS}) AS score
+                      FROM medicines_fts WHERE medicines_fts MATCH ?) AS f
+                JOIN medicines ON medicines.id = f.fts_id{where_sql.replace(" WHERE ", " AND ", 1)}
+                ORDER BY f.score, name, id
+                LIMIT ? OFFSET ?
+            """, [_fts_match_expression(search)] + params + [limit + 1, start])
+            rows = [dict(row) for row in cursor.fetchall()]
+            next_key = start + limit if len(rows) > limit else None
+            return {"rows": rows[:limit], "total": total, "next_key": next_key}
+
+        column = MEDICINE_SORT_COLUMNS[sort]
+        page_sql = where_sql
+        page_params = list(params)
+        if after is not None:
+            page_sql += (" AND " if page_sql else " WHERE ") + f"({column}, id) > (?, ?)"
+            page_params.extend(after)
+        page_sql += f" ORDER BY {column}, id LIMIT ?"
+        page_params.append(limit + 1)  # one extra row tells us if there is a next page
+        if after is None and offset:
+            page_sql += " OFFSET ?"
+            page_params.append(offset)
+
+        cursor.execute(f"""
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+            FROM medicines{page_sql}
+        """, page_params)
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_key = (rows[-1][column], rows[-1]["id"])
+    return {"rows": rows, "total": total, "next_key": next_key}
+
+def search_medicines(text, limit=50, after=None, in_stock=True, exclude_expired=False):
+    """
+    Ranked prefix search used by every medicine search box.
+    'para 50' matches "Paracetamol 500mg"; best matches (name hits first) come first.
+    Empty text lists medicines by name. Same return shape as query_medicines.
+    """
+    text = (text or "").strip()
+    return query_medicines(
+        search=text or None,
+        in_stock=in_stock,
+        exclude_expired=exclude_expired,
+        sort="rank" if text else "name",
+        after=after,
+        limit=limit
+    )
+
+def get_medicine(med_id):
+    """Returns a single medicine as a dict, or None."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+            FROM medicines WHERE id = ?
+        """, (med_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+def get_medicines_by_ids(ids):
+    """Returns the current rows for the given medicine ids (any stock level)."""
+    ids = list(ids)
+    rows = []
+    with connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(ids), 500):  # stay under SQLite's variable limit
+            chunk = ids[start:start + 500]
+            cursor.execute(f"""
+                SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+                FROM medicines WHERE id IN ({",".join("?" * len(chunk))})
+            """, chunk)
+            rows.extend(dict(row) for row in cursor.fetchall())
+    return rows
 
 def add_medicine(med):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (
-        med["name"], med["strength"], med["batch_no"], med["expiry_date"], med["quantity"], med["unit_price"]
-    ))
-    conn.commit()
-    conn.close()
-    
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            # A sold-out row with the same name/batch may still await archival
+            _archive_zero_stock(conn, " AND name = ? AND batch_no = ?", (med["name"], med["batch_no"]))
+            cursor.execute("""
+                INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                med["name"], med["strength"], med["batch_no"], med["expiry_date"], med["quantity"], med["unit_price"]
+            ))
+            conn.commit()
+            med_id = cursor.lastrowid
+    except sqlite3.IntegrityError as e:
+        raise Exception(f"Medicine could not be saved: {str(e)}")
+    db_signals.medicines_changed.emit([med_id])
+    return med_id
+
 def update_medicine(med_id, med):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE medicines SET
-            name=?,
-            strength=?,
-            batch_no=?,
-            expiry_date=?,
-            quantity=?,
-            unit_price=?
-        WHERE id=?
-    """, (
-        med["name"], med["strength"], med["batch_no"], med["expiry_date"],
-        med["quantity"], med["unit_price"], med_id
-    ))
-    conn.commit()
-    conn.close()
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            _archive_zero_stock(conn, " AND name = ? AND batch_no = ? AND id != ?", (med["name"], med["batch_no"], med_id))
+            cursor.execute("""
+                UPDATE medicines SET
+                    name=?,
+                    strength=?,
+                    batch_no=?,
+                    expiry_date=?,
+                    quantity=?,
+                    unit_price=?
+                WHERE id=?
+            """, (
+                med["name"], med["strength"], med["batch_no"], med["expiry_date"],
+                med["quantity"], med["unit_price"], med_id
+            ))
+            conn.commit()
+    except sqlite3.IntegrityError as e:
+        raise Exception(f"Medicine could not be saved: {str(e)}")
+    db_signals.medicines_changed.emit([med_id])
 
 def delete_medicine(med_id):
     """Delete a medicine by ID from the database"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM medicines WHERE id = ?", (med_id,))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise ValueError("No medicine found with the given ID.")
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM medicines WHERE id = ?", (med_id,))
+            conn.commit()
+            if cursor.rowcount == 0:
+                raise ValueError("No medicine found with the given ID.")
+        db_signals.medicines_removed.emit([med_id])
     except sqlite3.Error as e:
         raise Exception(f"Database error: {str(e)}")
     finally:
-        conn.close()
         db_signals.medicine_updated.emit()  # Signal update after deletion
 
 def batch_number_exists(name, batch_no, exclude_id=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-    if exclude_id:
-        cursor.execute(
-            "SELECT 1 FROM medicines WHERE name=? AND batch_no=? AND id!=? LIMIT 1",
-            (name, batch_no, exclude_id)
-        )
-    else:
-        cursor.execute(
-            "SELECT 1 FROM medicines WHERE name=? AND batch_no=? LIMIT 1",
-            (name, batch_no)
-        )
-    result = cursor.fetchone()
-    conn.close()
-    return bool(result)
+    with connection() as conn:
+        cursor = conn.cursor()
+        if exclude_id:
+            cursor.execute(
+                "SELECT 1 FROM medicines WHERE name=? AND batch_no=? AND id!=? AND quantity > 0 LIMIT 1",
+                (name, batch_no, exclude_id)
+            )
+        else:
+            cursor.execute(
+                "SELECT 1 FROM medicines WHERE name=? AND batch_no=? AND quantity > 0 LIMIT 1",
+                (name, batch_no)
+            )
+        return bool(cursor.fetchone())
+
+# --- Zero-stock archival ---
+# Sold-out medicines stay in medicines with quantity <= 0 (hidden from every
+# in-stock listing and from the inventory cache) until archive_zero_stock()
+# moves them all in one set-based transaction. maintenance.py schedules it.
+
+def _archive_zero_stock(conn, where="", params=()):
+    """Archive + delete zero-stock rows (optionally narrowed by where) inside the caller's transaction."""
+    ids = [row[0] for row in conn.execute(f"SELECT id FROM medicines WHERE quantity <= 0{where}", params)]
+    if ids:
+        conn.execute(f"""
+            INSERT INTO archived_medicines
+            (id, name, strength, batch_no, expiry_date, quantity, unit_price, last_updated)
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, last_updated
+            FROM medicines WHERE quantity <= 0{where}
+        """, params)
+        conn.execute(f"DELETE FROM medicines WHERE quantity <= 0{where}", params)
+    return ids
+
+def archive_zero_stock():
+    """
+    Move every medicine with quantity <= 0 to archived_medicines (one
+    INSERT ... SELECT and one DELETE, one transaction).
+    Returns {"rows": rows moved, "seconds": time taken}.
+    """
+    started = time.perf_counter()
+    try:
+        with unit_of_work() as uow:
+            ids = _archive_zero_stock(uow.conn)
+            if ids:
+                uow.after_commit(db_signals.medicines_removed.emit, ids)
+    except sqlite3.Error as e:
+        raise Exception(f"Database error archiving out-of-stock medicines: {str(e)}")
+    return {"rows": len(ids), "seconds": time.perf_counter() - started}
 
 def check_and_remove_zero_stock():
     """Remove medicines with zero quantity from database"""
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Get all medicines with zero quantity
-        cursor.execute("SELECT id, name FROM medicines WHERE quantity <= 0")
-        zero_stock_meds = cursor.fetchall()
-        
-        if zero_stock_meds:
-            # Archive before deleting
-            # Ensure the order of columns matches the INSERT statement
-            cursor.executemany("""
-                INSERT INTO archived_medicines 
-                (id, name, strength, batch_no, expiry_date, quantity, unit_price, last_updated)
-                SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, last_updated
-                FROM medicines WHERE id = ?
-            """, [(med["id"],) for med in zero_stock_meds]) # Access by key due to row_factory
-            
-            # Delete from medicines table
-            cursor.executemany("DELETE FROM medicines WHERE id = ?", 
-                             [(med["id"],) for med in zero_stock_meds]) # Access by key
-            
-            conn.commit()
-            return True, f"Removed {len(zero_stock_meds)} out-of-stock medicines"
-        return False, "No out-of-stock medicines found"
+        moved = archive_zero_stock()["rows"]
     except Exception as e:
-        conn.rollback()
         return False, str(e)
-    finally:
-        conn.close()
+    if moved:
+        return True, f"Removed {moved} out-of-stock medicines"
+    return False, "No out-of-stock medicines found"
+
+def _change_stock(uow, medicine_id, quantity_change, unit_price=None):
+    """
+    Apply a stock change inside uow. Returns the row's (name, quantity)
+    afterwards, or None if there is no such medicine. The matching
+    medicines_changed / medicines_removed signal is queued for after commit.
+    """
+    if unit_price is None:
+        uow.execute("UPDATE medicines SET quantity = quantity + ? WHERE id = ?", (quantity_change, medicine_id))
+    else:
+        uow.execute("UPDATE medicines SET quantity = quantity + ?, unit_price = ? WHERE id = ?",
+                    (quantity_change, unit_price, medicine_id))
+    row = uow.execute("SELECT name, quantity FROM medicines WHERE id = ?", (medicine_id,)).fetchone()
+    if row is None:
+        return None
+    if row["quantity"] <= 0:
+        uow.after_commit(db_signals.medicines_removed.emit, [medicine_id])
+    else:
+        uow.after_commit(db_signals.medicines_changed.emit, [medicine_id])
+    return row
+
+def take_stock(uow, lines):
+    """
+    Decrement stock inside uow for lines ({medicine_id: quantity}) with one
+    batched conditional UPDATE ... SET quantity = quantity - ? WHERE id = ?
+    AND quantity >= ?. A row only changes if enough stock is left, so there
+    is no SELECT first and two terminals cannot oversell the same batch.
+    Success is checked via rowcount (one row per line).
+
+    Returns [] on success (medicines_changed is queued), otherwise the
+    shortages as [{"id", "name", "quantity", "requested"}] with nothing
+    taken; name/quantity are None for a medicine that no longer exists.
+    """
+    if any(qty <= 0 for qty in lines.values()):
+        raise ValueError("Stock movements must take a positive quantity.")
+    uow.execute("SAVEPOINT take_stock")
+    cursor = uow.executemany(
+        "UPDATE medicines SET quantity = quantity - ? WHERE id = ? AND quantity >= ?",
+        [(qty, med_id, qty) for med_id, qty in lines.items()]
+    )
+    if cursor.rowcount == len(lines):
+        uow.execute("RELEASE take_stock")
+        uow.after_commit(db_signals.medicines_changed.emit, list(lines))
+        return []
+    # Some line was short: undo the lines that went through and report
+    uow.execute("ROLLBACK TO take_stock")
+    uow.execute("RELEASE take_stock")
+    placeholders = ",".join("?" * len(lines))
+    stock = {row["id"]: row for row in uow.execute(
+        f"SELECT id, name, quantity FROM medicines WHERE id IN ({placeholders})", list(lines)
+    ).fetchall()}
+    shortages = []
+    for med_id, qty in lines.items():
+        row = stock.get(med_id)
+        if row is None or row["quantity"] < qty:
+            shortages.append({
+                "id": med_id,
+                "name": row["name"] if row else None,
+                "quantity": row["quantity"] if row else None,
+                "requested": qty,
+            })
+    return shortages
 
 def update_medicine_quantity(medicine_id, quantity_change):
-    """Update medicine quantity and remove if reaches 0"""
-    conn = get_connection()
+    """Update medicine quantity; a row that reaches 0 is archived by the next archive_zero_stock()"""
     try:
-        cursor = conn.cursor()
-        
-        # Update quantity
-        cursor.execute("UPDATE medicines SET quantity = quantity + ? WHERE id = ?", 
-                      (quantity_change, medicine_id))
-        
-        # Check if quantity is now <= 0
-        cursor.execute("""
-            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price 
-            FROM medicines WHERE id = ?
-        """, (medicine_id,))
-        med_data = cursor.fetchone() # This is now a sqlite3.Row object
-        
-        if med_data and med_data["quantity"] <= 0:  # Access by key
-            # Archive before deleting
-            cursor.execute("""
-                INSERT INTO archived_medicines 
-                (id, name, strength, batch_no, expiry_date, quantity, unit_price, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            """, (med_data["id"], med_data["name"], med_data["strength"], med_data["batch_no"],
-                  med_data["expiry_date"], med_data["quantity"], med_data["unit_price"]))
-            
-            cursor.execute("DELETE FROM medicines WHERE id = ?", (medicine_id,))
-            message = f"Medicine '{med_data['name']}' removed due to zero stock"
-            db_signals.medicine_updated.emit()
-        else:
-            message = f"Quantity updated for medicine ID {medicine_id}"
-        
-        conn.commit()
-        return True, message
+        with unit_of_work() as uow:
+            med_data = _change_stock(uow, medicine_id, quantity_change)
     except Exception as e:
-        conn.rollback()
         return False, str(e)
-    finally:
-        conn.close()
+    if med_data and med_data["quantity"] <= 0:
+        db_signals.medicine_updated.emit()
+        return True, f"Medicine '{med_data['name']}' removed due to zero stock"
+    return True, f"Quantity updated for medicine ID {medicine_id}"
+
+# --- BULK IMPORT ---
+# Rows are staged raw into a temp table, validated and de-duplicated with a
+# few set-based statements, then matched to an existing (name, batch_no) --
+# the oldest row if the inventory already holds several -- and applied with
+# one UPDATE for the matches and one INSERT ... SELECT for the rest.
+
+IMPORT_COLUMNS = ["name", "strength", "batch_no", "expiry_date", "quantity", "unit_price"]
+
+# What an imported row does to an existing (name, batch_no)
+# (columns of the staging row s; None: leave the existing row alone)
+IMPORT_CONFLICT_ACTIONS = {
+    "add": "medicines.quantity + s.quantity, s.strength, s.expiry_date, s.unit_price",
+    "replace": "s.quantity, s.strength, s.expiry_date, s.unit_price",
+    "skip": None,
+}
+
+# First failing rule wins. quantity/unit_price are NUMERIC columns in the
+# staging table, so only well-formed numbers arrive as integer/real. The
+# julianday round trip rejects impossible dates such as 2030-02-30.
+_IMPORT_VALIDATION_SQL = """
+    UPDATE import_staging SET error = CASE
+        WHEN name = '' THEN 'Medicine name is empty'
+        WHEN batch_no = '' THEN 'Batch number is empty'
+        WHEN date(julianday(expiry_date)) IS NOT expiry_date THEN 'Expiry date must be a valid YYYY-MM-DD date'
+        WHEN expiry_date < date('now', 'localtime') THEN 'Expiry date is in the past'
+        WHEN typeof(quantity) != 'integer' OR quantity < 0 THEN 'Quantity must be a whole number, 0 or more'
+        WHEN typeof(unit_price) NOT IN ('integer', 'real') OR unit_price <= 0 THEN 'Unit price must be a positive number'
+    END
+"""
+
+_IMPORT_DUPLICATE_SQL = """
+    UPDATE import_staging SET error = 'Duplicate of line ' || (
+        SELECT MIN(s.line) FROM import_staging s
+        WHERE s.name = import_staging.name AND s.batch_no = import_staging.batch_no AND s.error IS NULL
+    ) || ' (same name and batch number)'
+    WHERE error IS NULL AND line > (
+        SELECT MIN(s.line) FROM import_staging s
+        WHERE s.name = import_staging.name AND s.batch_no = import_staging.batch_no AND s.error IS NULL
+    )
+"""
+
+def bulk_import_medicines(records, on_conflict="add", progress=None, batch_size=5000):
+    """
+    Import medicines in one transaction. records: (line, name, strength,
+    batch_no, expiry_date, quantity, unit_price) tuples of raw values.
+    on_conflict: key of IMPORT_CONFLICT_ACTIONS. progress(done, total) is
+    called while staging. Returns {"inserted", "updated", "skipped",
+    "errors": [(line, name, batch_no, message)]}; rows with errors are not imported.
+    """
+    if on_conflict not in IMPORT_CONFLICT_ACTIONS:
+        raise ValueError(f"Unknown conflict action: {on_conflict}")
+    records = list(records)
+    with connection() as conn:
+        try:
+            conn.execute("DROP TABLE IF EXISTS temp.import_staging")
+            conn.execute("""
+                CREATE TEMP TABLE import_staging (
+                    line INTEGER PRIMARY KEY, name TEXT, strength TEXT, batch_no TEXT,
+                    expiry_date TEXT, quantity NUMERIC, unit_price NUMERIC, error TEXT,
+                    target_id INTEGER  -- existing medicine this row updates
+                )
+            """)
+            for start in range(0, len(records), batch_size):
+                conn.executemany(
+                    "INSERT INTO import_staging (line, name, strength, batch_no, expiry_date, quantity, unit_price) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    records[start:start + batch_size]
+                )
+                if progress:
+                    progress(min(start + batch_size, len(records)), len(records))
+            conn.execute(_IMPORT_VALIDATION_SQL)
+            conn.execute("CREATE INDEX temp.idx_import_staging_batch ON import_staging(name, batch_no, line) WHERE error IS NULL")
+            conn.execute(_IMPORT_DUPLICATE_SQL)
+            conn.commit()  # staging lives in temp; the upsert below takes the write lock
+
+            with unit_of_work() as uow:
+                # Rows in the file are unique per (name, batch_no) by now, so each
+                # existing medicine is the target of at most one staging row
+                uow.execute("""
+                    UPDATE import_staging SET target_id = (
+                        SELECT MIN(m.id) FROM medicines m
+                        WHERE m.name = import_staging.name AND m.batch_no = import_staging.batch_no
+                    ) WHERE error IS NULL
+                """)
+                uow.execute("CREATE INDEX temp.idx_import_staging_target ON import_staging(target_id)")
+                valid, existing = uow.execute(
+                    "SELECT COUNT(*), COUNT(target_id) FROM import_staging WHERE error IS NULL"
+                ).fetchone()
+                ids = [row[0] for row in uow.execute(
+                    "SELECT target_id FROM import_staging WHERE target_id IS NOT NULL"
+                ).fetchall()] if IMPORT_CONFLICT_ACTIONS[on_conflict] else []
+                if ids:
+                    uow.execute(f"""
+                        UPDATE medicines SET (quantity, strength, expiry_date, unit_price) = (
+                            SELECT {IMPORT_CONFLICT_ACTIONS[on_conflict]}
+                            FROM import_staging s WHERE s.target_id = medicines.id
+                        ) WHERE id IN (SELECT target_id FROM import_staging WHERE target_id IS NOT NULL)
+                    """)
+                first_new = uow.execute("SELECT COALESCE(MAX(id), 0) FROM medicines").fetchone()[0]
+                uow.execute("""
+                    INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price)
+                    SELECT name, strength, batch_no, expiry_date, quantity, unit_price
+                    FROM import_staging WHERE error IS NULL AND target_id IS NULL ORDER BY line
+                """)
+                ids += [row[0] for row in uow.execute(
+                    "SELECT id FROM medicines WHERE id > ?", (first_new,)
+                ).fetchall()]
+            errors = [tuple(row) for row in conn.execute(
+                "SELECT line, name, batch_no, error FROM import_staging WHERE error IS NOT NULL ORDER BY line"
+            )]
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise Exception(f"Database error importing medicines: {str(e)}")
+        except BaseException:
+            conn.rollback()  # nothing staged or upserted may be committed by the cleanup below
+            raise
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp.import_staging")
+    if ids:
+        db_signals.medicines_changed.emit(ids)
+    skipped = existing if on_conflict == "skip" else 0
+    return {
+        "inserted": valid - existing,
+        "updated": existing - skipped,
+        "skipped": skipped,
+        "errors": errors,
+    }
 
 # --- SALES & PURCHASES ---
 def record_sale(medicine_id, quantity, customer_id=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT quantity FROM medicines WHERE id=?", (medicine_id,))
-        row = cursor.fetchone()
-        if not row or row["quantity"] < quantity: # Access by key
+    with unit_of_work() as uow:
+        if take_stock(uow, {medicine_id: quantity}):
             raise ValueError("Not enough stock for this sale.")
-        
-        # Update quantity (will auto-remove if reaches 0)
-        success, message = update_medicine_quantity(medicine_id, -quantity)
-        if not success:
-            raise ValueError(message)
-        
-        cursor.execute("""
+        uow.execute("""
             INSERT INTO sales (medicine_id, quantity, date, customer_id)
             VALUES (?, ?, ?, ?)
         """, (
             medicine_id, quantity, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), customer_id
         ))
-        conn.commit()
-        db_signals.sale_recorded.emit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+        uow.after_commit(db_signals.sale_recorded.emit)
 
 def record_purchase(medicine_id, quantity, supplier_id=None): # Removed unit_price as it's not in your sales table
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT 1 FROM medicines WHERE id=?", (medicine_id,))
-        if not cursor.fetchone():
+    with unit_of_work() as uow:
+        if _change_stock(uow, medicine_id, quantity) is None:
             raise ValueError("Medicine does not exist.")
-        
-        # Update quantity (will auto-remove if reaches 0)
-        success, message = update_medicine_quantity(medicine_id, quantity)
-        if not success:
-            raise ValueError(message)
-        
-        cursor.execute("""
+        uow.execute("""
             INSERT INTO purchases (medicine_id, quantity, date, supplier_id)
             VALUES (?, ?, ?, ?)
         """, (
             medicine_id, quantity, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), supplier_id
         ))
-        conn.commit()
-        db_signals.medicine_updated.emit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+        uow.after_commit(db_signals.medicine_updated.emit)
 
 def get_sales_history():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.id, m.name AS medicine_name, s.quantity, s.date, c.name AS customer_name
-        FROM sales s
-        JOIN medicines m ON s.medicine_id = m.id
-        LEFT JOIN customers c ON s.customer_id = c.id
-        ORDER BY s.date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    with connection() as conn:
+        cursor = conn.cursor()
+        # Medicines sold down to zero are archived: fall back to the archived name
+        cursor.execute("""
+            SELECT s.id, COALESCE(m.name, am.name, 'Unknown') AS medicine_name,
+                   s.quantity, s.date, c.name AS customer_name
+            FROM sales s
+            LEFT JOIN medicines m ON s.medicine_id = m.id
+            LEFT JOIN archived_medicines am ON s.medicine_id = am.id
+            LEFT JOIN customers c ON s.customer_id = c.id
+            ORDER BY s.date DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
 
 def get_purchases_history():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT p.id, m.name AS medicine_name, p.quantity, p.date, s.name AS supplier_name
-        FROM purchases p
-        JOIN medicines m ON p.medicine_id = m.id
-        LEFT JOIN suppliers s ON p.supplier_id = s.id
-        ORDER BY p.date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT p.id, COALESCE(m.name, am.name, 'Unknown') AS medicine_name,
+                   p.quantity, p.date, s.name AS supplier_name
+            FROM purchases p
+            LEFT JOIN medicines m ON p.medicine_id = m.id
+            LEFT JOIN archived_medicines am ON p.medicine_id = am.id
+            LEFT JOIN suppliers s ON p.supplier_id = s.id
+            ORDER BY p.date DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+# --- DASHBOARD ---
+LOW_STOCK_THRESHOLD = 10
+EXPIRY_WINDOW_DAYS = 30
+
+def _day_bounds(now):
+    """'YYYY-MM-DD HH:MM:SS' range covering the calendar day of `now`."""
+    start = now.strftime("%Y-%m-%d")
+    end = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+    return start, end
+
+def _expiry_window(now, days):
+    """expiry_days bounds: strictly after today and at most `days` days ahead."""
+    today = day_number(now)
+    return today, today + days
+
+def get_dashboard_metrics(now=None, low_stock_threshold=LOW_STOCK_THRESHOLD,
+                          expiry_window_days=EXPIRY_WINDOW_DAYS):
+    """
+    The four dashboard card numbers from index-only aggregate queries.
+
+    Returns:
+        dict: {'total_medicines', 'today_sales', 'low_stock', 'expiring_soon'}
+    """
+    now = now or datetime.now()
+    day_start, day_end = _day_bounds(now)
+    expiry_from, expiry_to = _expiry_window(now, expiry_window_days)
+    with connection() as conn:
+        row = conn.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM medicines WHERE quantity > 0) AS total_medicines,
+                (SELECT COUNT(*) FROM sales WHERE date >= ? AND date < ?) AS today_sales,
+                (SELECT COUNT(*) FROM medicines WHERE quantity > 0 AND quantity < ?) AS low_stock,
+                (SELECT COUNT(*) FROM medicines
+                 WHERE quantity > 0 AND expiry_days > ? AND expiry_days <= ?) AS expiring_soon
+        """, (day_start, day_end, low_stock_threshold, expiry_from, expiry_to)).fetchone()
+        return dict(row)
+
+def get_sales_for_day(now=None):
+    """Sales made on the calendar day of `now`, newest first (dashboard details)."""
+    day_start, day_end = _day_bounds(now or datetime.now())
+    with connection() as conn:
+        cursor = conn.cursor()
+        # Medicines sold down to zero are archived: fall back to the archived name
+        cursor.execute("""
+            SELECT s.id, COALESCE(m.name, am.name, 'Unknown') AS medicine_name,
+                   s.quantity, s.date, c.name AS customer_name
+            FROM sales s
+            LEFT JOIN medicines m ON s.medicine_id = m.id
+            LEFT JOIN archived_medicines am ON s.medicine_id = am.id
+            LEFT JOIN customers c ON s.customer_id = c.id
+            WHERE s.date >= ? AND s.date < ?
+            ORDER BY s.date DESC
+        """, (day_start, day_end))
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_low_stock_medicines(threshold=LOW_STOCK_THRESHOLD):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+            FROM medicines
+            WHERE quantity > 0 AND quantity < ?
+            ORDER BY quantity, name
+        """, (threshold,))
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_expiring_medicines(now=None, window_days=EXPIRY_WINDOW_DAYS):
+    expiry_from, expiry_to = _expiry_window(now or datetime.now(), window_days)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+            FROM medicines
+            WHERE quantity > 0 AND expiry_days > ? AND expiry_days <= ?
+            ORDER BY expiry_days, name
+        """, (expiry_from, expiry_to))
+        return [dict(row) for row in cursor.fetchall()]
 
 # --- EXPORT HELPERS ---
-def get_inventory_data():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+# Export queries by name. get_*_data() load them whole; export_engine.py
+# streams them with stream_query() so big exports use constant memory.
+EXPORT_QUERIES = {
+    "inventory": """
         SELECT name, strength, batch_no, expiry_date, quantity, unit_price 
         FROM medicines 
         WHERE quantity > 0
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
-
-def get_sales_data():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.id AS sale_id, m.name AS medicine, s.quantity, c.name AS customer, s.date
+    """,
+    "inventory_alerts": """
+        SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days
+        FROM medicines
+        WHERE quantity > 0
+        ORDER BY name
+    """,
+    "sales": """
+        SELECT s.id AS sale_id, COALESCE(m.name, am.name, 'Unknown') AS medicine,
+               s.quantity, c.name AS customer, s.date
         FROM sales s
-        JOIN medicines m ON s.medicine_id = m.id
+        LEFT JOIN medicines m ON s.medicine_id = m.id
+        LEFT JOIN archived_medicines am ON s.medicine_id = am.id
         LEFT JOIN customers c ON s.customer_id = c.id
         ORDER BY s.date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
-
-def get_purchases_data():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT p.id AS purchase_id, m.name AS medicine, p.quantity, s.name AS supplier, p.date
+    """,
+    "purchases": """
+        SELECT p.id AS purchase_id, COALESCE(m.name, am.name, 'Unknown') AS medicine,
+               p.quantity, s.name AS supplier, p.date
         FROM purchases p
-        JOIN medicines m ON p.medicine_id = m.id
+        LEFT JOIN medicines m ON p.medicine_id = m.id
+        LEFT JOIN archived_medicines am ON p.medicine_id = am.id
         LEFT JOIN suppliers s ON p.supplier_id = s.id
         ORDER BY p.date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    """,
+    "orders": """
+        SELECT id, medicine_name, quantity_ordered, status, order_date
+        FROM orders
+    """,
+}
+
+def get_inventory_data():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_QUERIES["inventory"])
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_sales_data():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_QUERIES["sales"])
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_purchases_data():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_QUERIES["purchases"])
+        return [dict(row) for row in cursor.fetchall()]
+
+def count_rows(sql, params=()):
+    """Number of rows a query returns (progress totals, "nothing to export" checks)."""
+    with connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+
+def stream_query(sql, params=(), batch_size=1000):
+    """
+    Generator streaming a query with fetchmany: yields the column names
+    first, then lists of up to batch_size row tuples. Only one batch is held
+    in memory. Consume it on a single thread (it uses that thread's connection).
+    """
+    with connection() as conn:
+        cursor = conn.execute(sql, params)
+        try:
+            yield [column[0] for column in cursor.description]
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield [tuple(row) for row in batch]
+        finally:
+            cursor.close()
+
+def get_table_columns(table):
+    """[(name, declared type)] for a table, in column order."""
+    with connection() as conn:
+        return [(row["name"], row["type"].upper()) for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def get_partition_days(table, date_column, since=None):
+    """Distinct 'YYYY-MM-DD' days present in table.date_column (optionally >= since), oldest first."""
+    sql = f"SELECT DISTINCT substr({date_column}, 1, 10) AS day FROM {table} WHERE {date_column} IS NOT NULL"
+    params = ()
+    if since:
+        sql += f" AND {date_column} >= ?"
+        params = (since,)
+    with connection() as conn:
+        return [row["day"] for row in conn.execute(sql + " ORDER BY day", params)]
 
 def get_archived_medicines():
     """Get list of all archived medicines"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, archive_date
-        FROM archived_medicines
-        ORDER BY archive_date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, strength, batch_no, expiry_date, quantity, unit_price, archive_date
+            FROM archived_medicines
+            ORDER BY archive_date DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
 
 def record_sale_with_stock_update(medicine_id, quantity, customer_id=None):
     """Atomically records sale and updates stock"""
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        
-        # First verify stock
-        cursor.execute("SELECT quantity FROM medicines WHERE id=?", (medicine_id,))
-        row = cursor.fetchone()
-        if not row or row["quantity"] < quantity: # Access by key
-            return False, "Not enough stock for this sale"
-        
-        # Update stock
-        cursor.execute("UPDATE medicines SET quantity=quantity-? WHERE id=?", 
-                      (quantity, medicine_id))
-        
-        # Record sale
-        cursor.execute("""
-            INSERT INTO sales (medicine_id, quantity, date, customer_id)
-            VALUES (?, ?, datetime('now'), ?)
-        """, (medicine_id, quantity, customer_id))
-        
-        conn.commit()
-        return True, "Sale recorded successfully"
+        with unit_of_work() as uow:
+            if take_stock(uow, {medicine_id: quantity}):
+                return False, "Not enough stock for this sale"
+            uow.execute("""
+                INSERT INTO sales (medicine_id, quantity, date, customer_id)
+                VALUES (?, ?, datetime('now'), ?)
+            """, (medicine_id, quantity, customer_id))
     except Exception as e:
-        conn.rollback()
         return False, str(e)
-    finally:
-        conn.close()
+    return True, "Sale recorded successfully"
+
+def record_invoice(items, customer_id=None, invoice_number=None):
+    """
+    Records a whole invoice in ONE transaction (one fsync, all-or-nothing):
+    validates stock for every line, decrements stock, inserts all sales
+    rows and writes an invoice header.
+
+    Args:
+        items (list): [{'medicine_id': int, 'quantity': int, 'total': float (optional)}, ...]
+        customer_id (int, optional): Customer the invoice belongs to.
+        invoice_number (str, optional): Printed receipt number.
+
+    Returns:
+        int: The new invoice id.
+
+    Raises:
+        ValueError: Empty invoice or not enough stock for one or more lines
+                    (nothing is written in that case).
+    """
+    if not items:
+        raise ValueError("Invoice has no items.")
+
+    # The same medicine may appear on several lines -> validate the combined quantity
+    needed = {}
+    for item in items:
+        if item["quantity"] <= 0:
+            raise ValueError("Invoice quantities must be positive.")
+        needed[item["medicine_id"]] = needed.get(item["medicine_id"], 0) + item["quantity"]
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    total = sum(item.get("total", 0) or 0 for item in items)
+
+    try:
+        with unit_of_work() as uow:
+            # Conditional decrement of every line; nothing is taken if any line is short
+            shortages = take_stock(uow, needed)
+            if shortages:
+                raise ValueError("Not enough stock for this invoice:\n" + "\n".join(
+                    f"Medicine ID {short['id']} no longer exists" if short["name"] is None
+                    else f"{short['name']}: {short['quantity']} in stock, {short['requested']} requested"
+                    for short in shortages
+                ))
+
+            # Invoice header
+            invoice_id = uow.execute("""
+                INSERT INTO invoices (invoice_number, customer_id, date, item_count, total)
+                VALUES (?, ?, ?, ?, ?)
+            """, (invoice_number, customer_id, now, len(items), total)).lastrowid
+
+            # Sales rows
+            uow.executemany("""
+                INSERT INTO sales (medicine_id, quantity, date, customer_id, invoice_id)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(item["medicine_id"], item["quantity"], now, customer_id, invoice_id) for item in items])
+
+            uow.after_commit(db_signals.sale_recorded.emit)
+    except sqlite3.Error as e:
+        raise Exception(f"Database error recording invoice: {str(e)}")
+    return invoice_id
 
 def record_purchase_with_stock_update(medicine_id, quantity, unit_price, supplier_id=None):
     """Atomically records purchase and updates stock"""
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Update stock
-        cursor.execute("UPDATE medicines SET quantity=quantity+?, unit_price=? WHERE id=?", 
-                      (quantity, unit_price, medicine_id))
-        
-        # Record purchase
-        cursor.execute("""
-            INSERT INTO purchases (medicine_id, quantity, date, supplier_id)
-            VALUES (?, ?, datetime('now'), ?)
-        """, (medicine_id, quantity, supplier_id))
-        
-        conn.commit()
-        return True, "Purchase recorded successfully"
+        with unit_of_work() as uow:
+            if _change_stock(uow, medicine_id, quantity, unit_price) is None:
+                return False, "Medicine does not exist"
+            uow.execute("""
+                INSERT INTO purchases (medicine_id, quantity, date, supplier_id)
+                VALUES (?, ?, datetime('now'), ?)
+            """, (medicine_id, quantity, supplier_id))
     except Exception as e:
-        conn.rollback()
         return False, str(e)
-    finally:
-        conn.close()
+    return True, "Purchase recorded successfully"
 
 # --- ORDER MANAGEMENT ---
 def get_all_orders():
     """Retrieve all orders from the database"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, medicine_name, quantity_ordered, status, order_date FROM orders")
-        orders = [dict(row) for row in cursor.fetchall()] # Convert to dicts
-        return orders
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, medicine_name, quantity_ordered, status, order_date FROM orders")
+            orders = [dict(row) for row in cursor.fetchall()] # Convert to dicts
+            return orders
     except sqlite3.Error as e:
         raise Exception(f"Database error: {str(e)}")
-    finally:
-        conn.close()
 
 def insert_order(medicine_name, quantity_ordered):
     """Insert a new order into the database"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO orders (medicine_name, quantity_ordered, status, order_date)
-            VALUES (?, ?, ?, ?)
-        """, (medicine_name, quantity_ordered, "Pending", datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-        conn.commit()
-        return cursor.lastrowid
+        with unit_of_work() as uow:
+            return uow.execute("""
+                INSERT INTO orders (medicine_name, quantity_ordered, status, order_date)
+                VALUES (?, ?, ?, ?)
+            """, (medicine_name, quantity_ordered, "Pending", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))).lastrowid
     except sqlite3.Error as e:
-        conn.rollback()
         raise Exception(f"Database error: {str(e)}")
     finally:
-        conn.close()
         db_signals.order_updated.emit()
 
 def update_order_status(order_id, status):
     """Update the status of an order"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE orders SET status = ? WHERE id = ?", (status, order_id))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise ValueError("No order found with the given ID.")
+        with unit_of_work() as uow:
+            if uow.execute("UPDATE orders SET status = ? WHERE id = ?", (status, order_id)).rowcount == 0:
+                raise ValueError("No order found with the given ID.")
     except sqlite3.Error as e:
         raise Exception(f"Database error: {str(e)}")
     finally:
-        conn.close()
         db_signals.order_updated.emit()
 
 # --- NEW: SALES REPORT FUNCTION ---
 def get_sales_report_data(start_date=None, end_date=None):
     """
-    Retrieves sales report data from the database, aggregating by medicine.
-    Only considers 'Approved' orders.
-    Optionally filters by order date.
+    Retrieves sales report data aggregated by medicine, read from the
+    sales_daily_rollup table (one row per day and medicine) instead of the
+    raw sales rows.
 
     Args:
         start_date (str, optional): Start date in 'YYYY-MM-DD' format.
-        end_date (str, optional): End date in 'YYYY-MM-DD' format.
+        end_date (str, optional): End date in 'YYYY-MM-DD' format (inclusive).
 
     Returns:
         tuple: A tuple containing:
             - summary_data (dict): {'total_orders': int, 'total_quantity_sold': int}
             - sales_by_medicine_list (list): [{'medicine_name': str, 'total_quantity_sold': int, 'num_orders': int}, ...]
     """
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with connection() as conn:
+            cursor = conn.cursor()
 
-        # Build the WHERE clause for date filtering
-        date_filter_sql = ""
-        params = []
-        if start_date:
-            date_filter_sql += " AND date >= ?" # Using 'date' column from sales table
-            params.append(start_date + " 00:00:00") # Include start of day
-        if end_date:
-            date_filter_sql += " AND date <= ?"   # Using 'date' column from sales table
-            params.append(end_date + " 23:59:59") # Include end of day
-
-        # Query for sales by medicine
-        # Joining with medicines table to get medicine_name
-        cursor.execute(f"""
-            SELECT
-                m.name AS medicine_name,
-                SUM(s.quantity) AS total_quantity_sold,
-                COUNT(s.id) AS num_orders
-            FROM
-                sales s
-            JOIN
-                medicines m ON s.medicine_id = m.id
-            WHERE
-                1=1 {date_filter_sql} -- 1=1 is a trick to easily append AND clauses
-            GROUP BY
-                m.name
-            ORDER BY
-                total_quantity_sold DESC
-        """, params)
-        sales_by_medicine = [
-            {
-                "medicine_name": row["medicine_name"],
-                "total_quantity_sold": row["total_quantity_sold"],
-                "num_orders": row["num_orders"]
-            } for row in cursor.fetchall()
-        ]
-
-        # Query for overall summary
-        cursor.execute(f"""
-            SELECT
-                COUNT(id) AS total_orders,
-                SUM(quantity) AS total_quantity_sold
-            FROM
-                sales
-            WHERE
-                1=1 {date_filter_sql}
-        """, params)
-        summary_row = cursor.fetchone()
-        summary_data = {
-            "total_orders": summary_row["total_orders"] if summary_row and summary_row["total_orders"] is not None else 0,
-            "total_quantity_sold": summary_row["total_quantity_sold"] if summary_row and summary_row["total_quantity_sold"] is not None else 0
-        }
+            # Build the WHERE clause for day filtering
+            day_filter_sql = ""
+            params = []
+            if start_date:
+                day_filter_sql += " AND r.day >= ?"
+                params.append(start_date)
+            if end_date:
+                day_filter_sql += " AND r.day <= ?"
+                params.append(end_date)
+
+            # Sales by medicine; sold-out medicines are archived, so fall back to that name
+            cursor.execute(f"""
+                SELECT
+                    COALESCE(m.name, am.name, 'Unknown') AS medicine_name,
+                    SUM(r.qty) AS total_quantity_sold,
+                    SUM(r.count) AS num_orders
+                FROM
+                    sales_daily_rollup r
+                LEFT JOIN
+                    medicines m ON r.medicine_id = m.id
+                LEFT JOIN
+                    archived_medicines am ON r.medicine_id = am.id
+                WHERE
+                    1=1 {day_filter_sql} -- 1=1 is a trick to easily append AND clauses
+                GROUP BY
+                    medicine_name
+                ORDER BY
+                    total_quantity_sold DESC
+            """, params)
+            sales_by_medicine = [
+                {
+                    "medicine_name": row["medicine_name"],
+                    "total_quantity_sold": row["total_quantity_sold"],
+                    "num_orders": row["num_orders"]
+                } for row in cursor.fetchall()
+            ]
+
+            # Query for overall summary
+            cursor.execute(f"""
+                SELECT
+                    SUM(r.count) AS total_orders,
+                    SUM(r.qty) AS total_quantity_sold
+                FROM
+                    sales_daily_rollup r
+                WHERE
+                    1=1 {day_filter_sql}
+            """, params)
+            summary_row = cursor.fetchone()
+            summary_data = {
+                "total_orders": summary_row["total_orders"] if summary_row and summary_row["total_orders"] is not None else 0,
+                "total_quantity_sold": summary_row["total_quantity_sold"] if summary_row and summary_row["total_quantity_sold"] is not None else 0
+            }
 
-        return summary_data, sales_by_medicine
+            return summary_data, sales_by_medicine
 
     except sqlite3.Error as e:
         raise Exception(f"Database error fetching sales report: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
+
+def rebuild_sales_rollup():
+    """
+    Recompute sales_daily_rollup from all sales (history imported outside
+    the app, or after manual edits). Returns the number of rollup rows.
+    """
+    with connection() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = _rebuild_sales_rollup(conn)
+            conn.commit()
+            return rows
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise Exception(f"Database error rebuilding sales rollup: {str(e)}")
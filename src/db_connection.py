@@ -0,0 +1,103 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionManager:
+    """
+    Keeps one persistent SQLite connection per thread instead of opening and
+    closing a new connection for every db.py call.
+
+    Hooks:
+        on_connect(conn)  - run once when a thread's connection is created
+                            (pragmas, tracing, custom functions...)
+        on_close(conn)    - run just before a connection is closed
+
+    factory: sqlite3.Connection subclass used for new connections (profiling).
+    """
+
+    def __init__(self, database, factory=sqlite3.Connection):
+        self.database = database
+        self.factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # thread id -> connection
+        self._connect_hooks = []
+        self._close_hooks = []
+
+    # --- Lifecycle hooks ---
+
+    def add_connect_hook(self, hook):
+        self._connect_hooks.append(hook)
+
+    def add_close_hook(self, hook):
+        self._close_hooks.append(hook)
+
+    # --- Connection handling ---
+
+    def _open(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row  # Enable dictionary-like access to rows
+        for hook in self._connect_hooks:
+            hook(conn)
+        return conn
+
+    def acquire(self):
+        """Return this thread's connection, creating it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections[threading.get_ident()] = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager around the thread's persistent connection.
+        Any transaction left open by a failing block is rolled back so the
+        next caller on this thread starts clean. The connection is NOT closed.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    def close_thread_connection(self):
+        """Close the calling thread's connection (e.g. when a worker exits)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._connections.pop(threading.get_ident(), None)
+        self._close(conn)
+
+    def close_all(self):
+        """Close every connection the manager has handed out."""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        self._local = threading.local()
+        for conn in connections:
+            self._close(conn)
+
+    def configure(self, database):
+        """Point the manager at another database file, dropping open connections."""
+        self.close_all()
+        self.database = database
+
+    def _close(self, conn):
+        for hook in self._close_hooks:
+            try:
+                hook(conn)
+            except Exception:
+                pass
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass  # Closed from a different thread while in use
@@ -0,0 +1,498 @@
+import os
+import sys
+import sqlite3
+import tempfile
+
+def _create_medicine_fts(conn):
+    """
+    FTS5 index over medicines (external content, so no duplicated rows),
+    kept in sync by triggers. Quantity-only updates (every sale) don't touch it.
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS medicines_fts USING fts5(
+                name, strength, batch_no, expiry_date,
+                content='medicines', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='1 2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return  # SQLite built without FTS5: db.py falls back to LIKE search
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS medicines_fts_ai AFTER INSERT ON medicines BEGIN
+            INSERT INTO medicines_fts (rowid, name, strength, batch_no, expiry_date)
+            VALUES (new.id, new.name, new.strength, new.batch_no, new.expiry_date);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS medicines_fts_ad AFTER DELETE ON medicines BEGIN
+            INSERT INTO medicines_fts (medicines_fts, rowid, name, strength, batch_no, expiry_date)
+            VALUES ('delete', old.id, old.name, old.strength, old.batch_no, old.expiry_date);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS medicines_fts_au
+        AFTER UPDATE OF name, strength, batch_no, expiry_date ON medicines BEGIN
+            INSERT INTO medicines_fts (medicines_fts, rowid, name, strength, batch_no, expiry_date)
+            VALUES ('delete', old.id, old.name, old.strength, old.batch_no, old.expiry_date);
+            INSERT INTO medicines_fts (rowid, name, strength, batch_no, expiry_date)
+            VALUES (new.id, new.name, new.strength, new.batch_no, new.expiry_date);
+        END
+    """)
+    # Backfill existing rows
+    conn.execute("INSERT INTO medicines_fts (medicines_fts) VALUES ('rebuild')")
+
+
+# expiry_date ('YYYY-MM-DD') -> days since 1970-01-01; 2440587.5 is julianday('1970-01-01')
+_EXPIRY_DAYS_SQL = "CAST(julianday({row}.expiry_date) - 2440587.5 AS INTEGER)"
+
+
+# Sales rollup: one row per (day, medicine). Triggers keep it current inside
+# the same transaction as the sales insert/update/delete; rebuild_sales_rollup()
+# recomputes it.
+_SALES_ROLLUP_BACKFILL_SQL = """
+    INSERT INTO sales_daily_rollup (day, medicine_id, qty, count)
+    SELECT substr(date, 1, 10), medicine_id, SUM(quantity), COUNT(*)
+    FROM sales
+    GROUP BY substr(date, 1, 10), medicine_id
+"""
+
+
+def rebuild_sales_rollup(conn):
+    """Recompute sales_daily_rollup from the raw sales rows. Returns the row count."""
+    conn.execute("DELETE FROM sales_daily_rollup")
+    conn.execute(_SALES_ROLLUP_BACKFILL_SQL)
+    return conn.execute("SELECT COUNT(*) FROM sales_daily_rollup").fetchone()[0]
+
+
+def duplicate_batches(conn):
+    """
+    Medicines sharing (name, batch_no): [(name, batch_no, rows, differs)],
+    differs=True when their expiry dates or prices disagree. Reported only;
+    nothing merges them automatically.
+    """
+    return [tuple(row) for row in conn.execute("""
+        SELECT name, batch_no, COUNT(*) AS rows,
+               COUNT(DISTINCT expiry_date) > 1 OR COUNT(DISTINCT unit_price) > 1 AS differs
+        FROM medicines
+        GROUP BY name, batch_no HAVING COUNT(*) > 1
+        ORDER BY name, batch_no
+    """)]
+
+
+# --- Versioned Schema Migrations ---
+# Each migration is (version, description, steps). A step is either a SQL
+# string or a callable taking the connection. Versions are applied in order,
+# each inside its own transaction, and recorded in the schema_version table.
+# Never edit a migration that has shipped -- add a new one instead.
+
+MIGRATIONS = [
+    (1, "Covering index for in-stock medicine listing", [
+        # get_all_medicines / get_inventory_data: WHERE quantity > 0 ORDER BY name
+        """CREATE INDEX IF NOT EXISTS idx_medicines_instock_name
+           ON medicines(name, strength, batch_no, expiry_date, quantity, unit_price)
+           WHERE quantity > 0""",
+        # check_and_remove_zero_stock / low-stock lookups
+        "CREATE INDEX IF NOT EXISTS idx_medicines_quantity ON medicines(quantity)",
+    ]),
+    (2, "Index medicine lookup by name and batch", [
+        # batch_number_exists
+        "CREATE INDEX IF NOT EXISTS idx_medicines_name_batch ON medicines(name, batch_no)",
+    ]),
+    (3, "Index sales and purchases by date and foreign keys", [
+        # get_sales_report_data range scans, covering SUM(quantity) per medicine
+        "CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date, medicine_id, quantity)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_medicine ON sales(medicine_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_date ON purchases(date, medicine_id, quantity)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_medicine ON purchases(medicine_id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_supplier ON purchases(supplier_id)",
+        "CREATE INDEX IF NOT EXISTS idx_archived_medicines_date ON archived_medicines(archive_date)",
+    ]),
+    (4, "Index people lookups used by the login and POS dropdowns", [
+        "CREATE INDEX IF NOT EXISTS idx_users_role_username ON users(role, username, full_name)",
+        "CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)",
+        "CREATE INDEX IF NOT EXISTS idx_suppliers_name ON suppliers(name)",
+    ]),
+    (5, "Invoice headers; link sales rows to their invoice", [
+        """CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT,
+            customer_id INTEGER,
+            date TEXT NOT NULL,
+            item_count INTEGER NOT NULL,
+            total REAL,
+            FOREIGN KEY (customer_id) REFERENCES customers(id)
+        )""",
+        "ALTER TABLE sales ADD COLUMN invoice_id INTEGER REFERENCES invoices(id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_invoice ON sales(invoice_id)",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices(date)",
+    ]),
+    (6, "FTS5 search index over medicine name/strength/batch/expiry", [
+        _create_medicine_fts,
+    ]),
+    (7, "Index in-stock medicines by expiry for the dashboard", [
+        # get_dashboard_metrics / get_expiring_medicines: expiry window range scan
+        """CREATE INDEX IF NOT EXISTS idx_medicines_instock_expiry
+           ON medicines(expiry_date) WHERE quantity > 0""",
+    ]),
+    (8, "Precomputed expiry_days column (days since 1970-01-01) with index", [
+        "ALTER TABLE medicines ADD COLUMN expiry_days INTEGER",
+        # Backfill; julianday() is NULL for empty or malformed dates
+        "UPDATE medicines SET expiry_days = " + _EXPIRY_DAYS_SQL.format(row="medicines"),
+        """CREATE TRIGGER IF NOT EXISTS medicines_expiry_days_ai AFTER INSERT ON medicines BEGIN
+               UPDATE medicines SET expiry_days = {expr} WHERE id = new.id;
+           END""".format(expr=_EXPIRY_DAYS_SQL.format(row="new")),
+        """CREATE TRIGGER IF NOT EXISTS medicines_expiry_days_au
+           AFTER UPDATE OF expiry_date ON medicines BEGIN
+               UPDATE medicines SET expiry_days = {expr} WHERE id = new.id;
+           END""".format(expr=_EXPIRY_DAYS_SQL.format(row="new")),
+        # Expiry checks are integer range scans now
+        "DROP INDEX IF EXISTS idx_medicines_instock_expiry",
+        """CREATE INDEX IF NOT EXISTS idx_medicines_instock_expiry_days
+           ON medicines(expiry_days) WHERE quantity > 0""",
+        # Keep the in-stock listing covering with the new column
+        "DROP INDEX IF EXISTS idx_medicines_instock_name",
+        """CREATE INDEX IF NOT EXISTS idx_medicines_instock_name
+           ON medicines(name, strength, batch_no, expiry_date, quantity, unit_price, expiry_days)
+           WHERE quantity > 0""",
+    ]),
+    (9, "Daily sales rollup maintained by triggers", [
+        """CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+            day TEXT NOT NULL,             -- 'YYYY-MM-DD' prefix of sales.date
+            medicine_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, medicine_id)
+        ) WITHOUT ROWID""",
+        _SALES_ROLLUP_BACKFILL_SQL,
+        """CREATE TRIGGER IF NOT EXISTS sales_rollup_ai AFTER INSERT ON sales BEGIN
+               INSERT OR IGNORE INTO sales_daily_rollup (day, medicine_id)
+               VALUES (substr(new.date, 1, 10), new.medicine_id);
+               UPDATE sales_daily_rollup SET qty = qty + new.quantity, count = count + 1
+               WHERE day = substr(new.date, 1, 10) AND medicine_id = new.medicine_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS sales_rollup_ad AFTER DELETE ON sales BEGIN
+               UPDATE sales_daily_rollup SET qty = qty - old.quantity, count = count - 1
+               WHERE day = substr(old.date, 1, 10) AND medicine_id = old.medicine_id;
+           END""",
+    ]),
+    # 10 made (name, batch_no) unique after merging duplicates; withdrawn, see 12
+    (11, "Keep the sales rollup in step with updated and deleted sales", [
+        # A (day, medicine) whose last sale is deleted or moved must not linger with count 0
+        "DROP TRIGGER IF EXISTS sales_rollup_ad",
+        """CREATE TRIGGER IF NOT EXISTS sales_rollup_ad AFTER DELETE ON sales BEGIN
+               UPDATE sales_daily_rollup SET qty = qty - old.quantity, count = count - 1
+               WHERE day = substr(old.date, 1, 10) AND medicine_id = old.medicine_id;
+               DELETE FROM sales_daily_rollup
+               WHERE day = substr(old.date, 1, 10) AND medicine_id = old.medicine_id AND count <= 0;
+           END""",
+        # An edited sale moves out of its old (day, medicine) and into the new one
+        """CREATE TRIGGER IF NOT EXISTS sales_rollup_au
+           AFTER UPDATE OF date, medicine_id, quantity ON sales BEGIN
+               UPDATE sales_daily_rollup SET qty = qty - old.quantity, count = count - 1
+               WHERE day = substr(old.date, 1, 10) AND medicine_id = old.medicine_id;
+               DELETE FROM sales_daily_rollup
+               WHERE day = substr(old.date, 1, 10) AND medicine_id = old.medicine_id AND count <= 0;
+               INSERT OR IGNORE INTO sales_daily_rollup (day, medicine_id)
+               VALUES (substr(new.date, 1, 10), new.medicine_id);
+               UPDATE sales_daily_rollup SET qty = qty + new.quantity, count = count + 1
+               WHERE day = substr(new.date, 1, 10) AND medicine_id = new.medicine_id;
+           END""",
+        # Edits made before this trigger existed, and rows left at count 0
+        rebuild_sales_rollup,
+    ]),
+    (12, "Plain (name, batch_no) index again; bulk import no longer needs it unique", [
+        # Undoes the unique index on databases that ran the withdrawn migration 10
+        "DROP INDEX IF EXISTS idx_medicines_name_batch",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_name_batch ON medicines(name, batch_no)",
+    ]),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def current_version(conn):
+    """Highest migration version applied to this database (0 if none)."""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn, migrations=None):
+    """
+    Apply every pending migration in order. Each version runs in its own
+    transaction so a failing step leaves the schema at the previous version.
+    Returns the list of versions applied.
+    """
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m[0])
+    if conn.in_transaction:
+        conn.commit()
+    _ensure_version_table(conn)
+    applied = []
+    for version, description, steps in migrations:
+        if version <= current_version(conn):
+            continue
+        try:
+            # Take the write lock before re-reading the version so another
+            # process can't apply the same (non-idempotent) step concurrently
+            conn.execute("BEGIN IMMEDIATE")
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Migration {version} ({description}) failed: {str(e)}")
+        applied.append(version)
+    return applied
+
+
+# --- Query Plan Check ---
+# Read paths whose statements must be served by an index. Full listings of
+# tiny admin tables (orders) are intentionally not listed.
+def _plan_checked_calls(db):
+    return [
+        (db.get_all_medicines, ()),
+        (db.get_inventory_data, ()),
+        (db.batch_number_exists, ("Panadol", "B1")),
+        (db.batch_number_exists, ("Panadol", "B1", 1)),
+        (db.check_and_remove_zero_stock, ()),
+        (db.get_sales_report_data, ("2024-01-01", "2024-12-31")),
+        (db.get_sales_history, ()),
+        (db.get_dashboard_metrics, ()),
+        (db.get_sales_for_day, ()),
+        (db.get_low_stock_medicines, ()),
+        (db.get_expiring_medicines, ()),
+        (db.get_purchases_history, ()),
+        (db.get_sales_data, ()),
+        (db.get_purchases_data, ()),
+        (db.get_archived_medicines, ()),
+        (db.get_customers, ()),
+        (db.get_suppliers, ()),
+        (db.get_user_list, ()),
+    ]
+
+
+def _seed_plan_data(conn):
+    conn.executemany(
+        "INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Med {i}", "500mg", f"B{i}", "2030-01-01", i % 50, 10.0) for i in range(200)]
+    )
+    conn.executemany(
+        "INSERT INTO sales (medicine_id, quantity, date, customer_id) VALUES (?, ?, ?, ?)",
+        [(i % 200 + 1, 1, f"2024-{i % 12 + 1:02d}-10 10:00:00", None) for i in range(500)]
+    )
+    conn.executemany(
+        "INSERT INTO purchases (medicine_id, quantity, date, supplier_id) VALUES (?, ?, ?, ?)",
+        [(i % 200 + 1, 5, f"2024-{i % 12 + 1:02d}-10 10:00:00", None) for i in range(500)]
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def _is_full_scan(detail):
+    if not detail.startswith("SCAN "):
+        return False
+    return "USING" not in detail and "CONSTANT ROW" not in detail
+
+
+def check_query_plans():
+    """
+    Run the db.py read paths against a scratch database built by init_db()
+    and EXPLAIN QUERY PLAN every SELECT they issue.
+    Returns a list of (sql, plan_detail) for statements doing a full table scan.
+    """
+    import db
+
+    original = db.DB_FILE
+    offenders = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db.use_database(os.path.join(tmp, "plan_check.db"))
+        try:
+            db.init_db()
+            conn = db.get_connection()
+            _seed_plan_data(conn)
+
+            statements = []
+            conn.set_trace_callback(statements.append)
+            try:
+                for func, args in _plan_checked_calls(db):
+                    func(*args)
+            finally:
+                conn.set_trace_callback(None)
+
+            for sql in dict.fromkeys(statements):
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+                    if _is_full_scan(row["detail"]):
+                        offenders.append((" ".join(sql.split()), row["detail"]))
+        finally:
+            db.use_database(original)
+    return offenders
+
+
+# --- Data Integrity Check ---
+# Write paths that rewrite or move user data, exercised on a scratch database.
+def _rollup_matches_sales(conn):
+    rollup = conn.execute(
+        "SELECT day, medicine_id, qty, count FROM sales_daily_rollup ORDER BY day, medicine_id"
+    ).fetchall()
+    backfill = conn.execute(
+        "SELECT substr(date, 1, 10), medicine_id, SUM(quantity), COUNT(*) FROM sales "
+        "GROUP BY substr(date, 1, 10), medicine_id ORDER BY 1, 2"
+    ).fetchall()
+    return [tuple(row) for row in rollup] == [tuple(row) for row in backfill]
+
+
+def _integrity_checks(db, conn):
+    """Yields (description, passed) for each check."""
+    def stock(med_id):
+        return conn.execute("SELECT quantity FROM medicines WHERE id = ?", (med_id,)).fetchone()[0]
+
+    def count(table):
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    conn.executemany(
+        "INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price) VALUES (?, ?, ?, ?, ?, ?)",
+        [("Alpha", "500mg", "A1", "2030-01-01", 10, 5.0), ("Beta", "250mg", "B1", "2030-01-01", 3, 2.0),
+         # Two rows for one batch that disagree on expiry and price, as older databases may hold
+         ("Gamma", "10mg", "G1", "2030-01-01", 4, 1.0), ("Gamma", "10mg", "G1", "2031-06-01", 6, 1.5)]
+    )
+    conn.commit()
+    alpha, beta, gamma, gamma_dup = [row[0] for row in conn.execute("SELECT id FROM medicines ORDER BY id")]
+
+    # Shortage: one short line means nothing is taken and nothing is recorded
+    sales, invoices = count("sales"), count("invoices")
+    try:
+        db.record_invoice([{"medicine_id": alpha, "quantity": 2}, {"medicine_id": beta, "quantity": 4}])
+        raised = False
+    except ValueError:
+        raised = True
+    yield "record_invoice refuses an invoice with a short line", raised
+    yield "a short invoice takes no stock", (stock(alpha), stock(beta)) == (10, 3)
+    yield "a short invoice records no sales or header", (count("sales"), count("invoices")) == (sales, invoices)
+
+    # take_stock on its own: reports the shortage and leaves every line untouched
+    with db.unit_of_work() as uow:
+        shortages = db.take_stock(uow, {alpha: 1, beta: 99, -1: 1})
+    yield "take_stock reports short and missing medicines", sorted(s["id"] for s in shortages) == [-1, beta]
+    yield "take_stock takes nothing when a line is short", stock(alpha) == 10
+
+    # Atomicity: a failure after the stock was taken rolls the whole invoice back
+    conn.execute("""CREATE TRIGGER integrity_fail_sale BEFORE INSERT ON sales WHEN new.quantity = 7
+                    BEGIN SELECT RAISE(ABORT, 'injected failure'); END""")
+    conn.commit()
+    try:
+        db.record_invoice([{"medicine_id": alpha, "quantity": 1}, {"medicine_id": beta, "quantity": 1},
+                           {"medicine_id": alpha, "quantity": 7}])
+    except Exception:
+        pass
+    conn.execute("DROP TRIGGER integrity_fail_sale")
+    conn.commit()
+    yield "a failing invoice leaves stock as it was", (stock(alpha), stock(beta)) == (10, 3)
+    yield "a failing invoice leaves no partial sales", (count("sales"), count("invoices")) == (sales, invoices)
+
+    db.record_invoice([{"medicine_id": alpha, "quantity": 2}, {"medicine_id": beta, "quantity": 3}])
+    yield "a good invoice takes its stock", (stock(alpha), stock(beta)) == (8, 0)
+
+    # Rollup: triggers agree with a backfill after inserts, edits and deletes
+    conn.executemany("INSERT INTO sales (medicine_id, quantity, date) VALUES (?, ?, ?)",
+                     [(alpha, 1, "2024-03-01 09:00:00"), (alpha, 2, "2024-03-01 18:00:00"),
+                      (gamma, 5, "2024-03-02 10:00:00")])
+    conn.commit()
+    yield "rollup matches sales after inserts", _rollup_matches_sales(conn)
+    conn.execute("UPDATE sales SET quantity = 4 WHERE date = '2024-03-01 09:00:00'")
+    conn.execute("UPDATE sales SET date = '2024-03-05 10:00:00', medicine_id = ? WHERE medicine_id = ?",
+                 (beta, gamma))
+    conn.commit()
+    yield "rollup matches sales after edits", _rollup_matches_sales(conn)
+    conn.execute("DELETE FROM sales WHERE date LIKE '2024-03-0%'")
+    conn.commit()
+    yield "rollup matches sales after deletes", _rollup_matches_sales(conn)
+    yield "rollup keeps no empty rows", conn.execute(
+        "SELECT COUNT(*) FROM sales_daily_rollup WHERE count <= 0").fetchone()[0] == 0
+    rebuild_sales_rollup(conn)
+    conn.commit()
+    yield "rebuilt rollup matches sales", _rollup_matches_sales(conn)
+
+    # Duplicate batches are reported, never merged; import updates only the oldest row
+    yield "duplicate batches are reported with their differences", duplicate_batches(conn) == [("Gamma", "G1", 2, 1)]
+    result = db.bulk_import_medicines([(1, "Gamma", "10mg", "G1", "2032-01-01", 1, 2.0),
+                                       (2, "Delta", "5mg", "D1", "2032-01-01", 9, 3.0)], "add")
+    yield "import adds to existing batches and inserts new ones", (result["inserted"], result["updated"]) == (1, 1)
+    yield "import updates only the oldest duplicate", (stock(gamma), stock(gamma_dup)) == (5, 6)
+    yield "import leaves the other duplicate's expiry and price alone", tuple(conn.execute(
+        "SELECT expiry_date, unit_price FROM medicines WHERE id = ?", (gamma_dup,)).fetchone()) == ("2031-06-01", 1.5)
+    yield "no migration runs twice", run_migrations(conn) == []
+
+
+def check_data_integrity():
+    """
+    Run the stock, invoice, rollup and import paths against a scratch
+    database built by init_db(). Returns the descriptions of failed checks.
+    """
+    import db
+
+    original = db.DB_FILE
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db.use_database(os.path.join(tmp, "integrity_check.db"))
+        try:
+            db.init_db()
+            for description, passed in _integrity_checks(db, db.get_connection()):
+                if not passed:
+                    failed.append(description)
+        finally:
+            db.close_connections()
+            db.use_database(original)
+    return failed
+
+
+if __name__ == "__main__":
+    # python src/db_migrations.py                         -> exits non-zero if any query scans a table
+    #                                                        or a data integrity check fails
+    # python src/db_migrations.py --rebuild-sales-rollup  -> recompute the report rollup from sales
+    # python src/db_migrations.py --duplicate-batches     -> list medicines sharing name + batch
+    if "--duplicate-batches" in sys.argv[1:]:
+        import db
+        db.init_db()
+        with db.connection() as conn:
+            duplicates = duplicate_batches(conn)
+        for name, batch_no, rows, differs in duplicates:
+            print(f"{name} / {batch_no}: {rows} rows" + ("  (expiry or price differ)" if differs else ""))
+        print(f"Duplicate batches: {len(duplicates)}")
+        sys.exit(0)
+    if "--rebuild-sales-rollup" in sys.argv[1:]:
+        import db
+        db.init_db()
+        print(f"Rebuilt sales_daily_rollup: {db.rebuild_sales_rollup()} rows")
+        sys.exit(0)
+    problems = check_query_plans()
+    for sql, detail in problems:
+        print(f"FULL SCAN: {detail}\n    {sql}")
+    print("Query plan check: " + ("FAILED" if problems else "OK"))
+    failed = check_data_integrity()
+    for description in failed:
+        print(f"INTEGRITY: {description}")
+    print("Data integrity check: " + ("FAILED" if failed else "OK"))
+    sys.exit(1 if problems or failed else 0)
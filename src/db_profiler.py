@@ -0,0 +1,319 @@
+"""
+Query-level profiling for db.py, off unless enabled at startup.
+
+install() does two things:
+  * new connections are opened as ProfiledConnection, whose cursors time
+    every statement (execute + fetching its rows) and count the rows returned;
+  * db.py's public functions are wrapped to time each call, and statements
+    are attributed to the innermost db.py function that issued them.
+
+Statements slower than the threshold are appended to a rotating slow-query
+log next to the database. The Diagnostics dialog (ui/diagnostics_dialog.py)
+shows the top offenders from profiler.
+
+Enable it by starting the app with PHARMACY_DB_PROFILING=1 (see main.py);
+PHARMACY_SLOW_QUERY_MS overrides the slow-query threshold.
+"""
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+PROFILING_ENV_VAR = "PHARMACY_DB_PROFILING"
+SLOW_QUERY_ENV_VAR = "PHARMACY_SLOW_QUERY_MS"
+SLOW_QUERY_MS = 200
+SLOW_LOG_NAME = "slow_queries.log"
+SLOW_LOG_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+SAMPLES = 512  # recent durations kept per statement/function for the p95
+
+# db.py functions that are not wrapped: pure helpers, connection plumbing
+NOT_PROFILED = {
+    "resource_path", "connection", "get_connection", "add_connection_hook", "set_connection_factory",
+    "close_connections", "close_thread_connection", "add_lock_wait_hook", "use_database",
+    "set_storage_profile", "day_number", "is_expired", "hash_password", "check_password",
+    "is_strong_admin_password",
+}
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """One key per statement shape: whitespace collapsed, IN (?, ?, ...) lists folded."""
+    return _IN_LIST.sub("(?...)", _SPACES.sub(" ", sql).strip())
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _Stat:
+    __slots__ = ("calls", "total", "rows", "max", "samples", "functions")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.rows = 0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+        self.functions = set()
+
+    def add(self, seconds, rows=0):
+        self.calls += 1
+        self.total += seconds
+        self.rows += rows
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+
+class QueryProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = SLOW_QUERY_MS
+        self.log_path = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # stack of db.py function names per thread
+        self._statements = {}
+        self._functions = {}
+        self._function_rows = {}  # rows returned by the statements each function issued
+        self._slow_log = None
+        self.slow_count = 0
+        self.started = time.time()
+
+    # --- Recording ---
+
+    def current_function(self):
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else "(outside db.py)"
+
+    def record_statement(self, sql, seconds, rows, function):
+        key = normalize_sql(sql)
+        with self._lock:
+            stat = self._statements.get(key)
+            if stat is None:
+                stat = self._statements[key] = _Stat()
+            stat.add(seconds, rows)
+            stat.functions.add(function)
+            self._function_rows[function] = self._function_rows.get(function, 0) + rows
+        if seconds * 1000 >= self.slow_ms and self._slow_log is not None:
+            self.slow_count += 1
+            self._slow_log.warning("%.1f ms  rows=%d  %s  |  %s", seconds * 1000, rows, function, key)
+
+    def record_call(self, name, seconds):
+        with self._lock:
+            stat = self._functions.get(name)
+            if stat is None:
+                stat = self._functions[name] = _Stat()
+            stat.add(seconds)
+
+    def wrap(self, name, func):
+        """func, timed as `name`; statements it issues are attributed to it."""
+        local = self._local
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+            stack.append(name)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record_call(name, time.perf_counter() - started)
+                stack.pop()
+        return profiled
+
+    # --- Reporting ---
+
+    def top(self, kind="statements", n=20, by="total"):
+        """
+        Heaviest statements or functions as dicts: name, calls, total_ms,
+        mean_ms, p95_ms, max_ms, rows (and functions, for statements).
+        by: total, calls, p95 or max.
+        """
+        with self._lock:
+            stats = dict(self._statements if kind == "statements" else self._functions)
+            rows = []
+            for name, stat in stats.items():
+                row = {
+                    "name": name,
+                    "calls": stat.calls,
+                    "total_ms": stat.total * 1000,
+                    "mean_ms": stat.total * 1000 / stat.calls,
+                    "p95_ms": percentile(list(stat.samples), 95) * 1000,
+                    "max_ms": stat.max * 1000,
+                    "rows": stat.rows if kind == "statements" else self._function_rows.get(name, 0),
+                }
+                if kind == "statements":
+                    row["functions"] = ", ".join(sorted(stat.functions))
+                rows.append(row)
+        key = {"total": "total_ms", "calls": "calls", "p95": "p95_ms", "max": "max_ms"}[by]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:n]
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._functions.clear()
+            self._function_rows.clear()
+        self.slow_count = 0
+        self.started = time.time()
+
+    # --- Slow-query log ---
+
+    def open_slow_log(self, path):
+        import logging.handlers  # only when profiling is on
+        logger = logging.getLogger("pharmacy.slow_queries")
+        logger.propagate = False
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=SLOW_LOG_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s  %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        self._slow_log = logger
+        self.log_path = path
+
+
+profiler = QueryProfiler()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute() until its rows have been fetched (or
+    the next statement starts) and counts the rows returned.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._pending = None  # [sql, seconds so far, rows, issuing function]
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            profiler.record_statement(*pending)
+
+    def _run(self, method, sql, params):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            method(sql, params)
+        finally:
+            self._pending = [sql, time.perf_counter() - started, 0, profiler.current_function()]
+            if self.description is None:
+                self._finish()  # no result rows to wait for
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._run(super().executemany, sql, seq_of_params)
+
+    def _fetched(self, started, rows, done):
+        if self._pending is not None:
+            self._pending[1] += time.perf_counter() - started
+            self._pending[2] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        if getattr(self, "_pending", None) is not None:
+            self._finish()
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are ProfiledCursors."""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def profiled_functions(db_module):
+    """(name, function) for db_module's public functions worth timing (also used by tracing.py)."""
+    import inspect
+    for name, func in list(vars(db_module).items()):
+        if (name.startswith("_") or name in NOT_PROFILED or not inspect.isfunction(func)
+                or func.__module__ != db_module.__name__):
+            continue
+        if inspect.isgeneratorfunction(inspect.unwrap(func)):
+            continue  # generators and context managers: the call itself does no work
+        yield name, func
+
+
+def install(db_module, slow_ms=None, log_path=None):
+    """
+    Profile db_module (db.py). Must run before any connection is opened and
+    before the UI modules bind `from db import ...`.
+    """
+    if profiler.enabled:
+        return profiler
+    profiler.slow_ms = SLOW_QUERY_MS if slow_ms is None else slow_ms
+    profiler.open_slow_log(log_path or os.path.join(os.path.dirname(db_module.DB_FILE), SLOW_LOG_NAME))
+    db_module.set_connection_factory(ProfiledConnection)
+    for name, func in profiled_functions(db_module):
+        setattr(db_module, name, profiler.wrap(name, func))
+    profiler.enabled = True
+    profiler.reset()
+    return profiler
+
+
+def install_from_env():
+    """install() if $PHARMACY_DB_PROFILING is set. Returns True if installed."""
+    if os.environ.get(PROFILING_ENV_VAR, "") in ("", "0"):
+        return False
+    import db
+    slow_ms = os.environ.get(SLOW_QUERY_ENV_VAR)
+    install(db, slow_ms=float(slow_ms) if slow_ms else None)
+    return True
@@ -0,0 +1,90 @@
+import os
+
+# --- Storage Tuning Profiles ---
+# Applied to every new connection (see db.add_connection_hook) and once at init_db().
+# Order matters: busy_timeout must be set before switching journal mode.
+#
+#   durable       WAL + synchronous=FULL: no committed sale is lost even on power cut.
+#   fast-counter  WAL + synchronous=NORMAL: one fsync per checkpoint instead of per
+#                 commit; a power cut may lose the last few transactions, never corrupts.
+#   shared-file   Rollback journal for a pharmacy.db on a network share used by
+#                 several counter PCs: WAL needs shared memory on one host, so it
+#                 must not be used there. Longer busy_timeout; no mmap.
+PROFILES = {
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,        # KiB (negative) -> ~16 MB page cache
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,  # pages
+    },
+    "fast-counter": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+    },
+    "shared-file": {
+        "busy_timeout": 10000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+    },
+}
+
+DEFAULT_PROFILE = "durable"
+PROFILE_ENV_VAR = "PHARMACY_DB_PROFILE"
+
+# How often the app runs a PASSIVE checkpoint on its own schedule (milliseconds).
+CHECKPOINT_INTERVAL_MS = 5 * 60 * 1000
+
+# Pragmas that are a property of the database file rather than the connection.
+_INIT_ONLY = ("journal_mode",)
+
+
+def get_profile(name=None):
+    """Return (name, settings) for a profile; falls back to $PHARMACY_DB_PROFILE."""
+    name = name or os.environ.get(PROFILE_ENV_VAR) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown storage profile '{name}'. Choose from: {', '.join(PROFILES)}")
+    return name, PROFILES[name]
+
+
+def apply_pragmas(conn, settings):
+    """Apply per-connection pragmas from a profile."""
+    for key, value in settings.items():
+        if key in _INIT_ONLY:
+            continue
+        conn.execute(f"PRAGMA {key}={value}")
+
+
+def tune_database(conn, settings):
+    """
+    Startup tuning stage run from init_db(): switches the file to the
+    profile's journal mode and refreshes planner statistics.
+    Returns the journal mode actually in effect.
+    """
+    mode = settings.get("journal_mode")
+    if mode:
+        mode = conn.execute(f"PRAGMA journal_mode={mode}").fetchone()[0]
+    conn.execute("PRAGMA optimize")
+    return mode
+
+
+def checkpoint(conn, mode="PASSIVE"):
+    """
+    Run a WAL checkpoint. PASSIVE never blocks readers or writers; TRUNCATE
+    (used at shutdown) also resets the -wal file to zero bytes.
+    Returns (busy, wal_pages, checkpointed_pages).
+    """
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Invalid checkpoint mode: {mode}")
+    row = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return tuple(row)
@@ -0,0 +1,344 @@
+import csv
+import gzip
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog, QMessageBox
+import db
+
+pyarrow = None  # optional and slow to import: loaded by the first analytics export
+
+
+def _load_pyarrow():
+    """pyarrow if it is installed (imported on first call), else None."""
+    global pyarrow
+    if pyarrow is None:
+        try:
+            import pyarrow.parquet
+        except ImportError:  # analytics exports fall back to gzip JSONL
+            return None
+    return pyarrow
+
+BATCH_SIZE = 1000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+# --- Sources ---
+# A source knows its headers, how many rows to expect (None = unknown) and
+# yields row batches. Sources run on the export worker thread.
+
+class QueryExport:
+    """
+    Rows streamed from the database with fetchmany (db.stream_query).
+    transform(row_dict) -> list may reshape each row; headers then name its output.
+    """
+
+    def __init__(self, sql, params=(), headers=None, transform=None):
+        self.sql = sql
+        self.params = params
+        self.headers = headers
+        self.transform = transform
+
+    def count(self):
+        return db.count_rows(self.sql, self.params)
+
+    def batches(self, batch_size):
+        rows = db.stream_query(self.sql, self.params, batch_size)
+        columns = next(rows)
+        if self.headers is None:
+            self.headers = columns
+        for batch in rows:
+            if self.transform:
+                batch = [self.transform(dict(zip(columns, row))) for row in batch]
+            yield batch
+
+
+class RowsExport:
+    """Rows already in memory (report tables, dashboard details)."""
+
+    def __init__(self, headers, rows):
+        self.headers = headers
+        self.rows = rows
+
+    def count(self):
+        return len(self.rows)
+
+    def batches(self, batch_size):
+        for start in range(0, len(self.rows), batch_size):
+            yield self.rows[start:start + batch_size]
+
+
+def write_csv(path, source, progress=None, should_stop=None, batch_size=BATCH_SIZE):
+    """
+    Write source to path, one batch at a time. The file is written next to
+    the target and renamed into place at the end, so a cancelled or failed
+    export never leaves a half-written CSV. Returns the number of rows written.
+    """
+    total = source.count()
+    temp_path = path + ".part"
+    written = 0
+    try:
+        with open(temp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            batches = source.batches(batch_size)
+            header_written = False
+            for batch in batches:
+                if not header_written:
+                    writer.writerow(source.headers)
+                    header_written = True
+                if should_stop and should_stop():
+                    batches.close()
+                    raise ExportCancelled()
+                writer.writerows(batch)
+                written += len(batch)
+                if progress:
+                    progress(written, total)
+            if not header_written:
+                writer.writerow(source.headers or [])
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+
+# --- Background job ---
+
+class _ExportSignals(QObject):
+    progress = pyqtSignal(int, int)   # rows written, total rows
+    finished = pyqtSignal(str, int)   # path, rows written
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class ExportTask(QRunnable):
+    def __init__(self, path, source):
+        super().__init__()
+        self.path = path
+        self.source = source
+        self.signals = _ExportSignals()
+        self._stop = threading.Event()
+
+    def cancel(self):
+        self._stop.set()
+
+    def run(self):
+        try:
+            rows = write_csv(self.path, self.source, self.signals.progress.emit, self._stop.is_set)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(self.path, rows)
+        finally:
+            db.close_thread_connection()  # pool threads come and go
+
+
+def export_csv(parent, path, source, title="Exporting"):
+    """
+    Export source to path on a worker thread with a cancellable progress
+    dialog. Completion, failure and cancellation are reported to the user.
+    Returns the ExportTask.
+    """
+    task = ExportTask(path, source)
+    dialog = QProgressDialog(f"{title}...", "Cancel", 0, 0, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)  # quick exports never flash a dialog
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    dialog.canceled.connect(task.cancel)
+
+    def on_progress(written, total):
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(written, total))
+        dialog.setLabelText(f"{title}... {written:,} rows")
+
+    def on_finished(path, rows):
+        dialog.close()
+        QMessageBox.information(parent, title, f"Exported {rows:,} rows to {path}")
+
+    def on_failed(message):
+        dialog.close()
+        QMessageBox.critical(parent, "Export Error", f"Export failed:\n{message}")
+
+    task.signals.progress.connect(on_progress)
+    task.signals.finished.connect(on_finished)
+    task.signals.failed.connect(on_failed)
+    task.signals.cancelled.connect(dialog.close)
+    QThreadPool.globalInstance().start(task)
+    return task
+
+
+# --- Analytics export ---
+# Typed, compressed files for the analytics team instead of CSV, one
+# directory per table and one partition per day:
+#   <out_dir>/<table>/date=YYYY-MM-DD/part-0.parquet    (pyarrow installed)
+#   <out_dir>/<table>/date=YYYY-MM-DD/part-0.jsonl.gz   (fallback)
+#   <out_dir>/<table>/_schema.json                      (column types, format)
+# medicines has no event date and is written as a single snapshot partition.
+# Re-exports skip days already on disk except the newest one, which may have
+# been exported while that day was still open.
+
+ANALYTICS_TABLES = {
+    "medicines": None,
+    "sales": "date",
+    "purchases": "date",
+    "archived_medicines": "archive_date",
+}
+SNAPSHOT_PARTITION = "snapshot"
+
+_ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+
+
+class _JsonlGzWriter:
+    extension = ".jsonl.gz"
+    format = "jsonl.gz"
+
+    def __init__(self, path, columns):
+        self._names = [name for name, _ in columns]
+        self._f = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, batch):
+        for row in batch:
+            self._f.write(json.dumps(dict(zip(self._names, row))) + "\n")
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetWriter:
+    extension = ".parquet"
+    format = "parquet"
+
+    def __init__(self, path, columns):
+        self._schema = pyarrow.schema([
+            (name, getattr(pyarrow, _ARROW_TYPES.get(col_type, "string"))()) for name, col_type in columns
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, batch):
+        arrays = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), self._schema)]
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def analytics_writer(fmt=None):
+    """Writer class for fmt ("parquet" / "jsonl.gz"); default: parquet if pyarrow is installed."""
+    if fmt is None:
+        fmt = "parquet" if _load_pyarrow() is not None else "jsonl.gz"
+    if fmt == "parquet":
+        if _load_pyarrow() is None:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+        return _ParquetWriter
+    if fmt == "jsonl.gz":
+        return _JsonlGzWriter
+    raise ValueError(f"Unknown analytics export format: {fmt}")
+
+
+def _write_partition(writer_cls, path, columns, sql, params, should_stop, batch_size):
+    temp_path = path + ".part"
+    rows = 0
+    writer = writer_cls(temp_path, columns)
+    try:
+        batches = db.stream_query(sql, params, batch_size)
+        next(batches)  # column names; columns already come from PRAGMA table_info
+        for batch in batches:
+            if should_stop and should_stop():
+                batches.close()
+                raise ExportCancelled()
+            writer.write(batch)
+            rows += len(batch)
+    except BaseException:
+        writer.close()
+        os.remove(temp_path)
+        raise
+    writer.close()
+    os.replace(temp_path, path)
+    return rows
+
+
+def export_analytics(out_dir, tables=None, fmt=None, full=False, progress=None,
+                     should_stop=None, batch_size=BATCH_SIZE):
+    """
+    Export tables (default: all of ANALYTICS_TABLES) to out_dir. full=True
+    rewrites every partition. progress(table, partition, rows) is called per
+    partition written. Returns {table: [partitions written]}.
+    """
+    writer_cls = analytics_writer(fmt)
+    written = {}
+    for table in tables or ANALYTICS_TABLES:
+        if table not in ANALYTICS_TABLES:
+            raise ValueError(f"Table {table} is not exported for analytics")
+        date_column = ANALYTICS_TABLES[table]
+        table_dir = os.path.join(out_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        columns = db.get_table_columns(table)
+        file_name = "part-0" + writer_cls.extension
+
+        if date_column is None:
+            partitions = [(SNAPSHOT_PARTITION, f"SELECT * FROM {table} ORDER BY id", ())]
+        else:
+            existing = sorted(
+                name[len("date="):] for name in os.listdir(table_dir)
+                if name.startswith("date=") and os.path.exists(os.path.join(table_dir, name, file_name))
+            )
+            since = None if full or not existing else existing[-1]
+            partitions = []
+            for day in db.get_partition_days(table, date_column, since):
+                next_day = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+                partitions.append((
+                    f"date={day}",
+                    f"SELECT * FROM {table} WHERE {date_column} >= ? AND {date_column} < ? ORDER BY {date_column}, id",
+                    (day, next_day),
+                ))
+
+        written[table] = []
+        for partition, sql, params in partitions:
+            partition_dir = os.path.join(table_dir, partition)
+            os.makedirs(partition_dir, exist_ok=True)
+            rows = _write_partition(writer_cls, os.path.join(partition_dir, file_name),
+                                    columns, sql, params, should_stop, batch_size)
+            written[table].append(partition)
+            if progress:
+                progress(table, partition, rows)
+
+        with open(os.path.join(table_dir, "_schema.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "table": table,
+                "format": writer_cls.format,
+                "partitioned_by": date_column,
+                "columns": [{"name": name, "type": col_type} for name, col_type in columns],
+            }, f, indent=2)
+    return written
+
+
+if __name__ == "__main__":
+    # python src/export_engine.py OUT_DIR [--full] [--format parquet|jsonl.gz] [table ...]
+    args = sys.argv[1:]
+    if not args or args[0].startswith("-"):
+        print("usage: python src/export_engine.py OUT_DIR [--full] [--format parquet|jsonl.gz] [table ...]")
+        sys.exit(2)
+    out_dir, options = args[0], args[1:]
+    fmt = None
+    if "--format" in options:
+        i = options.index("--format")
+        fmt = options[i + 1]
+        del options[i:i + 2]
+    full = "--full" in options
+    tables = [name for name in options if name != "--full"]
+    db.init_db()
+    result = export_analytics(out_dir, tables or None, fmt, full,
+                              progress=lambda table, partition, rows: print(f"{table}/{partition}: {rows} rows"))
+    print(f"Exported {sum(len(p) for p in result.values())} partitions to {out_dir}")
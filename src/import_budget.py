@@ -0,0 +1,82 @@
+"""
+Startup import budget: how long `import main` takes before the login dialog
+can appear, measured with `python -X importtime`.
+
+    python src/import_budget.py [--budget-ms 500] [--runs 3] [--top 15]
+
+Fails (exit 1) if importing main takes longer than the budget, or if any
+module in DEFERRED -- screens and engines the login dialog doesn't need --
+is imported at startup. The best of --runs is used (the first run also
+compiles .pyc files).
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 500
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must not be imported before login: they load with the main window or on
+# first use (ui/screens.py), or only when their feature is switched on
+DEFERRED = [
+    "ui.main_window", "widgets.sidebar", "ui.dashboard", "sale_purchase_dialog",
+    "widgets.invoice_dialog", "ui.medicine_management", "ui.orders_dialog", "ui.sales_report",
+    "export_engine", "import_engine", "maintenance", "sale_service", "asyncio", "pyarrow",
+]
+
+
+def measure():
+    """One `-X importtime` run of `import main`: [(name, self_us, cumulative_us, depth)]."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=SRC_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if proc.returncode != 0:
+        raise Exception(f"import main failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check how long the app takes to import before login.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(max(1, args.runs)):
+        entries = measure()
+        total_us = next(cumulative for name, _, cumulative, _ in entries if name == "main")
+        if best is None or total_us < best[0]:
+            best = (total_us, entries)
+    total_us, entries = best
+
+    print(f"import main: {total_us / 1000:.1f} ms (budget {args.budget_ms:g} ms)")
+    print("\nSlowest modules (self time):")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:8.1f} ms)  {name}")
+
+    imported = {name for name, _, _, _ in entries}
+    eager = [name for name in DEFERRED if name in imported]
+    failed = False
+    if eager:
+        failed = True
+        print(f"\nFAIL: imported before login: {', '.join(eager)}")
+    if total_us / 1000 > args.budget_ms:
+        failed = True
+        print(f"\nFAIL: import main took {total_us / 1000:.1f} ms, over the {args.budget_ms:g} ms budget")
+    if not failed:
+        print("\nImport budget: OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
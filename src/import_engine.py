@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog, QMessageBox, QFileDialog, QInputDialog
+import db
+from export_engine import export_csv, RowsExport
+
+REQUIRED_COLUMNS = ["name", "batch_no", "expiry_date", "quantity", "unit_price"]
+
+# Choice shown to the user -> db.IMPORT_CONFLICT_ACTIONS key
+CONFLICT_CHOICES = {
+    "Add the imported quantity to stock": "add",
+    "Replace stock with the imported quantity": "replace",
+    "Skip rows that already exist": "skip",
+}
+
+
+def _clean(value):
+    return "" if value is None else str(value).strip()
+
+
+def _normalize_header(name):
+    return _clean(name).lower().replace(" ", "_")
+
+
+def _check_columns(columns):
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+
+def read_records(path):
+    """
+    Rows of a CSV (header row required) or JSON file (list of objects) as
+    (line, name, strength, batch_no, expiry_date, quantity, unit_price) tuples
+    of stripped strings, ready for db.bulk_import_medicines. line is the CSV
+    line number, or the 1-based record number for JSON.
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("medicines", [])
+        rows = [{_normalize_header(k): v for k, v in item.items()} for item in data]
+        if rows:
+            _check_columns(rows[0])
+        return [
+            (number,) + tuple(_clean(row.get(col)) for col in db.IMPORT_COLUMNS)
+            for number, row in enumerate(rows, start=1)
+        ]
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [_normalize_header(col) for col in next(reader, [])]
+        _check_columns(header)
+        positions = [header.index(col) if col in header else None for col in db.IMPORT_COLUMNS]
+        records = []
+        for row in reader:
+            if not any(row):
+                continue  # blank line
+            records.append((reader.line_num,) + tuple(
+                _clean(row[i]) if i is not None and i < len(row) else "" for i in positions
+            ))
+        return records
+
+
+# --- Background job ---
+
+class _ImportSignals(QObject):
+    progress = pyqtSignal(int, int)   # rows staged, total rows
+    finished = pyqtSignal(object)     # db.bulk_import_medicines result
+    failed = pyqtSignal(str)
+
+
+class ImportTask(QRunnable):
+    def __init__(self, path, on_conflict):
+        super().__init__()
+        self.path = path
+        self.on_conflict = on_conflict
+        self.signals = _ImportSignals()
+
+    def run(self):
+        try:
+            records = read_records(self.path)
+            result = db.bulk_import_medicines(records, self.on_conflict, self.signals.progress.emit)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            db.close_thread_connection()
+
+
+def import_medicines(parent):
+    """
+    Ask for a CSV/JSON file and how to treat existing batches, then import it
+    on a worker thread behind a progress dialog. Rows that fail validation
+    are skipped and can be saved as an error report. Returns the ImportTask,
+    or None if the user cancelled.
+    """
+    path, _ = QFileDialog.getOpenFileName(parent, "Import Medicines", "", "Medicine Files (*.csv *.json)")
+    if not path:
+        return None
+    choice, ok = QInputDialog.getItem(
+        parent, "Existing Batches", "When a medicine with the same batch number already exists:",
+        list(CONFLICT_CHOICES), 0, False
+    )
+    if not ok:
+        return None
+
+    task = ImportTask(path, CONFLICT_CHOICES[choice])
+    dialog = QProgressDialog("Importing medicines...", None, 0, 0, parent)
+    dialog.setWindowTitle("Import Medicines")
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+
+    def on_progress(done, total):
+        dialog.setMaximum(total)
+        dialog.setValue(done)
+        dialog.setLabelText(f"Importing medicines... {done:,} of {total:,} rows")
+
+    def on_finished(result):
+        dialog.close()
+        errors = result["errors"]
+        summary = (f"Added {result['inserted']:,} new medicines, updated {result['updated']:,}, "
+                   f"skipped {result['skipped']:,} existing.")
+        if not errors:
+            QMessageBox.information(parent, "Import Medicines", summary)
+            return
+        reply = QMessageBox.question(
+            parent, "Import Medicines",
+            f"{summary}\n\n{len(errors):,} rows had errors and were not imported. Save an error report?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            report_path, _ = QFileDialog.getSaveFileName(parent, "Save Error Report", "import_errors.csv", "CSV Files (*.csv)")
+            if report_path:
+                task.report_task = export_csv(
+                    parent, report_path, RowsExport(["line", "name", "batch_no", "error"], errors), "Save Error Report"
+                )
+
+    def on_failed(message):
+        dialog.close()
+        QMessageBox.critical(parent, "Import Error", f"Import failed:\n{message}")
+
+    task.signals.progress.connect(on_progress)
+    task.signals.finished.connect(on_finished)
+    task.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(task)
+    return task
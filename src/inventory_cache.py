@@ -0,0 +1,91 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from tracing import traced
+from db import db_signals, get_all_medicines, get_medicines_by_ids
+
+
+class InventoryCache(QObject):
+    """
+    In-memory copy of the in-stock medicines (same rows as get_all_medicines),
+    keyed by id. Loaded once on first use, then patched from the fine-grained
+    db_signals (medicines_changed / medicines_removed): a sale re-reads only
+    the rows it touched instead of the whole table.
+
+    Signals:
+        rows_changed(list)  - medicine dicts updated in place
+        rows_added(list)    - medicine dicts that are new to the cache
+        rows_removed(list)  - ids that left the cache (deleted / out of stock)
+        changed()           - any of the above, or a full reload
+    """
+    rows_changed = pyqtSignal(list)
+    rows_added = pyqtSignal(list)
+    rows_removed = pyqtSignal(list)
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = None  # id -> medicine dict; None until first use
+        db_signals.medicines_changed.connect(self.apply_changes)
+        db_signals.medicines_removed.connect(self.remove)
+
+    def ensure_loaded(self):
+        if self._rows is None:
+            self.reload()
+
+    def reload(self):
+        """Full reload; only needed after bulk changes made outside db.py."""
+        self._rows = {med["id"]: med for med in get_all_medicines()}
+        self.changed.emit()
+
+    def get(self, med_id):
+        self.ensure_loaded()
+        return self._rows.get(med_id)
+
+    def medicines(self):
+        """All cached medicines ordered by name, like get_all_medicines()."""
+        self.ensure_loaded()
+        return sorted(self._rows.values(), key=lambda med: (med["name"], med["id"]))
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self._rows)
+
+    @traced
+    def apply_changes(self, ids):
+        """Re-read just these ids and patch the cache."""
+        if self._rows is None:
+            return  # nothing cached yet; the first load will be current
+        ids = list(dict.fromkeys(ids))
+        fresh = {med["id"]: med for med in get_medicines_by_ids(ids)}
+        changed, added, removed = [], [], []
+        for med_id in ids:
+            med = fresh.get(med_id)
+            if med is None or med["quantity"] <= 0:
+                if self._rows.pop(med_id, None) is not None:
+                    removed.append(med_id)
+            elif med_id in self._rows:
+                self._rows[med_id] = med
+                changed.append(med)
+            else:
+                self._rows[med_id] = med
+                added.append(med)
+        self._notify(changed, added, removed)
+
+    def remove(self, ids):
+        if self._rows is None:
+            return
+        removed = [med_id for med_id in ids if self._rows.pop(med_id, None) is not None]
+        self._notify([], [], removed)
+
+    @traced("InventoryCache.update_views")  # table/view patches triggered by a write
+    def _notify(self, changed, added, removed):
+        if changed:
+            self.rows_changed.emit(changed)
+        if added:
+            self.rows_added.emit(added)
+        if removed:
+            self.rows_removed.emit(removed)
+        if changed or added or removed:
+            self.changed.emit()
+
+
+inventory_cache = InventoryCache()
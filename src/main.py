@@ -13,9 +13,22 @@ sys.path.insert(0, current_dir)
 sys.path.insert(0, os.path.join(current_dir, 'widgets'))
 sys.path.insert(0, os.path.join(current_dir, 'ui'))
 
+import sale_client
+# PHARMACY_SALE_SERVICE=host:port sends writes through sale_service.py;
+# must run before the UI modules bind `from db import ...`
+sale_client.install_from_env()
+
+import db_profiler
+# PHARMACY_DB_PROFILING=1 times every db.py call and SQL statement
+# (Diagnostics panel, slow_queries.log); also before the UI imports
+db_profiler.install_from_env()
+
+import tracing
+# PHARMACY_TRACE=trace.json (Chrome trace) or trace.jsonl: timing spans for UI actions
+tracing.install_from_env()
+
 from PyQt5.QtWidgets import QApplication
 from widgets.login_dialog import LoginDialog
-from ui.main_window import MainWindow
 from db import init_db
 
 def main():
@@ -24,6 +37,9 @@ def main():
     login = LoginDialog()
     if login.exec_() == login.Accepted:
         user = login.result
+        # Imported after login so the login dialog doesn't wait for the main
+        # window's modules (check with: python src/import_budget.py)
+        from ui.main_window import MainWindow
         window = MainWindow(user)
         window.show()
         sys.exit(app.exec_())
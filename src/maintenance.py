@@ -0,0 +1,115 @@
+import time
+from datetime import datetime
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+import db
+
+ARCHIVE_INTERVAL_MS = 15 * 60 * 1000  # zero-stock archival
+STARTUP_DELAY_MS = 30 * 1000          # first run, once the UI has settled
+STOP_WAIT_MS = 10 * 1000              # how long stop() waits for a running task
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(str, object, float)  # task name, result dict, seconds
+    failed = pyqtSignal(str, str, float)       # task name, error message, seconds
+
+
+class _MaintenanceRun(QRunnable):
+    def __init__(self, name, func):
+        super().__init__()
+        self.name = name
+        self.func = func
+        self.signals = _TaskSignals()
+
+    def run(self):
+        # Timed here, on the worker, so time spent queued in the pool isn't counted
+        started = time.perf_counter()
+        try:
+            result = self.func()
+        except Exception as e:
+            self.signals.failed.emit(self.name, str(e), time.perf_counter() - started)
+        else:
+            self.signals.finished.emit(self.name, result, time.perf_counter() - started)
+        finally:
+            db.close_thread_connection()
+
+
+class MaintenanceScheduler(QObject):
+    """
+    Runs database housekeeping on worker threads at fixed intervals and keeps
+    per-task metrics (see metrics()). A task is a callable returning a dict
+    that includes "rows" (rows affected) and may include "seconds" (its own
+    timing); otherwise the run is timed on the worker thread.
+    A task never overlaps with its own previous run. Tasks run on the
+    scheduler's own pool so stop() can wait for them without waiting on
+    exports or imports.
+
+    Signals:
+        task_finished(str, dict) - task name, metrics after the run
+    """
+    task_finished = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tasks = {}
+        self._metrics = {}
+        self._running = set()
+        self._timers = []
+        self._stopped = False
+        self._pool = QThreadPool(self)
+
+    def add_task(self, name, func, interval_ms, first_run_ms=STARTUP_DELAY_MS):
+        self._tasks[name] = func
+        self._metrics[name] = {
+            "runs": 0, "failures": 0, "rows_total": 0, "seconds_total": 0.0,
+            "last_rows": None, "last_seconds": None, "last_run": None, "last_error": None,
+        }
+        timer = QTimer(self)
+        timer.timeout.connect(lambda: self.run_now(name))
+        timer.start(interval_ms)
+        QTimer.singleShot(first_run_ms, lambda: self.run_now(name))
+        self._timers.append(timer)
+
+    def run_now(self, name):
+        if self._stopped or name in self._running:
+            return
+        self._running.add(name)
+        task = _MaintenanceRun(name, self._tasks[name])
+        task.signals.finished.connect(lambda n, result, seconds: self._record(n, seconds, result, None))
+        task.signals.failed.connect(lambda n, message, seconds: self._record(n, seconds, None, message))
+        self._pool.start(task)
+
+    def _record(self, name, seconds, result, error):
+        self._running.discard(name)
+        if result and result.get("seconds") is not None:
+            seconds = result["seconds"]
+        stats = self._metrics[name]
+        stats["runs"] += 1
+        stats["last_run"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        stats["last_seconds"] = seconds
+        stats["seconds_total"] += seconds
+        stats["last_error"] = error
+        if error is None:
+            stats["last_rows"] = result.get("rows", 0)
+            stats["rows_total"] += stats["last_rows"]
+        else:
+            stats["failures"] += 1
+            print(f"Warning: maintenance task {name} failed: {error}")
+        self.task_finished.emit(name, dict(stats))
+
+    def metrics(self):
+        """{task name: {runs, failures, rows_total, seconds_total, last_rows, last_seconds, last_run, last_error}}"""
+        return {name: dict(stats) for name, stats in self._metrics.items()}
+
+    def stop(self, wait_ms=STOP_WAIT_MS):
+        """Stop scheduling and wait for a running task. Returns False if one is still running."""
+        self._stopped = True
+        for timer in self._timers:
+            timer.stop()
+        return self._pool.waitForDone(wait_ms)
+
+
+def create_scheduler(parent=None):
+    """The app's maintenance schedule."""
+    scheduler = MaintenanceScheduler(parent)
+    scheduler.add_task("archive_zero_stock", db.archive_zero_stock, ARCHIVE_INTERVAL_MS)
+    return scheduler
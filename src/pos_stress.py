@@ -0,0 +1,148 @@
+"""
+Stress harness: N simulated counter terminals (separate processes, like
+separate PCs) recording invoices against one database file.
+
+    python src/pos_stress.py [--terminals 4] [--invoices 200] [--lines 3]
+                             [--profile durable] [--db PATH [--i-know-this-mutates]]
+
+Without --db a seeded throwaway database is used. With --db the run uses a
+copy of that file (stock is decremented and fake invoices are recorded);
+add --i-know-this-mutates to run against the file itself. Reports throughput
+and lock-wait / invoice latency percentiles.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+SEED_MEDICINES = 500
+SEED_STOCK = 10 ** 9  # never runs out, so every failure is a locking failure
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def seed_database(path, medicines=SEED_MEDICINES):
+    import db
+    db.use_database(path)
+    db.init_db()
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO medicines (name, strength, batch_no, expiry_date, quantity, unit_price) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"Stress {i}", "500mg", f"S{i}", "2099-01-01", SEED_STOCK, 10.0) for i in range(medicines)]
+        )
+        conn.commit()
+    db.close_connections()
+
+
+def copy_database(source, path):
+    """Consistent copy of source (WAL included) at path, via SQLite's backup API."""
+    if not os.path.exists(source):
+        raise ValueError(f"Database not found: {source}")
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def run_terminal(path, profile, terminal, invoices, lines, start_at, results):
+    import db
+    db.set_storage_profile(profile)
+    db.use_database(path)
+    lock_waits, latencies, retries = [], [], [0]
+
+    def on_lock_wait(seconds, retry_count):
+        lock_waits.append(seconds)
+        retries[0] += retry_count
+
+    db.add_lock_wait_hook(on_lock_wait)
+    with db.connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM medicines WHERE quantity > 0")]
+    rng = random.Random(terminal)
+    failures = []
+    while time.time() < start_at:  # all terminals start together
+        time.sleep(0.001)
+    for n in range(invoices):
+        items = [{"medicine_id": med_id, "quantity": 1, "total": 10.0} for med_id in rng.sample(ids, lines)]
+        started = time.perf_counter()
+        try:
+            db.record_invoice(items, invoice_number=f"T{terminal}-{n}")
+        except Exception as e:
+            failures.append(str(e))
+        latencies.append(time.perf_counter() - started)
+    db.close_connections()
+    results.put((terminal, lock_waits, latencies, retries[0], failures))
+
+
+def run(terminals, invoices, lines, profile, path):
+    start_at = time.time() + 1.0
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=run_terminal, args=(path, profile, t, invoices, lines, start_at, results))
+        for t in range(terminals)
+    ]
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    finished_at = time.time()
+    for proc in procs:
+        proc.join()
+
+    lock_waits = [w for _, waits, _, _, _ in collected for w in waits]
+    latencies = [l for _, _, lats, _, _ in collected for l in lats]
+    retries = sum(r for _, _, _, r, _ in collected)
+    failures = [f for _, _, _, _, fails in collected for f in fails]
+    elapsed = finished_at - start_at
+    committed = len(latencies) - len(failures)
+    ms = lambda seconds: f"{seconds * 1000:.1f} ms"
+
+    print(f"terminals={terminals} invoices/terminal={invoices} lines/invoice={lines} profile={profile}")
+    print(f"committed {committed} invoices in {elapsed:.2f} s -> {committed / elapsed:.1f} invoices/s")
+    print(f"failed {len(failures)}, busy retries {retries}")
+    for label, values in (("lock wait", lock_waits), ("invoice latency", latencies)):
+        print(f"{label:>16}: p50 {ms(percentile(values, 50))}  p95 {ms(percentile(values, 95))}  "
+              f"p99 {ms(percentile(values, 99))}  max {ms(max(values) if values else 0)}")
+    for message in sorted(set(failures))[:5]:
+        print(f"  failure: {message}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate several POS terminals writing to one database.")
+    parser.add_argument("--terminals", type=int, default=4)
+    parser.add_argument("--invoices", type=int, default=200, help="invoices per terminal")
+    parser.add_argument("--lines", type=int, default=3, help="lines per invoice")
+    parser.add_argument("--profile", default="durable", help="storage profile (see db_tuning.py)")
+    parser.add_argument("--db", help="existing database to copy and use (it must contain in-stock medicines)")
+    parser.add_argument("--i-know-this-mutates", action="store_true",
+                        help="with --db: write to that file itself instead of a copy")
+    args = parser.parse_args(argv)
+
+    if args.db and args.i_know_this_mutates:
+        return run(args.terminals, args.invoices, args.lines, args.profile, args.db)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stress.db")
+        os.environ["PHARMACY_DB_PROFILE"] = args.profile
+        if args.db:
+            copy_database(args.db, path)
+            print(f"Using a copy of {args.db}; the original is not modified")
+        else:
+            seed_database(path)
+        return run(args.terminals, args.invoices, args.lines, args.profile, path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
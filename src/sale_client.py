@@ -0,0 +1,175 @@
+"""
+Client shim for sale_service.py. install() swaps db.py's sale, purchase,
+order and medicine-query functions for versions with the same signatures
+that call the service, so the UI code is unchanged. The local db_signals
+are emitted after each remote write, as db.py would.
+
+Enable it by starting the app with PHARMACY_SALE_SERVICE=host:port
+(see main.py), plus PHARMACY_SALE_SERVICE_TOKEN when the service requires one.
+"""
+import itertools
+import json
+import os
+import socket
+import threading
+import db
+from db import db_signals
+
+SERVICE_ENV_VAR = "PHARMACY_SALE_SERVICE"
+
+
+class ServiceClient:
+    """Blocking JSON-lines client; one socket shared by the calling threads."""
+
+    def __init__(self, host, port, timeout=30, token=None):
+        self.address = (host, port)
+        self.token = token
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, self.timeout)
+        self._file = self._sock.makefile("rb")
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+        self._sock = self._file = None
+
+    def call(self, method, *args, **kwargs):
+        request = {"id": next(self._ids), "method": method, "args": args, "kwargs": kwargs}
+        if self.token:
+            request["token"] = self.token
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall((json.dumps(request) + "\n").encode())
+                line = self._file.readline()
+            except OSError as e:
+                self.close()
+                raise Exception(f"Sale service unavailable at {self.address[0]}:{self.address[1]}: {e}")
+            if not line:
+                self.close()
+                raise Exception("Sale service closed the connection")
+        reply = json.loads(line)
+        error = reply.get("error")
+        if error:
+            if error["type"] == "ValueError":
+                raise ValueError(error["message"])
+            raise Exception(error["message"])
+        return reply["result"]
+
+
+_client = None
+
+
+def _call(method, *args, **kwargs):
+    return _client.call(method, *args, **kwargs)
+
+
+# --- db.py signatures ---
+
+def record_invoice(items, customer_id=None, invoice_number=None):
+    invoice_id = _call("record_invoice", items, customer_id=customer_id, invoice_number=invoice_number)
+    db_signals.medicines_changed.emit(list(dict.fromkeys(item["medicine_id"] for item in items)))
+    db_signals.sale_recorded.emit()
+    return invoice_id
+
+def record_sale(medicine_id, quantity, customer_id=None):
+    _call("record_sale", medicine_id, quantity, customer_id=customer_id)
+    db_signals.medicines_changed.emit([medicine_id])
+    db_signals.sale_recorded.emit()
+
+def record_purchase(medicine_id, quantity, supplier_id=None):
+    _call("record_purchase", medicine_id, quantity, supplier_id=supplier_id)
+    db_signals.medicines_changed.emit([medicine_id])
+    db_signals.medicine_updated.emit()
+
+def record_sale_with_stock_update(medicine_id, quantity, customer_id=None):
+    success, message = _call("record_sale_with_stock_update", medicine_id, quantity, customer_id=customer_id)
+    if success:
+        db_signals.medicines_changed.emit([medicine_id])
+    return success, message
+
+def record_purchase_with_stock_update(medicine_id, quantity, unit_price, supplier_id=None):
+    success, message = _call("record_purchase_with_stock_update", medicine_id, quantity, unit_price,
+                             supplier_id=supplier_id)
+    if success:
+        db_signals.medicines_changed.emit([medicine_id])
+    return success, message
+
+def insert_order(medicine_name, quantity_ordered):
+    try:
+        return _call("insert_order", medicine_name, quantity_ordered)
+    finally:
+        db_signals.order_updated.emit()
+
+def update_order_status(order_id, status):
+    try:
+        _call("update_order_status", order_id, status)
+    finally:
+        db_signals.order_updated.emit()
+
+def _page(result):
+    if isinstance(result["next_key"], list):
+        result["next_key"] = tuple(result["next_key"])  # JSON turns the keyset cursor into a list
+    return result
+
+def query_medicines(search=None, in_stock=True, exclude_expired=False, sort="name",
+                    after=None, offset=None, limit=100):
+    return _page(_call("query_medicines", search, in_stock, exclude_expired, sort, after, offset, limit))
+
+def search_medicines(text, limit=50, after=None, in_stock=True, exclude_expired=False):
+    return _page(_call("search_medicines", text, limit, after, in_stock, exclude_expired))
+
+def get_medicine(med_id):
+    return _call("get_medicine", med_id)
+
+def get_medicines_by_ids(ids):
+    return _call("get_medicines_by_ids", list(ids))
+
+def get_all_medicines():
+    return _call("get_all_medicines")
+
+def get_all_orders():
+    return _call("get_all_orders")
+
+
+SHIMMED = [
+    "record_invoice", "record_sale", "record_purchase",
+    "record_sale_with_stock_update", "record_purchase_with_stock_update",
+    "insert_order", "update_order_status",
+    "query_medicines", "search_medicines", "get_medicine",
+    "get_medicines_by_ids", "get_all_medicines", "get_all_orders",
+]
+
+
+def install(host=None, port=None, token=None):
+    """
+    Route the SHIMMED db.py functions through the sale service. Must run
+    before the UI modules are imported (they bind `from db import ...`).
+    host/port default to sale_service's; token defaults to $PHARMACY_SALE_SERVICE_TOKEN.
+    """
+    global _client
+    # Imported here, not at the top: sale_service pulls in asyncio, which
+    # counters that don't use the service shouldn't pay for at startup
+    from sale_service import DEFAULT_HOST, DEFAULT_PORT, TOKEN_ENV_VAR
+    _client = ServiceClient(host or DEFAULT_HOST, port or DEFAULT_PORT,
+                            token=token or os.environ.get(TOKEN_ENV_VAR))
+    for name in SHIMMED:
+        setattr(db, name, globals()[name])
+
+
+def install_from_env():
+    """install() if $PHARMACY_SALE_SERVICE is set ("host:port" or "port"). Returns True if installed."""
+    value = os.environ.get(SERVICE_ENV_VAR)
+    if not value:
+        return False
+    host, _, port = value.rpartition(":")
+    install(host or None, int(port))
+    return True
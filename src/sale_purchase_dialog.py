@@ -3,17 +3,13 @@ from PyQt5.QtWidgets import (
     QHBoxLayout, QSpinBox, QFormLayout, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QComboBox
 )
 from PyQt5.QtCore import Qt
+from tracing import traced
 import db
-import datetime
-
-def is_expired(expiry_date_str):
-    """Returns True if expiry_date_str (format YYYY-MM-DD) is before today."""
-    try:
-        return datetime.datetime.strptime(expiry_date_str, "%Y-%m-%d").date() < datetime.date.today()
-    except Exception:
-        return False
+from db import is_expired
+from widgets.search_controller import SearchController
 
 class SaleDialog(QDialog):
+    @traced
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Record New Sale")
@@ -102,7 +98,10 @@ class SaleDialog(QDialog):
         # Fast Medicine Search
         self.medicine_search = QLineEdit()
         self.medicine_search.setPlaceholderText("Type to search medicine name, batch, etc...")
-        self.medicine_search.textChanged.connect(self.fast_filter_medicine_table)
+        self._search = SearchController(self._search_first_page, self)
+        self._search.result_ready.connect(self.fast_filter_medicine_table)
+        self._search.search_failed.connect(lambda message: QMessageBox.warning(self, "Search Error", message))
+        self._search.attach(self.medicine_search)
         form_layout.addRow("Medicine Search:", self.medicine_search)
 
         # Table of Medicines
@@ -155,12 +154,12 @@ class SaleDialog(QDialog):
         self.record_sale_btn = QPushButton("Record Sale")
         self.record_sale_btn.setObjectName("record_sale_btn")
         self.record_sale_btn.setCursor(Qt.PointingHandCursor)
-        self.record_sale_btn.clicked.connect(self.save_sale)
+        self.record_sale_btn.clicked.connect(lambda: self.save_sale())
         btn_layout.addWidget(self.record_sale_btn)
         btn_layout.addStretch()
         main_layout.addLayout(btn_layout)
 
-        self.medicines = []
+        self.page_rows = []
         self.selected_medicine = None
         self.load_medicines()
 
@@ -194,35 +193,43 @@ class SaleDialog(QDialog):
         self.cust_type_combo.currentIndexChanged.connect(self.toggle_customer_fields)
 
     def load_medicines(self):
-        self.medicines = db.get_all_medicines()
-        self.fast_filter_medicine_table()
-
-    def fast_filter_medicine_table(self):
-        search = self.medicine_search.text().strip().lower()
-        filtered_meds = []
-        for med in self.medicines:
-            # Don't show expired medicines in the sale dialog
-            if is_expired(med.get("expiry_date", "2099-01-01")):
-                continue
-            display = (
-                search in med['name'].lower() or
-                search in str(med.get('strength', '')).lower() or
-                search in str(med.get('batch_no', '')).lower() or
-                search in str(med.get('expiry_date', '')).lower()
-            ) if search else True
-            if display:
-                filtered_meds.append(med)
-        
-        # Calculate pagination
-        total_items = len(filtered_meds)
-        total_pages = (total_items + self.items_per_page - 1) // self.items_per_page
-        self.current_page = min(self.current_page, max(0, total_pages - 1))
-        start_idx = self.current_page * self.items_per_page
-        end_idx = min(start_idx + self.items_per_page, total_items)
-        
-        # Update table with paginated items
+        self._search.cancel()
+        self.current_page = 0
+        self._page_keys = [None]  # keyset cursor where each visited page starts
+        self._page_query = self.medicine_search.text()  # search those cursors belong to
+        self._load_page()
+
+    def _search_first_page(self, text):
+        # Runs on a search worker thread: database only, no widget access
+        result = db.search_medicines(text, exclude_expired=True, limit=self.items_per_page)
+        result["query"] = text  # paging must continue this search, not whatever is typed now
+        return result
+
+    def fast_filter_medicine_table(self, result):
+        """Latest background search result: restart paging from the first page."""
+        self.current_page = 0
+        self._page_keys = [None]
+        self._page_query = result["query"]
+        self._show_page(result)
+
+    def _load_page(self):
+        # Only the visible page is fetched (ranked search); expired medicines are filtered in SQL
+        result = db.search_medicines(
+            self._page_query,
+            exclude_expired=True,
+            after=self._page_keys[self.current_page],
+            limit=self.items_per_page
+        )
+        self._show_page(result)
+
+    def _show_page(self, result):
+        self.page_rows = result["rows"]
+        self._next_key = result["next_key"]
+        total_pages = (result["total"] + self.items_per_page - 1) // self.items_per_page
+
+        # Update table with the page
         self.medicine_table.setRowCount(0)
-        for med in filtered_meds[start_idx:end_idx]:
+        for med in self.page_rows:
             row_pos = self.medicine_table.rowCount()
             self.medicine_table.insertRow(row_pos)
             self.medicine_table.setItem(row_pos, 0, QTableWidgetItem(med['name']))
@@ -235,27 +242,20 @@ class SaleDialog(QDialog):
         # Update pagination controls
         self.page_label.setText(f"Page {self.current_page + 1} of {max(1, total_pages)}")
         self.prev_btn.setEnabled(self.current_page > 0)
-        self.next_btn.setEnabled(self.current_page < total_pages - 1)
+        self.next_btn.setEnabled(self._next_key is not None)
         self.medicine_table.clearSelection()
         self.selected_medicine = None
 
     def prev_page(self):
         if self.current_page > 0:
             self.current_page -= 1
-            self.fast_filter_medicine_table()
+            self._load_page()
 
     def next_page(self):
-        search = self.medicine_search.text().strip().lower()
-        filtered_meds = [med for med in self.medicines if not is_expired(med.get("expiry_date", "2099-01-01")) and (
-            search in med['name'].lower() or
-            search in str(med.get('strength', '')).lower() or
-            search in str(med.get('batch_no', '')).lower() or
-            search in str(med.get('expiry_date', '')).lower()
-        )] if search else [med for med in self.medicines if not is_expired(med.get("expiry_date", "2099-01-01"))]
-        total_pages = (len(filtered_meds) + self.items_per_page - 1) // self.items_per_page
-        if self.current_page < total_pages - 1:
+        if self._next_key is not None:
+            self._page_keys = self._page_keys[:self.current_page + 1] + [self._next_key]
             self.current_page += 1
-            self.fast_filter_medicine_table()
+            self._load_page()
 
     def load_customers(self):
         self.cust_combo.clear()
@@ -276,12 +276,9 @@ class SaleDialog(QDialog):
         if not selected_rows:
             return None
         row = selected_rows[0].row()
-        name = self.medicine_table.item(row, 0).text()
-        strength = self.medicine_table.item(row, 1).text()
-        batch = self.medicine_table.item(row, 2).text()
-        med = next((m for m in self.medicines if m['name'] == name and str(m.get('strength','')) == strength and str(m.get('batch_no','')) == batch), None)
-        return med
+        return self.page_rows[row] if row < len(self.page_rows) else None
 
+    @traced
     def save_sale(self):
         try:
             # Validate inputs
@@ -291,7 +288,7 @@ class SaleDialog(QDialog):
                 return
 
             # Check again for expiry (in case table is out of sync)
-            if is_expired(med.get("expiry_date", "2099-01-01")):
+            if is_expired(med):
                 QMessageBox.warning(self, "Expired Medicine", f"{med['name']} is expired and cannot be sold.")
                 return
 
@@ -344,6 +341,7 @@ class SaleDialog(QDialog):
             return None
 
 class PurchaseDialog(QDialog):
+    @traced
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Record New Purchase")
@@ -432,7 +430,10 @@ class PurchaseDialog(QDialog):
         # Fast Medicine Search
         self.medicine_search = QLineEdit()
         self.medicine_search.setPlaceholderText("Type to search medicine name, batch, etc...")
-        self.medicine_search.textChanged.connect(self.fast_filter_medicine_table)
+        self._search = SearchController(self._search_first_page, self)
+        self._search.result_ready.connect(self.fast_filter_medicine_table)
+        self._search.search_failed.connect(lambda message: QMessageBox.warning(self, "Search Error", message))
+        self._search.attach(self.medicine_search)
         form_layout.addRow("Medicine Search:", self.medicine_search)
 
         # Table of Medicines
@@ -490,12 +491,12 @@ class PurchaseDialog(QDialog):
         self.record_purchase_btn = QPushButton("Record Purchase")
         self.record_purchase_btn.setObjectName("record_purchase_btn")
         self.record_purchase_btn.setCursor(Qt.PointingHandCursor)
-        self.record_purchase_btn.clicked.connect(self.save_purchase)
+        self.record_purchase_btn.clicked.connect(lambda: self.save_purchase())
         btn_layout.addWidget(self.record_purchase_btn)
         btn_layout.addStretch()
         main_layout.addLayout(btn_layout)
 
-        self.medicines = []
+        self.page_rows = []
         self.selected_medicine = None
         self.load_medicines()
 
@@ -529,40 +530,51 @@ class PurchaseDialog(QDialog):
         self.supp_type_combo.currentIndexChanged.connect(self.toggle_supplier_fields)
 
     def load_medicines(self):
-        self.medicines = db.get_all_medicines()
-        self.fast_filter_medicine_table()
-
-    def fast_filter_medicine_table(self):
-        search = self.medicine_search.text().strip().lower()
-        filtered_meds = []
-        for med in self.medicines:
-            display = (
-                search in med['name'].lower() or
-                search in str(med.get('strength', '')).lower() or
-                search in str(med.get('batch_no', '')).lower() or
-                search in str(med.get('expiry_date', '')).lower()
-            ) if search else True
-            if display:
-                filtered_meds.append(med)
-        
-        # Calculate pagination
-        total_items = len(filtered_meds)
-        total_pages = (total_items + self.items_per_page - 1) // self.items_per_page
-        self.current_page = min(self.current_page, max(0, total_pages - 1))
-        start_idx = self.current_page * self.items_per_page
-        end_idx = min(start_idx + self.items_per_page, total_items)
-        
-        # Update table with paginated items
+        self._search.cancel()
+        self.current_page = 0
+        self._page_keys = [None]  # keyset cursor where each visited page starts
+        self._page_query = self.medicine_search.text()  # search those cursors belong to
+        self._load_page()
+
+    def _search_first_page(self, text):
+        # Runs on a search worker thread: database only, no widget access
+        result = db.search_medicines(text, limit=self.items_per_page)
+        result["query"] = text  # paging must continue this search, not whatever is typed now
+        return result
+
+    def fast_filter_medicine_table(self, result):
+        """Latest background search result: restart paging from the first page."""
+        self.current_page = 0
+        self._page_keys = [None]
+        self._page_query = result["query"]
+        self._show_page(result)
+
+    def _load_page(self):
+        # Only the visible page is fetched from the DB
+        result = db.search_medicines(
+            self._page_query,
+            after=self._page_keys[self.current_page],
+            limit=self.items_per_page
+        )
+        self._show_page(result)
+
+    def _show_page(self, result):
+        self.page_rows = result["rows"]
+        self._next_key = result["next_key"]
+        total_pages = (result["total"] + self.items_per_page - 1) // self.items_per_page
+
+        # Update table with the page
         self.medicine_table.setRowCount(0)
-        for med in filtered_meds[start_idx:end_idx]:
+        for med in self.page_rows:
             row_pos = self.medicine_table.rowCount()
             self.medicine_table.insertRow(row_pos)
+            expired = is_expired(med)
             for col, key in enumerate(['name', 'strength', 'batch_no', 'expiry_date', 'quantity', 'unit_price']):
                 value = med.get(key, '')
                 if col == 5:
                     value = "₨ {:.2f}".format(med.get('unit_price', 0))
                 item = QTableWidgetItem(str(value))
-                if is_expired(med.get("expiry_date", "2099-01-01")):
+                if expired:
                     item.setForeground(Qt.red)
                     item.setToolTip("Expired medicine - check expiry!")
                 self.medicine_table.setItem(row_pos, col, item)
@@ -570,27 +582,20 @@ class PurchaseDialog(QDialog):
         # Update pagination controls
         self.page_label.setText(f"Page {self.current_page + 1} of {max(1, total_pages)}")
         self.prev_btn.setEnabled(self.current_page > 0)
-        self.next_btn.setEnabled(self.current_page < total_pages - 1)
+        self.next_btn.setEnabled(self._next_key is not None)
         self.medicine_table.clearSelection()
         self.selected_medicine = None
 
     def prev_page(self):
         if self.current_page > 0:
             self.current_page -= 1
-            self.fast_filter_medicine_table()
+            self._load_page()
 
     def next_page(self):
-        search = self.medicine_search.text().strip().lower()
-        filtered_meds = [med for med in self.medicines if (
-            search in med['name'].lower() or
-            search in str(med.get('strength', '')).lower() or
-            search in str(med.get('batch_no', '')).lower() or
-            search in str(med.get('expiry_date', '')).lower()
-        )] if search else self.medicines
-        total_pages = (len(filtered_meds) + self.items_per_page - 1) // self.items_per_page
-        if self.current_page < total_pages - 1:
+        if self._next_key is not None:
+            self._page_keys = self._page_keys[:self.current_page + 1] + [self._next_key]
             self.current_page += 1
-            self.fast_filter_medicine_table()
+            self._load_page()
 
     def load_suppliers(self):
         self.supp_combo.clear()
@@ -611,12 +616,9 @@ class PurchaseDialog(QDialog):
         if not selected_rows:
             return None
         row = selected_rows[0].row()
-        name = self.medicine_table.item(row, 0).text()
-        strength = self.medicine_table.item(row, 1).text()
-        batch = self.medicine_table.item(row, 2).text()
-        med = next((m for m in self.medicines if m['name'] == name and str(m.get('strength','')) == strength and str(m.get('batch_no','')) == batch), None)
-        return med
+        return self.page_rows[row] if row < len(self.page_rows) else None
 
+    @traced
     def save_purchase(self):
         try:
             med = self.get_selected_medicine()
@@ -635,7 +637,7 @@ class PurchaseDialog(QDialog):
                 return
 
             # Show a warning if the med is expired (but allow recording if user chooses)
-            if is_expired(med.get("expiry_date", "2099-01-01")):
+            if is_expired(med):
                 reply = QMessageBox.question(
                     self,
                     "Expired Medicine",
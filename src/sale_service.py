@@ -0,0 +1,199 @@
+"""
+Optional sale service for multi-counter setups: one process commits the
+counters' sales, purchases and orders (see sale_client.py) instead of each
+counter contending for the SQLite write lock on those hot paths. Other writes
+-- zero-stock archival (maintenance.py), bulk import, adding/editing/deleting
+medicines, customers and suppliers -- still go straight to the database file
+from each counter, so it is the single writer for sales only, not for the file.
+
+    python src/sale_service.py [--host 127.0.0.1] [--port 8765] [--token SECRET]
+
+It listens on 127.0.0.1 by default: counters on the same machine only. To
+serve other PCs, bind --host 0.0.0.0 (or the LAN address) AND set a shared
+token (--token or $PHARMACY_SALE_SERVICE_TOKEN, also set on every counter);
+without one the service refuses to listen beyond localhost, since anyone who
+can reach the port could otherwise record invoices or change orders.
+
+Protocol: one JSON object per line.
+    request  {"id": 1, "method": "record_invoice", "args": [...], "kwargs": {...}, "token": ...}
+    reply    {"id": 1, "result": ...}  or  {"id": 1, "error": {"type": ..., "message": ...}}
+
+Group commit: writes queue up while the previous commit is running, and the
+whole queue is then committed as ONE transaction (one fsync), each request in
+its own savepoint so a failing request doesn't affect the others.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import db
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_ENV_VAR = "PHARMACY_SALE_SERVICE_TOKEN"
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+MAX_GROUP = 64            # requests per commit
+GROUP_WINDOW = 0.0        # seconds to wait for more writes before committing (0: only what is queued)
+READ_THREADS = 4
+
+# Methods the service runs, by name -> db.py function
+WRITE_METHODS = {
+    name: getattr(db, name) for name in (
+        "record_invoice", "record_sale", "record_purchase",
+        "record_sale_with_stock_update", "record_purchase_with_stock_update",
+        "insert_order", "update_order_status",
+    )
+}
+READ_METHODS = {
+    name: getattr(db, name) for name in (
+        "query_medicines", "search_medicines", "get_medicine",
+        "get_medicines_by_ids", "get_all_medicines", "get_all_orders",
+    )
+}
+
+
+class SaleService:
+    def __init__(self, max_group=MAX_GROUP, group_window=GROUP_WINDOW, token=None):
+        self.max_group = max_group
+        self.token = token.encode() if token else None
+        self.group_window = group_window
+        self.stats = {"reads": 0, "writes": 0, "commits": 0, "failed_writes": 0}
+        self._writer = ThreadPoolExecutor(max_workers=1)  # every write uses this thread's connection
+        self._readers = ThreadPoolExecutor(max_workers=READ_THREADS)
+        self._queue = None
+        self._write_task = None
+        self.server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._queue = asyncio.Queue()
+        self._write_task = asyncio.ensure_future(self._write_loop())
+        self.server = await asyncio.start_server(self._handle_client, host, port)
+        return self.server
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """start() and serve until cancelled (Ctrl+C under asyncio.run), then stop()."""
+        await self.start(host, port)
+        print(f"Sale service listening on {host}:{port}")
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._write_task.cancel()
+        self._writer.shutdown()
+        self._readers.shutdown()
+
+    # --- Requests ---
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self._dispatch(line)
+                writer.write((json.dumps(reply, default=str) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, line):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if self.token is not None and not hmac.compare_digest(
+                    str(request.get("token") or "").encode(), self.token):
+                raise PermissionError("Invalid or missing sale service token")
+            method = request["method"]
+            args = request.get("args", [])
+            kwargs = request.get("kwargs", {})
+            if method in WRITE_METHODS:
+                future = asyncio.get_running_loop().create_future()
+                await self._queue.put((method, args, kwargs, future))
+                result = await future
+            elif method in READ_METHODS:
+                self.stats["reads"] += 1
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._readers, lambda: READ_METHODS[method](*args, **kwargs)
+                )
+            elif method == "service_stats":
+                result = dict(self.stats)
+            else:
+                raise ValueError(f"Unknown method: {method}")
+            return {"id": request_id, "result": result}
+        except Exception as e:
+            return {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+
+    # --- Group commit ---
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self._queue.get()]
+            if self.group_window:
+                await asyncio.sleep(self.group_window)
+            while len(group) < self.max_group and not self._queue.empty():
+                group.append(self._queue.get_nowait())
+            outcomes = await loop.run_in_executor(self._writer, self._commit_group, group)
+            for (_, _, _, future), (result, error) in zip(group, outcomes):
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _commit_group(self, group):
+        """Runs on the writer thread: all requests in one transaction. Returns [(result, error)]."""
+        outcomes = []
+        try:
+            with db.unit_of_work() as uow:
+                for method, args, kwargs, _ in group:
+                    try:
+                        with uow.savepoint("request"):
+                            outcomes.append((WRITE_METHODS[method](*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((None, e))
+        except Exception as e:
+            self.stats["failed_writes"] += len(group)
+            return [(None, e)] * len(group)
+        self.stats["commits"] += 1
+        self.stats["writes"] += len(group)
+        self.stats["failed_writes"] += sum(1 for _, error in outcomes if error is not None)
+        return outcomes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single-writer sale service for several counters.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--group-window", type=float, default=GROUP_WINDOW,
+                        help="seconds to wait for more writes before each commit")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV_VAR),
+                        help=f"shared secret every request must carry (default: ${TOKEN_ENV_VAR})")
+    args = parser.parse_args(argv)
+    if args.host not in LOCAL_HOSTS and not args.token:
+        parser.error(f"listening on {args.host} needs a shared token (--token or ${TOKEN_ENV_VAR})")
+
+    db.init_db()
+    service = SaleService(group_window=args.group_window, token=args.token)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
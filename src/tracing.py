@@ -0,0 +1,171 @@
+"""
+Timing spans around UI actions, off unless enabled at startup.
+
+    with span("InvoiceDialog.print"):
+        ...
+
+    @traced
+    def save_sale(self): ...
+
+Spans nest per thread. When tracing is on, every db.py call also becomes a
+span (category "db"), so a slow "Print" shows whether the time went to the
+print dialog, the database or the table rebuild.
+
+Enable it by starting the app with PHARMACY_TRACE=<file> (see main.py):
+    *.json   Chrome trace, written on exit (open in chrome://tracing or Perfetto)
+    other    JSONL, one finished span per line, written as it happens
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_ENV_VAR = "PHARMACY_TRACE"
+MAX_EVENTS = 200000  # Chrome-trace spans kept in memory (oldest dropped first)
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.format = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # open span names per thread
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._file = None
+        self._pid = os.getpid()
+        self._origin = 0.0  # perf_counter at start
+        self._wall = 0.0    # time.time() at start
+
+    def start(self, path):
+        """Record spans to path: Chrome trace if it ends in .json, else JSONL."""
+        self.stop()
+        self.path = path
+        self.format = "chrome" if path.lower().endswith(".json") else "jsonl"
+        self._origin = time.perf_counter()
+        self._wall = time.time()
+        self._events.clear()
+        if self.format == "jsonl":
+            self._file = open(path, "a", encoding="utf-8")
+        self.enabled = True
+
+    def stop(self):
+        """Stop recording and write out what was collected."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            else:
+                self._write_chrome()
+
+    def _write_chrome(self):
+        trace = {
+            "traceEvents": list(self._events),
+            "displayTimeUnit": "ms",
+            "otherData": {"started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._wall))},
+        }
+        tmp_path = self.path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def span(self, name, cat="ui", **args):
+        """Time the block as one span; args are attached to it."""
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            self._record(name, cat, started, duration, parent, len(stack), args)
+
+    def _record(self, name, cat, started, duration, parent, depth, args):
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((started - self._origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            if not self.enabled:
+                return
+            if self._file is not None:
+                line = dict(event, time=self._wall + (started - self._origin), parent=parent, depth=depth)
+                self._file.write(json.dumps(line, default=str) + "\n")
+                self._file.flush()
+            else:
+                self._events.append(event)
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def traced(name=None, cat="ui"):
+    """
+    Decorator: run the function inside span(name) (default: its qualified
+    name). Usable bare (@traced) or with arguments (@traced("Print")).
+
+    Arguments are passed through untouched, so PyQt can no longer drop a
+    signal's extra arguments: connect clicked(bool) to a decorated method
+    through a lambda.
+    """
+    if callable(name):
+        return traced()(name)
+
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(label, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def install(path, db_module=None):
+    """Start tracing to path; db_module's public functions become "db" spans."""
+    tracer.start(path)
+    atexit.register(tracer.stop)
+    if db_module is not None:
+        from db_profiler import profiled_functions
+        for name, func in profiled_functions(db_module):
+            setattr(db_module, name, traced(name, cat="db")(func))
+    return tracer
+
+
+def install_from_env():
+    """install() if $PHARMACY_TRACE is set. Returns True if installed."""
+    path = os.environ.get(TRACE_ENV_VAR)
+    if not path:
+        return False
+    import db
+    install(path, db)
+    return True
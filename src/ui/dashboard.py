@@ -3,15 +3,23 @@ from PyQt5.QtWidgets import (
     QLineEdit, QPushButton, QDialog, QTableWidget,
     QTableWidgetItem, QHeaderView, QFileDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+from tracing import traced
 from widgets.dashboard_card import DashboardCard
 from widgets.paginated_table import PaginatedTable
-from db import get_all_medicines, update_medicine, delete_medicine, get_sales_history
+from widgets.search_controller import SearchController
+from db import (
+    update_medicine, delete_medicine, db_signals, get_all_medicines, get_dashboard_metrics,
+    get_sales_for_day, get_low_stock_medicines, get_expiring_medicines,
+    day_number, LOW_STOCK_THRESHOLD, EXPIRY_WINDOW_DAYS
+)
+from inventory_cache import inventory_cache
 from widgets.add_medicine_dialog import AddMedicineDialog
-from datetime import datetime, timedelta
-import csv
+from datetime import datetime
+from export_engine import export_csv, RowsExport
 
 class DetailDialog(QDialog):
+    @traced
     def __init__(self, title, data, headers, parent=None, allow_csv=False, csv_default_name="details.csv"):
         super().__init__(parent)
         self.setWindowTitle(title)
@@ -41,9 +49,13 @@ class DetailDialog(QDialog):
             btn_csv.clicked.connect(lambda: self.save_csv(csv_default_name))
             layout.addWidget(btn_csv)
         self.setLayout(layout)
-        self.search_input.textChanged.connect(self._fast_filter_table)
+        # Filtering runs on a worker thread, debounced; only the latest result is shown
+        self._search = SearchController(self._filter_rows, self, interrupt_sql=False)
+        self._search.result_ready.connect(self._populate_table)
+        self._search.attach(self.search_input)
 
     def _populate_table(self, data):
+        self._shown_rows = data
         self.table.setRowCount(len(data))
         for row, row_data in enumerate(data):
             for col, value in enumerate(row_data):
@@ -51,29 +63,21 @@ class DetailDialog(QDialog):
                 item.setTextAlignment(Qt.AlignCenter)
                 self.table.setItem(row, col, item)
 
-    def _fast_filter_table(self):
-        q = self.search_input.text().strip().lower()
+    def _filter_rows(self, text):
+        # Runs on a search worker thread: reads raw_data only
+        q = text.strip().lower()
         if not q:
-            filtered = self.raw_data
-        else:
-            filtered = [
-                row for row in self.raw_data
-                if any(q in str(cell).lower() for cell in row)
-            ]
-        self._populate_table(filtered)
+            return self.raw_data
+        return [
+            row for row in self.raw_data
+            if any(q in str(cell).lower() for cell in row)
+        ]
 
     def save_csv(self, default_name):
         path, _ = QFileDialog.getSaveFileName(self, "Save as CSV", default_name, "CSV Files (*.csv)")
         if path:
-            try:
-                with open(path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(self.headers)
-                    for row in range(self.table.rowCount()):
-                        writer.writerow([self.table.item(row, col).text() for col in range(self.table.columnCount())])
-                QMessageBox.information(self, "Success", f"Saved to {path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to save CSV:\n{str(e)}")
+            # Export the rows currently shown (after filtering), not the widget items
+            self._export_task = export_csv(self, path, RowsExport(self.headers, list(self._shown_rows)), "Save as CSV")
 
 class Dashboard(QWidget):
     def __init__(self, user=None, parent=None):
@@ -153,12 +157,12 @@ class Dashboard(QWidget):
         # Inventory table
         self.table = PaginatedTable()
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: white; border-radius: 10px; border: 1px solid #ddd;
                 box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
             }
-            QTableWidget::item { padding: 8px; }
-            QTableWidget::item:alternate { background: #f9f9f9; }
+            QTableView::item { padding: 8px; }
+            QTableView::item:alternate { background: #f9f9f9; }
             QHeaderView::section {
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #1abc9c, stop:1 #16a085);
                 color: white; font-weight: bold; padding: 10px; border: none;
@@ -177,81 +181,80 @@ class Dashboard(QWidget):
         self.no_medicines_label.hide()
         main_layout.addWidget(self.no_medicines_label)
 
-        # Store data
-        self.medicines = []
-        self.low_stock_meds = []
-        self.expiring_meds = []
-        self.today_sales = []
+        # Card numbers come from one aggregate query; detail rows load on click.
+        # A sale fires several signals -> coalesce them into one refresh.
+        self._cards_timer = QTimer(self)
+        self._cards_timer.setSingleShot(True)
+        self._cards_timer.setInterval(0)
+        self._cards_timer.timeout.connect(self.update_dashboard_cards)
 
         # Connect signals
         self.table.edit_requested.connect(self.edit_medicine)
         self.table.delete_requested.connect(self.delete_medicine)
-        self.search_input.textChanged.connect(self.filter_table)
+        self.table.attach_search(self.search_input)
+        self.table.query_loaded.connect(self._update_no_results)
+        # Cards follow the inventory cache; the table patches its own rows
+        inventory_cache.changed.connect(self._cards_timer.start)
+        db_signals.sale_recorded.connect(self._cards_timer.start)
 
         self.load_table_data()
 
+    @traced
     def load_table_data(self):
-        self.medicines = get_all_medicines()
-        today = datetime.now().strftime("%Y-%m-%d")
-        self.today_sales = [sale for sale in get_sales_history() if sale.get('date', '').startswith(today)]
-        self.low_stock_meds = [m for m in self.medicines if int(m.get("quantity", 0)) < 10]
-        now = datetime.today()
-        self.expiring_meds = [m for m in self.medicines if m.get("expiry_date") and 
-                            now < datetime.strptime(m["expiry_date"], "%Y-%m-%d") <= now + timedelta(days=30)]
-        self.table.set_data(self.medicines)
+        self.filter_table()
         self.update_dashboard_cards()
 
     def update_dashboard_cards(self):
-        self.card_total.set_value(len(self.medicines))
-        self.card_sales.set_value(len(self.today_sales))
-        self.card_low_stock.set_value(len(self.low_stock_meds))
-        self.card_expiry.set_value(len(self.expiring_meds))
+        try:
+            metrics = get_dashboard_metrics(datetime.now(), LOW_STOCK_THRESHOLD, EXPIRY_WINDOW_DAYS)
+        except Exception as e:
+            print(f"Warning: could not load dashboard metrics: {e}")
+            return
+        self.card_total.set_value(metrics["total_medicines"])
+        self.card_sales.set_value(metrics["today_sales"])
+        self.card_low_stock.set_value(metrics["low_stock"])
+        self.card_expiry.set_value(metrics["expiring_soon"])
 
     def filter_table(self):
-        query = self.search_input.text().strip().lower()
-        if not query:
-            self.no_medicines_label.hide()
-            self.table.set_data(self.medicines)
-            return
-        filtered = [m for m in self.medicines if any(query in str(m.get(k, "")).lower() 
-                                                     for k in ["name", "strength", "batch_no", 
-                                                               "expiry_date", "quantity", "unit_price"])]
-        if filtered:
-            self.no_medicines_label.hide()
-            self.table.set_data(filtered)
-        else:
+        """Search runs in the database; the table only ever holds the visible page."""
+        self.table.set_query(self.search_input.text())
+        self._update_no_results(self.table.total_count())
+
+    def _update_no_results(self, total):
+        if self.search_input.text().strip() and not total:
             self.no_medicines_label.show()
-            self.table.set_data([])
+        else:
+            self.no_medicines_label.hide()
 
     def show_total_details(self):
         headers = ["ID", "Name", "Strength", "Batch No", "Expiry", "Qty", "Unit Price"]
         data = [[m["id"], m["name"], m.get("strength", "N/A"), m.get("batch_no", "N/A"), 
                  m.get("expiry_date", "N/A"), m.get("quantity", 0), f"₨ {m.get('unit_price', 0):.2f}"] 
-                for m in self.medicines]
+                for m in get_all_medicines()]
         dialog = DetailDialog("Inventory Details", data, headers, self, allow_csv=True, csv_default_name="inventory.csv")
         dialog.exec_()
 
     def show_sales_details(self):
         headers = ["Sale ID", "Medicine", "Qty", "Customer", "Date"]
-        data = [[s["id"], s["medicine_name"], s["quantity"], s.get("customer_name", "N/A"), s["date"]] 
-                for s in self.today_sales]
+        data = [[s["id"], s["medicine_name"], s["quantity"], s.get("customer_name") or "N/A", s["date"]] 
+                for s in get_sales_for_day(datetime.now())]
         dialog = DetailDialog("Today's Sales Details", data, headers, self, allow_csv=True, csv_default_name="todays_sales.csv")
         dialog.exec_()
 
     def show_low_stock_details(self):
         headers = ["ID", "Name", "Strength", "Batch No", "Current Qty", "Unit Price"]
         data = [[m["id"], m["name"], m.get("strength", "N/A"), m.get("batch_no", "N/A"), 
-                 m.get("quantity", 0), f"₨ {m.get('unit_price', 0):.2f}"] for m in self.low_stock_meds]
+                 m.get("quantity", 0), f"₨ {m.get('unit_price', 0):.2f}"]
+                for m in get_low_stock_medicines(LOW_STOCK_THRESHOLD)]
         dialog = DetailDialog("Low Stock Details", data, headers, self, allow_csv=True, csv_default_name="low_stock.csv")
         dialog.exec_()
 
     def show_expiring_details(self):
         headers = ["ID", "Name", "Strength", "Batch No", "Expiry Date", "Qty Left", "Days Left"]
-        today = datetime.today()
+        today = day_number()
         data = [[m["id"], m["name"], m.get("strength", "N/A"), m.get("batch_no", "N/A"), 
-                 m.get("expiry_date", ""), m.get("quantity", 0), 
-                 (datetime.strptime(m.get("expiry_date", ""), "%Y-%m-%d") - today).days 
-                 if m.get("expiry_date") else "N/A"] for m in self.expiring_meds]
+                 m["expiry_date"], m.get("quantity", 0), m["expiry_days"] - today]
+                for m in get_expiring_medicines(datetime.now(), EXPIRY_WINDOW_DAYS)]
         dialog = DetailDialog("Expiring Soon Details", data, headers, self, allow_csv=True, csv_default_name="expiring_soon.csv")
         dialog.exec_()
 
@@ -260,8 +263,7 @@ class Dashboard(QWidget):
             dialog = AddMedicineDialog(self.parent, initial_data=med)
             if dialog.exec_():
                 new_data = dialog.get_data()
-                update_medicine(med["id"], new_data)
-                self.load_table_data()
+                update_medicine(med["id"], new_data)  # table row and cards update via InventoryCache
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to edit medicine: {str(e)}")
 
@@ -273,6 +275,5 @@ class Dashboard(QWidget):
             )
             if reply == QMessageBox.Yes:
                 delete_medicine(med_id)
-                self.load_table_data()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to delete medicine: {str(e)}")
\ No newline at end of file
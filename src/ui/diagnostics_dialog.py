@@ -0,0 +1,174 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTabWidget,
+    QTableWidget, QTableWidgetItem, QHeaderView, QComboBox, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+from tracing import traced
+from datetime import datetime
+from db_profiler import profiler, PROFILING_ENV_VAR
+from export_engine import export_csv, RowsExport
+
+class DiagnosticsDialog(QDialog):
+    """
+    Admin view of the query profiler (db_profiler.py): heaviest statements and
+    db.py calls, plus the background maintenance runs (maintenance.py).
+    """
+    TOP_N = 25
+    REFRESH_MS = 2000
+    SORT_CHOICES = [("Total time", "total"), ("p95", "p95"), ("Max", "max"), ("Calls", "calls")]
+    FUNCTION_HEADERS = ["Function", "Calls", "Total ms", "Mean ms", "p95 ms", "Max ms", "Rows"]
+    STATEMENT_HEADERS = FUNCTION_HEADERS[1:] + ["Called from", "SQL"]
+    MAINTENANCE_HEADERS = ["Task", "Runs", "Failures", "Rows moved", "Last rows", "Last ms", "Total ms",
+                           "Last run", "Last error"]
+
+    @traced
+    def __init__(self, user=None, parent=None):
+        super().__init__(parent)
+        if not user or user.get("role") != "admin":
+            QMessageBox.critical(self, "Access Denied", "Only admins can view diagnostics.")
+            self.reject()
+            return
+        self.user = user
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumSize(1100, 650)
+        self.setStyleSheet("""
+            QDialog { background: #f5f6fa; }
+            QLabel#status_label { font-size: 14px; color: #2c3e50; }
+            QTableWidget { background: white; border: 1px solid #e0e0e0; font-size: 13px; }
+            QHeaderView::section { background: #2c3e50; color: white; font-weight: bold; padding: 6px; border: none; }
+            QPushButton {
+                border-radius: 8px; padding: 8px 16px; min-width: 90px;
+                font-weight: bold; border: none; color: white; background: #0984e3;
+            }
+            QPushButton#reset_btn { background: #e74c3c; }
+        """)
+
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel("")
+        self.status_label.setObjectName("status_label")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Sort by:"))
+        self.sort_combo = QComboBox()
+        for label, key in self.SORT_CHOICES:
+            self.sort_combo.addItem(label, key)
+        self.sort_combo.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.sort_combo)
+        controls.addStretch()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        controls.addWidget(refresh_btn)
+        export_btn = QPushButton("⬇️ Export CSV")
+        export_btn.clicked.connect(self.export_current)
+        controls.addWidget(export_btn)
+        reset_btn = QPushButton("Reset")
+        reset_btn.setObjectName("reset_btn")
+        reset_btn.clicked.connect(self.reset_stats)
+        controls.addWidget(reset_btn)
+        layout.addLayout(controls)
+
+        self.tabs = QTabWidget()
+        self.functions_table = self._make_table(self.FUNCTION_HEADERS)
+        self.statements_table = self._make_table(self.STATEMENT_HEADERS)
+        self.tabs.addTab(self.functions_table, "db.py calls")
+        self.tabs.addTab(self.statements_table, "SQL statements")
+        # The main window owns the scheduler; the dialog may also be opened without one
+        self.maintenance = getattr(parent, "maintenance", None)
+        self.maintenance_table = self._make_table(self.MAINTENANCE_HEADERS)
+        self.tabs.addTab(self.maintenance_table, "Maintenance")
+        if self.maintenance is not None:
+            self.maintenance.task_finished.connect(self._refresh_maintenance)
+        layout.addWidget(self.tabs, 1)
+
+        self._shown = {}  # table -> rows shown, for CSV export
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        if profiler.enabled:
+            self.timer.start(self.REFRESH_MS)
+        self._refresh_maintenance()
+        self.refresh()
+
+    def _make_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectRows)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(len(headers) - 1, QHeaderView.Stretch)
+        return table
+
+    def refresh(self):
+        if not profiler.enabled:
+            self.status_label.setText(
+                f"Query profiling is off. Start the app with {PROFILING_ENV_VAR}=1 to collect "
+                "per-query timings and the slow-query log."
+            )
+            return
+        since = datetime.fromtimestamp(profiler.started).strftime("%Y-%m-%d %H:%M:%S")
+        self.status_label.setText(
+            f"Profiling since {since}.   Slow queries (≥ {profiler.slow_ms:g} ms): {profiler.slow_count}, "
+            f"logged to {profiler.log_path}"
+        )
+        by = self.sort_combo.currentData() or "total"
+        functions = [
+            (r["name"], r["calls"], r["total_ms"], r["mean_ms"], r["p95_ms"], r["max_ms"], r["rows"])
+            for r in profiler.top("functions", self.TOP_N, by)
+        ]
+        statements = [
+            (r["calls"], r["total_ms"], r["mean_ms"], r["p95_ms"], r["max_ms"], r["rows"], r["functions"], r["name"])
+            for r in profiler.top("statements", self.TOP_N, by)
+        ]
+        self._fill(self.functions_table, functions)
+        self._fill(self.statements_table, statements)
+
+    def _refresh_maintenance(self, *args):
+        rows = []
+        metrics = self.maintenance.metrics() if self.maintenance is not None else {}
+        for name, stats in sorted(metrics.items()):
+            last_seconds = stats["last_seconds"]
+            rows.append((
+                name, stats["runs"], stats["failures"], stats["rows_total"],
+                "" if stats["last_rows"] is None else stats["last_rows"],
+                "" if last_seconds is None else last_seconds * 1000,
+                stats["seconds_total"] * 1000,
+                stats["last_run"] or "not run yet", stats["last_error"] or "",
+            ))
+        self._fill(self.maintenance_table, rows)
+
+    def _fill(self, table, rows):
+        self._shown[table] = rows
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                if isinstance(value, (int, float)):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                else:
+                    item.setToolTip(text)
+                table.setItem(row, col, item)
+
+    def reset_stats(self):
+        profiler.reset()
+        self.refresh()
+
+    def export_current(self):
+        table = self.tabs.currentWidget()
+        headers = {
+            self.functions_table: self.FUNCTION_HEADERS,
+            self.statements_table: self.STATEMENT_HEADERS,
+            self.maintenance_table: self.MAINTENANCE_HEADERS,
+        }[table]
+        default_name = f"diagnostics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", default_name, "CSV Files (*.csv)")
+        if path:
+            self._export_task = export_csv(self, path, RowsExport(headers, list(self._shown.get(table, []))),
+                                           "Export Diagnostics")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
@@ -1,7 +1,9 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QScrollArea, QWidget, QSizePolicy, QLineEdit, QPushButton, QHBoxLayout, QMessageBox
 from PyQt5.QtCore import Qt
+from tracing import traced
 
 class HelpSupportDialog(QDialog):
+    @traced
     def __init__(self, user=None, parent=None):
         super().__init__(parent)
         self.user = user
@@ -2,21 +2,17 @@ from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
     QMessageBox, QSizePolicy, QFileDialog
 )
-from PyQt5.QtCore import Qt
-from sale_purchase_dialog import SaleDialog, PurchaseDialog
+from PyQt5.QtCore import Qt, QTimer
+from tracing import traced
 from widgets.sidebar import Sidebar
 from widgets.topbar import Topbar
-from ui.dashboard import Dashboard
-from ui.medicine_management import MedicineManagement
-from ui.orders_dialog import OrdersDialog
-from ui.sales_report import SalesDialog
-from widgets.add_medicine_dialog import AddMedicineDialog
+from ui.screens import open_screen, is_screen
 
-from ui.help_support import HelpSupportDialog
-from ui.settings_dialog import SettingsDialog
-
-from db import db_signals, get_all_medicines, get_inventory_data, get_sales_data, get_all_orders, update_order_status
-import csv
+from db import db_signals, get_all_medicines, get_all_orders, update_order_status, checkpoint_wal, count_rows, EXPORT_QUERIES
+from export_engine import export_csv, QueryExport
+from maintenance import create_scheduler
+from inventory_cache import inventory_cache
+from db_tuning import CHECKPOINT_INTERVAL_MS
 
 class MainWindow(QMainWindow):
     def __init__(self, user):
@@ -25,11 +21,20 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Pharmacy Management App")
         self.setGeometry(100, 100, 1200, 700)
 
-        # Connect DB signals
-        db_signals.sale_recorded.connect(self.refresh_all)
-        db_signals.medicine_updated.connect(self.refresh_all)
+        # Inventory is loaded once; sales, purchases and edits patch it by id
+        # (see InventoryCache), so they no longer trigger refresh_all. Screens
+        # that show sales or stock (sales report, orders) subscribe themselves.
+        inventory_cache.ensure_loaded()
         db_signals.order_updated.connect(self.refresh_all)
 
+        # Checkpoint the WAL on our own schedule instead of mid-sale
+        self.checkpoint_timer = QTimer(self)
+        self.checkpoint_timer.timeout.connect(self.run_wal_checkpoint)
+        self.checkpoint_timer.start(CHECKPOINT_INTERVAL_MS)
+
+        # Background housekeeping (zero-stock archival), see maintenance.py
+        self.maintenance = create_scheduler(self)
+
         # Central widget setup
         central = QWidget()
         self.main_layout = QHBoxLayout(central)
@@ -135,7 +140,7 @@ class MainWindow(QMainWindow):
         self.area_layout.addLayout(btn_layout)
 
         # Dynamic content area
-        self.content_area = Dashboard(user=self.user, parent=self)
+        self.content_area = open_screen("dashboard", user=self.user, parent=self)
         self.area_layout.addWidget(self.content_area, 1)
 
         self.main_layout.addWidget(main_area, 1)
@@ -166,18 +171,16 @@ class MainWindow(QMainWindow):
         if self.user["role"] != "admin":
             QMessageBox.warning(self, "Permission Denied", "Only admin can add medicines.")
             return
-        dialog = AddMedicineDialog(self)
-        # Only refresh after dialog accepted, NO db.add_medicine here!
-        if dialog.exec_() == dialog.Accepted:
-            self.refresh_all()
+        dialog = open_screen("add_medicine", self)
+        # NO db.add_medicine here! The dialog saves; InventoryCache updates the views
+        dialog.exec_()
 
     def open_sale_dialog(self):
         try:
-            dlg = SaleDialog(parent=self)
+            dlg = open_screen("sale", parent=self)
             if hasattr(dlg, 'user'):
                 dlg.user = self.user
-            if dlg.exec_():
-                self.refresh_all()
+            dlg.exec_()
         except Exception as e:
             QMessageBox.critical(self, "Sale Error", f"An error occurred while processing the sale:\n{str(e)}")
 
@@ -186,11 +189,10 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Permission Denied", "Only admin can record purchases.")
             return
         try:
-            dlg = PurchaseDialog(parent=self)
+            dlg = open_screen("purchase", parent=self)
             if hasattr(dlg, 'user'):
                 dlg.user = self.user
-            if dlg.exec_():
-                self.refresh_all()
+            dlg.exec_()
         except Exception as e:
             QMessageBox.critical(self, "Purchase Error", f"An error occurred while processing the purchase:\n{str(e)}")
 
@@ -198,41 +200,24 @@ class MainWindow(QMainWindow):
         if self.user["role"] != "admin":
             QMessageBox.warning(self, "Permission Denied", "Only admin can export inventory data.")
             return
-        from db import get_inventory_data
-        try:
-            data = get_inventory_data()
-            if not data:
-                QMessageBox.information(self, "Export Inventory", "No inventory data to export.")
-                return
-            path, _ = QFileDialog.getSaveFileName(self, "Save Inventory CSV", "inventory.csv", "CSV Files (*.csv)")
-            if path:
-                with open(path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(data[0].keys())
-                    for row in data:
-                        writer.writerow(row.values())
-                QMessageBox.information(self, "Export Inventory", f"Inventory exported to {path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export Error", str(e))
+        self._export_query("inventory", "Inventory", "inventory.csv")
 
     def export_sales_csv(self):
         if self.user["role"] != "admin":
             QMessageBox.warning(self, "Permission Denied", "Only admin can export sales data.")
             return
-        from db import get_sales_data
+        self._export_query("sales", "Sales", "sales.csv")
+
+    def _export_query(self, name, label, default_name):
+        """Stream one of db.EXPORT_QUERIES to CSV in the background."""
+        title = f"Export {label}"
         try:
-            data = get_sales_data()
-            if not data:
-                QMessageBox.information(self, "Export Sales", "No sales data to export.")
+            if not count_rows(EXPORT_QUERIES[name]):
+                QMessageBox.information(self, title, f"No {label.lower()} data to export.")
                 return
-            path, _ = QFileDialog.getSaveFileName(self, "Save Sales CSV", "sales.csv", "CSV Files (*.csv)")
+            path, _ = QFileDialog.getSaveFileName(self, f"Save {label} CSV", default_name, "CSV Files (*.csv)")
             if path:
-                with open(path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(data[0].keys())
-                    for row in data:
-                        writer.writerow(row.values())
-                QMessageBox.information(self, "Export Sales", f"Sales exported to {path}")
+                self._export_task = export_csv(self, path, QueryExport(EXPORT_QUERIES[name]), title)
         except Exception as e:
             QMessageBox.critical(self, "Export Error", str(e))
 
@@ -247,19 +232,36 @@ class MainWindow(QMainWindow):
             self.new_window.show()
         self.close()
 
+    def run_wal_checkpoint(self):
+        try:
+            checkpoint_wal("PASSIVE")
+        except Exception as e:
+            print(f"Warning: WAL checkpoint failed: {e}")
+
     def closeEvent(self, event):
+        self.checkpoint_timer.stop()
+        if not self.maintenance.stop():
+            # Still archiving on a worker: a TRUNCATE checkpoint would race with it
+            print("Warning: maintenance task still running, skipping the WAL checkpoint")
+            event.accept()
+            return
+        try:
+            checkpoint_wal("TRUNCATE")
+        except Exception as e:
+            print(f"Warning: WAL checkpoint failed: {e}")
         event.accept()
 
+    @traced
     def refresh_all(self):
         if hasattr(self, 'content_area') and hasattr(self.content_area, 'load_table_data'):
             self.content_area.load_table_data()
         if hasattr(self, 'content_area') and hasattr(self.content_area, 'load_dashboard_data'):
             self.content_area.load_dashboard_data()
-        if isinstance(self.content_area, MedicineManagement):
+        if is_screen(self.content_area, "medicine_management"):
             self.content_area.load_medicines()
-        if isinstance(self.content_area, OrdersDialog):
+        if is_screen(self.content_area, "orders"):
             self.content_area.load_orders()
-        if isinstance(self.content_area, SalesDialog):
+        if is_screen(self.content_area, "sales_report"):
             self.content_area.load_sales_data()
 
     def refresh_medicine_data(self):
@@ -273,7 +275,7 @@ class MainWindow(QMainWindow):
                     f"{med['name']} ({med['strength']}) - Stock: {med['quantity']}",
                     med['id']
                 )
-        if isinstance(self.content_area, MedicineManagement):
+        if is_screen(self.content_area, "medicine_management"):
             self.content_area.load_medicines()
         if hasattr(self.content_area) and hasattr(self.content_area, 'update_medicine_table'):
             self.content_area.update_medicine_table()
@@ -282,27 +284,27 @@ class MainWindow(QMainWindow):
         if self.user["role"] != "admin":
             QMessageBox.warning(self, "Permission Denied", "Only admin can manage medicine inventory.")
             return
-        dialog = MedicineManagement(self.user, self)
+        dialog = open_screen("medicine_management", self.user, self)
         dialog.exec_()
         
     def open_orders_dialog(self):
         if self.user["role"] != "admin":
             QMessageBox.warning(self, "Permission Denied", "Only admin can manage orders.")
             return
-        dialog = OrdersDialog(self.user, self)
+        dialog = open_screen("orders", self.user, self)
         dialog.exec_()
 
     def open_sales_report(self):
         if self.user["role"] != "admin":
             QMessageBox.warning(self, "Permission Denied", "Only admin can view sales reports.")
             return
-        dialog = SalesDialog(user=self.user, parent=self)
+        dialog = open_screen("sales_report", user=self.user, parent=self)
         dialog.exec_()
     
     def open_help_support(self):
-        dialog = HelpSupportDialog(user=self.user, parent=self)
+        dialog = open_screen("help_support", user=self.user, parent=self)
         dialog.exec_()
 
     def open_settings_dialog(self):
-        dialog = SettingsDialog(user=self.user, parent=self)
+        dialog = open_screen("settings", user=self.user, parent=self)
         dialog.exec_()
\ No newline at end of file
@@ -2,14 +2,17 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QHBoxLayout, QStatusBar, QMessageBox, QHeaderView, QFileDialog, QPushButton, QLineEdit
 )
 from PyQt5.QtCore import Qt, pyqtSignal
+from tracing import traced
 from widgets.paginated_table import PaginatedTable
-from db import get_all_medicines, delete_medicine, db_signals
-import csv
-from datetime import datetime
+from db import get_medicine, delete_medicine, db_signals, day_number, EXPORT_QUERIES
+from inventory_cache import inventory_cache
+from export_engine import export_csv, QueryExport
+from import_engine import import_medicines
 
 class MedicineManagement(QDialog):
     medicine_updated = pyqtSignal()  # Local signal for internal refresh
 
+    @traced
     def __init__(self, user=None, parent=None):
         super().__init__(parent)
         if not user or user.get("role") != "admin":
@@ -17,7 +20,6 @@ class MedicineManagement(QDialog):
             self.reject()
             return
         self.user = user
-        self._cached_medicines = []
         self.setWindowTitle("Medicine Inventory Management")
         self.setMinimumSize(1000, 700)
         self.setStyleSheet("""
@@ -61,23 +63,22 @@ class MedicineManagement(QDialog):
             }
             QLineEdit:focus { border-color: #e74c3c; outline: none; }
         """)
-        self.search_input.textChanged.connect(self.filter_fast_table)
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
 
         # Paginated Table
         self.table = PaginatedTable(self)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: white;
                 border: 1px solid #e0e0e0;
                 border-radius: 10px;
                 box-shadow: 0 2px 8px rgba(0, 0, 0, 0.05);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 10px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: #e74c3c;
                 color: white;
             }
@@ -96,6 +97,7 @@ class MedicineManagement(QDialog):
             QPushButton#export_btn { background: #3498db; color: white; }
             QPushButton:hover { opacity: 0.9; }
         """)
+        self.table.attach_search(self.search_input)  # debounced, runs off the GUI thread
         main_layout.addWidget(self.table)
 
         # Button layout
@@ -138,6 +140,24 @@ class MedicineManagement(QDialog):
         self.export_btn.clicked.connect(self.export_inventory)
         button_layout.addWidget(self.export_btn)
 
+        self.import_btn = QPushButton("⬆️ Import Medicines")
+        self.import_btn.setCursor(Qt.PointingHandCursor)
+        self.import_btn.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #27ae60, stop:1 #229954);
+                color: white;
+                border-radius: 12px;
+                padding: 12px 25px;
+                font-size: 16px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #229954, stop:1 #27ae60);
+            }
+        """)
+        self.import_btn.clicked.connect(self.import_inventory)
+        button_layout.addWidget(self.import_btn)
+
         button_layout.addStretch(1)
         main_layout.addLayout(button_layout)
 
@@ -157,46 +177,30 @@ class MedicineManagement(QDialog):
         self.load_medicines()
 
     def load_medicines(self):
-        """Load medicines into the paginated table with caching and alerts"""
+        """Load the first page of medicines; the table fetches further pages on demand."""
         try:
-            self._cached_medicines = get_all_medicines()
-            if not self._cached_medicines:
+            self.table.set_query(self.search_input.text())
+            total = self.table.total_count()
+            if not total:
                 self.status_bar.showMessage("No medicines found.", 3000)
-                self.table.set_data([])
                 return
-            # Prepare data with alert status
-            data = []
-            today = datetime.today()
-            for med in self._cached_medicines:
-                alert = "None"
-                expiry_date = datetime.strptime(med.get("expiry_date", "9999-12-31"), "%Y-%m-%d")
-                if expiry_date <= today:
-                    alert = "Expired"
-                elif (expiry_date - today).days <= 30:
-                    alert = "Expiring Soon"
-                if int(med.get("quantity", 0)) < 10:
-                    alert = "Low Stock" if alert == "None" else f"{alert}, Low Stock"
-                med["alert_status"] = alert
-                data.append(med)
-            self.table.set_data(data)
-            self.status_bar.showMessage(f"Loaded {len(self._cached_medicines)} medicines.", 3000)
+            self.status_bar.showMessage(f"Loaded {total} medicines.", 3000)
             self.medicine_updated.emit()  # Local refresh
-            self.filter_fast_table()
         except Exception as e:
             self.status_bar.showMessage(f"Error loading medicines: {str(e)}", 5000)
 
-    def filter_fast_table(self):
-        """Fast, in-memory, case-insensitive search for 20k+ medicines."""
-        q = self.search_input.text().strip().lower()
-        if not q:
-            self.table.set_data(self._cached_medicines)
-            return
-        keys = ["name", "strength", "batch_no", "expiry_date", "quantity", "unit_price", "alert_status"]
-        filtered = [
-            m for m in self._cached_medicines
-            if any(q in str(m.get(k, "")).lower() for k in keys)
-        ]
-        self.table.set_data(filtered)
+    @staticmethod
+    def _alert_status(med, today):
+        """today: day_number(); expiry is compared as precomputed expiry_days."""
+        alert = "None"
+        expiry_days = med.get("expiry_days")
+        if expiry_days is not None and expiry_days <= today:
+            alert = "Expired"
+        elif expiry_days is not None and expiry_days - today <= 30:
+            alert = "Expiring Soon"
+        if int(med.get("quantity", 0)) < 10:
+            alert = "Low Stock" if alert == "None" else f"{alert}, Low Stock"
+        return alert
 
     def generate_alerts(self):
         """Generate and display alerts for low stock and expiry"""
@@ -205,13 +209,13 @@ class MedicineManagement(QDialog):
             return
         try:
             alerts = []
-            today = datetime.today()
-            for med in self._cached_medicines:
-                expiry_date = datetime.strptime(med.get("expiry_date", "9999-12-31"), "%Y-%m-%d")
-                if expiry_date <= today:
+            today = day_number()
+            for med in inventory_cache.medicines():
+                expiry_days = med.get("expiry_days")
+                if expiry_days is not None and expiry_days <= today:
                     alerts.append(f"'{med['name']}' (ID: {med['id']}) is expired.")
-                elif (expiry_date - today).days <= 30:
-                    alerts.append(f"'{med['name']}' (ID: {med['id']}) expires in {(expiry_date - today).days} days.")
+                elif expiry_days is not None and expiry_days - today <= 30:
+                    alerts.append(f"'{med['name']}' (ID: {med['id']}) expires in {expiry_days - today} days.")
                 if int(med.get("quantity", 0)) < 10:
                     alerts.append(f"'{med['name']}' (ID: {med['id']}) has low stock ({med['quantity']} units).")
             if alerts:
@@ -230,23 +234,35 @@ class MedicineManagement(QDialog):
         try:
             file_name, _ = QFileDialog.getSaveFileName(self, "Save Inventory Report", "inventory_report.csv", "CSV Files (*.csv)")
             if file_name:
-                with open(file_name, 'w', newline='', encoding='utf-8') as csvfile:
-                    fieldnames = ["id", "name", "strength", "batch_no", "expiry_date", "quantity", "unit_price", "alert_status"]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for med in self._cached_medicines:
-                        writer.writerow(med)
-                self.status_bar.showMessage(f"Inventory exported to {file_name}.", 3000)
+                fieldnames = ["id", "name", "strength", "batch_no", "expiry_date", "quantity", "unit_price", "alert_status"]
+                today = day_number()
+                source = QueryExport(
+                    EXPORT_QUERIES["inventory_alerts"], headers=fieldnames,
+                    transform=lambda med: [med[key] for key in fieldnames[:-1]] + [self._alert_status(med, today)]
+                )
+                self._export_task = export_csv(self, file_name, source, "Export Inventory")
+                self.status_bar.showMessage(f"Exporting inventory to {file_name}...", 3000)
         except Exception as e:
             self.status_bar.showMessage(f"Error exporting inventory: {str(e)}", 5000)
 
+    def import_inventory(self):
+        """Bulk import medicines from a CSV or JSON file"""
+        if not self.user or self.user.get("role") != "admin":
+            self.status_bar.showMessage("Access denied: Admin only.", 3000)
+            return
+        try:
+            # The inventory cache picks up the imported rows; the table follows it
+            self._import_task = import_medicines(self)
+        except Exception as e:
+            self.status_bar.showMessage(f"Error importing medicines: {str(e)}", 5000)
+
     def delete_medicine(self, med_id):
         """Delete the selected medicine with specific confirmation and signal emission"""
         if not self.user or self.user.get("role") != "admin":
             self.status_bar.showMessage("Access denied: Admin only.", 3000)
             return
         try:
-            med = next((m for m in self._cached_medicines if m["id"] == med_id), None)
+            med = get_medicine(med_id)
             if not med:
                 self.status_bar.showMessage("Medicine not found.", 3000)
                 return
@@ -256,9 +272,8 @@ class MedicineManagement(QDialog):
             if reply == QMessageBox.Yes:
                 try:
                     delete_medicine(med_id)
-                    self._cached_medicines = [m for m in self._cached_medicines if m["id"] != med_id]  # Update cache
                     db_signals.medicine_updated.emit()  # Signal app-wide update
-                    self.load_medicines()
+                    self.table.refresh()
                     self.status_bar.showMessage(f"Medicine '{med_name}' deleted successfully.", 3000)
                 except Exception as e:
                     self.status_bar.showMessage(f"Failed to delete medicine: {str(e)}", 5000)
@@ -1,13 +1,16 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QHBoxLayout, QStatusBar, QMessageBox, QHeaderView, QFileDialog, QPushButton, QTableWidget, QTableWidgetItem, QInputDialog, QWidget, QSizePolicy
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from tracing import traced
 # from widgets.paginated_table import PaginatedTable # This import might not be needed if PaginatedTable isn't used elsewhere
-from db import get_all_medicines, get_all_orders, update_order_status, insert_order, db_signals
-import csv
+from db import get_all_medicines, get_all_orders, update_order_status, insert_order, db_signals, count_rows, EXPORT_QUERIES
+from export_engine import export_csv, QueryExport
+from inventory_cache import inventory_cache
 from datetime import datetime
 
 class OrdersDialog(QDialog):
     order_updated = pyqtSignal()  # Local signal for internal refresh
 
+    @traced
     def __init__(self, user=None, parent=None):
         super().__init__(parent)
         if not user or user.get("role") != "admin":
@@ -202,6 +205,16 @@ class OrdersDialog(QDialog):
         main_layout.addWidget(self.status_bar)
 
         self.setLayout(main_layout)
+
+        # Stock shown next to each medicine follows sales, purchases and edits.
+        # A sale fires several signals -> coalesce them into one reload.
+        self._medicines_timer = QTimer(self)
+        self._medicines_timer.setSingleShot(True)
+        self._medicines_timer.setInterval(0)
+        self._medicines_timer.timeout.connect(self.load_medicines)
+        inventory_cache.changed.connect(self._medicines_timer.start)
+        db_signals.sale_recorded.connect(self._medicines_timer.start)
+
         self.load_medicines()
         self.load_orders()
 
@@ -348,10 +361,8 @@ class OrdersDialog(QDialog):
             return
 
         try:
-            # Get all orders directly from the database for export to ensure latest data
-            all_orders_for_export = get_all_orders()
-
-            if not all_orders_for_export:
+            # Orders are streamed from the database in batches on a worker thread
+            if not count_rows(EXPORT_QUERIES["orders"]):
                 self.status_bar.showMessage("No orders to export.", 3000)
                 return
 
@@ -363,13 +374,7 @@ class OrdersDialog(QDialog):
             )
 
             if file_name:
-                with open(file_name, 'w', newline='', encoding='utf-8') as csvfile:
-                    # Define fieldnames based on the keys in your order dictionaries
-                    fieldnames = ["id", "medicine_name", "quantity_ordered", "status", "order_date"]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader() # Write the header row
-                    for order in all_orders_for_export:
-                        writer.writerow(order) # Write each order as a row
-                self.status_bar.showMessage(f"All orders exported to {file_name}.", 3000)
+                self._export_task = export_csv(self, file_name, QueryExport(EXPORT_QUERIES["orders"]), "Export Orders")
+                self.status_bar.showMessage(f"Exporting orders to {file_name}...", 3000)
         except Exception as e:
             self.status_bar.showMessage(f"Error exporting orders: {str(e)}", 5000)
\ No newline at end of file
@@ -2,11 +2,13 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QHBoxLayout, QStatusBar, QMessageBox, QPushButton, QLineEdit
 )
 from PyQt5.QtCore import Qt
+from tracing import traced
 from widgets.paginated_table import PaginatedTable
-from db import get_all_medicines, update_medicine, delete_medicine, db_signals
+from db import get_medicine, update_medicine, delete_medicine, db_signals
 from widgets.add_medicine_dialog import AddMedicineDialog
 
 class ProductManagement(QDialog):
+    @traced
     def __init__(self, user=None, parent=None):
         super().__init__(parent)
         if not user or user.get("role") != "admin":
@@ -57,23 +59,22 @@ class ProductManagement(QDialog):
             }
             QLineEdit:focus { border-color: #3498db; outline: none; }
         """)
-        self.search_input.textChanged.connect(self.filter_fast_table)
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
 
         # Paginated Table
         self.table = PaginatedTable(self)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: white;
                 border: 1px solid #e0e0e0;
                 border-radius: 10px;
                 box-shadow: 0 2px 8px rgba(0, 0, 0, 0.05);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 10px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: #3498db;
                 color: white;
             }
@@ -88,12 +89,11 @@ class ProductManagement(QDialog):
                 border-radius: 6px;
                 padding: 6px 12px;
             }
-            QPushButton#edit_btn { background: #36b37e; color: white; }
-            QPushButton#delete_btn { background: #ff5630; color: white; }
             QPushButton:hover { opacity: 0.9; }
         """)
         self.table.edit_requested.connect(self.edit_product)
         self.table.delete_requested.connect(self.delete_product)
+        self.table.attach_search(self.search_input)  # debounced, runs off the GUI thread
         main_layout.addWidget(self.table)
 
         # Button layout
@@ -152,35 +152,20 @@ class ProductManagement(QDialog):
         main_layout.addWidget(self.status_bar)
 
         self.setLayout(main_layout)
-        self.all_medicines = []
         self.load_products()
 
     def load_products(self):
+        """Fetch only the visible page; the table pages through the DB."""
         try:
-            self.all_medicines = get_all_medicines()
-            if not self.all_medicines:
+            self.table.set_query(self.search_input.text())
+            total = self.table.total_count()
+            if not total:
                 self.status_bar.showMessage("No products found.", 3000)
-                self.table.set_data([])
                 return
-            self.table.set_data(self.all_medicines)
-            self.status_bar.showMessage(f"Loaded {len(self.all_medicines)} products.", 3000)
-            self.filter_fast_table()
+            self.status_bar.showMessage(f"Loaded {total} products.", 3000)
         except Exception as e:
             self.status_bar.showMessage(f"Error loading products: {str(e)}", 5000)
 
-    def filter_fast_table(self):
-        """Fast, in-memory, case-insensitive search for 20k+ products."""
-        q = self.search_input.text().strip().lower()
-        if not q:
-            self.table.set_data(self.all_medicines)
-            return
-        keys = ["name", "strength", "batch_no", "expiry_date", "quantity", "unit_price"]
-        filtered = [
-            m for m in self.all_medicines
-            if any(q in str(m.get(k, "")).lower() for k in keys)
-        ]
-        self.table.set_data(filtered)
-
     def add_product(self):
         """Open add dialog, but do NOT save again here!"""
         if not self.user or self.user.get("role") != "admin":
@@ -219,8 +204,7 @@ class ProductManagement(QDialog):
             self.status_bar.showMessage("Access denied: Admin only.", 3000)
             return
         try:
-            medicines = get_all_medicines()
-            med = next((m for m in medicines if m["id"] == med_id), None)
+            med = get_medicine(med_id)
             if not med:
                 self.status_bar.showMessage("Product not found.", 3000)
                 return
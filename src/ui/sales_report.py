@@ -1,10 +1,12 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QHeaderView, QDateEdit, QWidget, QStatusBar, QMessageBox, QSizePolicy, QFileDialog
 from PyQt5.QtCore import Qt, QDate
-from db import get_sales_report_data # Assuming this new function will be in your db.py
-import csv
+from tracing import traced
+from db import get_sales_report_data, db_signals # Assuming this new function will be in your db.py
+from export_engine import export_csv, RowsExport
 from datetime import datetime
 
 class SalesDialog(QDialog):
+    @traced
     def __init__(self, user=None, parent=None):
         super().__init__(parent)
         # Basic access control, similar to OrdersDialog
@@ -184,6 +186,8 @@ class SalesDialog(QDialog):
         main_layout.addWidget(self.status_bar)
 
         self.setLayout(main_layout)
+        # Only this screen's own query; the rest of the app no longer reloads on a sale
+        db_signals.sale_recorded.connect(self.load_sales_data)
         self.load_sales_data() # Initial load of sales data
 
     def load_sales_data(self):
@@ -237,13 +241,10 @@ class SalesDialog(QDialog):
             )
 
             if file_name:
-                with open(file_name, 'w', newline='', encoding='utf-8') as csvfile:
-                    fieldnames = ["medicine_name", "total_quantity_sold", "num_orders"]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for item in self._cached_sales_data:
-                        writer.writerow(item)
-                self.status_bar.showMessage(f"Sales report exported to {file_name}.", 3000)
+                fieldnames = ["medicine_name", "total_quantity_sold", "num_orders"]
+                rows = [[item[key] for key in fieldnames] for item in self._cached_sales_data]
+                self._export_task = export_csv(self, file_name, RowsExport(fieldnames, rows), "Export Sales Report")
+                self.status_bar.showMessage(f"Exporting sales report to {file_name}...", 3000)
         except Exception as e:
             self.status_bar.showMessage(f"Error exporting sales report: {str(e)}", 5000)
 
@@ -0,0 +1,50 @@
+"""
+Registry of the app's screens and dialogs. Each module is imported the
+first time its screen is opened, not at startup, so the login dialog only
+has to wait for db.py and Qt itself.
+
+    dialog = open_screen("sale", parent=self)
+    dialog.exec_()
+"""
+import importlib
+import sys
+
+# name -> (module, class)
+SCREENS = {
+    "dashboard": ("ui.dashboard", "Dashboard"),
+    "sale": ("sale_purchase_dialog", "SaleDialog"),
+    "purchase": ("sale_purchase_dialog", "PurchaseDialog"),
+    "invoice": ("widgets.invoice_dialog", "InvoiceDialog"),
+    "add_medicine": ("widgets.add_medicine_dialog", "AddMedicineDialog"),
+    "product_management": ("ui.product_management", "ProductManagement"),
+    "medicine_management": ("ui.medicine_management", "MedicineManagement"),
+    "supplier_customer": ("widgets.supplier_customer_management", "SupplierCustomerManagement"),
+    "orders": ("ui.orders_dialog", "OrdersDialog"),
+    "sales_report": ("ui.sales_report", "SalesDialog"),
+    "help_support": ("ui.help_support", "HelpSupportDialog"),
+    "settings": ("ui.settings_dialog", "SettingsDialog"),
+    "diagnostics": ("ui.diagnostics_dialog", "DiagnosticsDialog"),
+}
+
+_classes = {}  # name -> class, once imported
+
+
+def screen_class(name):
+    """The class registered as name, importing its module on first use."""
+    cls = _classes.get(name)
+    if cls is None:
+        module_name, class_name = SCREENS[name]
+        cls = _classes[name] = getattr(importlib.import_module(module_name), class_name)
+    return cls
+
+
+def open_screen(name, *args, **kwargs):
+    """Construct the screen registered as name (the caller shows / exec_()s it)."""
+    return screen_class(name)(*args, **kwargs)
+
+
+def is_screen(widget, name):
+    """isinstance check that doesn't import anything: an unloaded screen can't be open."""
+    module_name, class_name = SCREENS[name]
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(widget, getattr(module, class_name))
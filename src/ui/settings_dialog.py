@@ -1,8 +1,10 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QFormLayout, QHBoxLayout, QStatusBar
 from PyQt5.QtCore import Qt
+from tracing import traced
 from db import update_user_password, check_password, validate_login, is_strong_admin_password # Assuming update_user_password is new in db.py
 
 class SettingsDialog(QDialog):
+    @traced
     def __init__(self, user=None, parent=None):
         super().__init__(parent)
         self.user = user
@@ -3,9 +3,11 @@ from PyQt5.QtWidgets import (
     QMessageBox, QHBoxLayout, QDateEdit, QDoubleSpinBox, QSpinBox, QFormLayout
 )
 from PyQt5.QtCore import Qt, QDate
+from tracing import traced
 import db
 
 class AddMedicineDialog(QDialog):
+    @traced
     def __init__(self, parent=None, initial_data=None):
         super().__init__(parent)
         self.initial_data = initial_data
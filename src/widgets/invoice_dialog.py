@@ -1,5 +1,6 @@
 import datetime
 from PyQt5.QtCore import Qt, pyqtSignal
+from tracing import traced, span
 from PyQt5.QtGui import QTextDocument
 from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
 from PyQt5.QtWidgets import (
@@ -8,14 +9,8 @@ from PyQt5.QtWidgets import (
     QHeaderView, QFormLayout, QFrame, QSizePolicy, QAbstractItemView, QSpacerItem,
     QApplication, QDialogButtonBox
 )
-from db import get_all_medicines, record_sale_with_stock_update, get_customers, add_customer, db_signals
-
-def is_expired(expiry_date_str):
-    """Check if expiry_date_str (format YYYY-MM-DD) is before today."""
-    try:
-        return datetime.datetime.strptime(expiry_date_str, "%Y-%m-%d").date() < datetime.date.today()
-    except Exception:
-        return False
+from db import search_medicines, record_invoice, get_customers, add_customer, is_expired, day_number
+from widgets.search_controller import SearchController
 
 def generate_receipt_html(pharmacy_details, invoice_details, invoice_items, totals):
     """
@@ -142,7 +137,9 @@ def generate_receipt_html(pharmacy_details, invoice_details, invoice_items, tota
 class MedicineSearchDialog(QDialog):
     """Dedicated dialog for searching and selecting medicines."""
     medicine_selected = pyqtSignal(dict)  # Signal emitted when a medicine is selected
-    
+    MAX_RESULTS = 200  # rows shown per search; refine the search to find others
+
+    @traced
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Search Medicines")
@@ -195,7 +192,12 @@ class MedicineSearchDialog(QDialog):
         # Search bar
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by name, strength, batch, manufacturer...")
-        self.search_input.textChanged.connect(self.filter_medicines)
+        self._search = SearchController(self._search_rows, self)
+        self._search.result_ready.connect(self.show_medicines)
+        self._search.search_failed.connect(
+            lambda message: QMessageBox.critical(self, "Error", f"Failed to load medicines: {message}")
+        )
+        self._search.attach(self.search_input)
         layout.addWidget(self.search_input)
         
         # Medicine table
@@ -228,34 +230,32 @@ class MedicineSearchDialog(QDialog):
         self.load_medicines()
         
     def load_medicines(self):
-        """Load all medicines from database."""
+        """Show the first matches for the (empty) search."""
+        self.medicines = []
+        self.filter_medicines()
+
+    def filter_medicines(self):
+        """Ranked prefix search in the database; only the best matches are shown."""
         try:
-            self.medicines = get_all_medicines()
-            self.filter_medicines()  # Populate table with all medicines initially
+            filtered = self._search_rows(self.search_input.text())
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load medicines: {str(e)}")
-    
-    def filter_medicines(self):
-        """Filter medicines based on search text."""
-        search_text = self.search_input.text().lower()
-        
-        if not self.medicines:
             return
-            
-        filtered = [
-            med for med in self.medicines 
-            if (search_text in med.get('name', '').lower() or 
-                search_text in med.get('generic_name', '').lower() or
-                search_text in med.get('strength', '').lower() or
-                search_text in med.get('batch_no', '').lower() or
-                search_text in med.get('manufacturer', '').lower())
-        ]
+        self.show_medicines(filtered)
+
+    def _search_rows(self, text):
+        # Also runs on a search worker thread: database only, no widget access
+        return search_medicines(text, limit=self.MAX_RESULTS)["rows"]
+
+    def show_medicines(self, filtered):
+        self.medicines = filtered
         
         self.medicine_table.setRowCount(len(filtered))
         
+        today = day_number()
         for row, med in enumerate(filtered):
             # Set visual appearance based on stock/expiry
-            expired = is_expired(med.get('expiry_date', ''))
+            expired = is_expired(med, today)
             out_of_stock = med.get('quantity', 0) <= 0
             
             # Name
@@ -309,21 +309,12 @@ class MedicineSearchDialog(QDialog):
     def select_medicine(self):
         """Handle medicine selection."""
         selected_row = self.medicine_table.currentRow()
-        if selected_row >= 0:
-            search_text = self.search_input.text().lower()
-            filtered = [
-                med for med in self.medicines 
-                if (search_text in med.get('name', '').lower() or 
-                    search_text in med.get('generic_name', '').lower() or
-                    search_text in med.get('strength', '').lower() or
-                    search_text in med.get('batch_no', '').lower() or
-                    search_text in med.get('manufacturer', '').lower())
-            ]
-            if selected_row < len(filtered):
-                self.medicine_selected.emit(filtered[selected_row])
-                self.accept()
+        if 0 <= selected_row < len(self.medicines):
+            self.medicine_selected.emit(self.medicines[selected_row])
+            self.accept()
 
 class InvoiceDialog(QDialog):
+    @traced
     def __init__(self, user, parent=None):
         super().__init__(parent)
         self.user = user
@@ -564,7 +555,7 @@ class InvoiceDialog(QDialog):
         btn_print = QPushButton("🖨️ Complete & Print")
         btn_print.setObjectName("print_invoice_btn")
         btn_print.setCursor(Qt.PointingHandCursor)
-        btn_print.clicked.connect(self.print_and_record_invoice)
+        btn_print.clicked.connect(lambda: self.print_and_record_invoice())
         print_btn_layout.addWidget(btn_print)
         print_btn_layout.addStretch()
         bottom_layout.addLayout(print_btn_layout)
@@ -612,7 +603,7 @@ class InvoiceDialog(QDialog):
         self.quantity_spin.setValue(1)
         
         # Set visual cues for expiry/stock
-        if is_expired(expiry_date):
+        if is_expired(medicine):
             self.med_expiry_label.setStyleSheet("color: red; font-size: 12px;")
         else:
             self.med_expiry_label.setStyleSheet("color: #555; font-size: 12px;")
@@ -668,7 +659,7 @@ class InvoiceDialog(QDialog):
             return
 
         med = self.selected_medicine
-        if is_expired(med.get("expiry_date", "2099-01-01")):
+        if is_expired(med):
             QMessageBox.warning(self, "Expired Medicine", f"{med['name']} is expired and cannot be sold.")
             return
 
@@ -760,17 +751,16 @@ class InvoiceDialog(QDialog):
                 return None
         return None
 
-    def save_sales_to_db(self, customer_id):
-        """Save invoice items to the database."""
-        for item in self.invoice_items:
-            success, message = record_sale_with_stock_update(
-                medicine_id=item['id'],
-                quantity=item['qty'],
-                customer_id=customer_id
-            )
-            if not success:
-                print(f"Warning: Failed to record sale for {item['name']}: {message}")
+    def save_sales_to_db(self, customer_id, invoice_number=None):
+        """Save all invoice items in one transaction. Raises if any line fails."""
+        return record_invoice(
+            [{'medicine_id': item['id'], 'quantity': item['qty'], 'total': item['total']}
+             for item in self.invoice_items],
+            customer_id=customer_id,
+            invoice_number=invoice_number
+        )
 
+    @traced
     def print_and_record_invoice(self):
         """Print the invoice and record sales in the database."""
         if not self.invoice_items:
@@ -800,21 +790,28 @@ class InvoiceDialog(QDialog):
         totals = {
             "total": total
         }
-        html_receipt = generate_receipt_html(pharmacy_details, invoice_details, self.invoice_items, totals)
+        with span("invoice.receipt_html", items=len(self.invoice_items)):
+            html_receipt = generate_receipt_html(pharmacy_details, invoice_details, self.invoice_items, totals)
         printer = QPrinter(QPrinter.HighResolution)
         print_dialog = QPrintDialog(printer, self)
-        if print_dialog.exec_() == QPrintDialog.Accepted:
+        with span("invoice.print_dialog"):  # waiting on the cashier, not on us
+            accepted = print_dialog.exec_() == QPrintDialog.Accepted
+        if accepted:
+            # Record first: a receipt must never be printed for a sale that did not commit
+            try:
+                with span("invoice.record", items=len(self.invoice_items)):
+                    self.save_sales_to_db(customer_id, invoice_details["invoice_number"])
+            except Exception as e:
+                QMessageBox.critical(self, "Save Error", f"Invoice was not recorded (no stock was changed):\n{str(e)}")
+                return
             try:
-                doc = QTextDocument()
-                doc.setHtml(html_receipt)
-                doc.print_(printer)
-                self.save_sales_to_db(customer_id)
-                if hasattr(self.parent_window, 'refresh_all'):
-                    self.parent_window.refresh_all()
+                with span("invoice.print"):
+                    doc = QTextDocument()
+                    doc.setHtml(html_receipt)
+                    doc.print_(printer)
                 QMessageBox.information(self, "Success", "Invoice printed and sales recorded successfully!")
-                db_signals.sale_recorded.emit()
-                self.accept()
             except Exception as e:
-                QMessageBox.critical(self, "Print/Save Error", f"Failed to print or save invoice: {str(e)}")
+                QMessageBox.critical(self, "Print Error", f"Sales were recorded but printing failed: {str(e)}")
+            self.accept()
         else:
             QMessageBox.information(self, "Print Cancelled", "Invoice printing was cancelled.")
\ No newline at end of file
@@ -3,9 +3,11 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
+from tracing import traced
 from db import get_user_list, validate_login
 
 class LoginDialog(QDialog):
+    @traced
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Login | Pharmacy Management")
@@ -1,48 +1,319 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
-    QHBoxLayout, QHeaderView, QLabel, QSizePolicy, QSpacerItem
+    QWidget, QVBoxLayout, QTableView, QHeaderView, QLabel, QSizePolicy,
+    QStyledItemDelegate, QAbstractItemView
 )
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QColor
-from datetime import datetime
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex, QRect, QEvent
+from PyQt5.QtGui import QColor, QPainter
+from db import search_medicines, day_number
+from inventory_cache import inventory_cache
+from widgets.search_controller import SearchController
+
+# Row highlight: low stock (< 10) and/or expiring within 30 days (or expired)
+LOW_STOCK_AND_EXPIRY = QColor("#ffcccc")  # Light red
+LOW_STOCK = QColor("#fff7e6")             # Light orange
+EXPIRY_SOON = QColor("#e6f7ff")           # Light blue
+NORMAL = QColor("white")
+
+
+class MedicineTableModel(QAbstractTableModel):
+    """
+    Medicine rows for PaginatedTable. Rows come from an in-memory list
+    (set_rows) or from a fetch(after, limit) function returning one block of
+    db.search_medicines results (set_source). The view asks for the next block
+    through canFetchMore/fetchMore as the user scrolls.
+    """
+    load_failed = pyqtSignal(str)
+
+    HEADERS = ["Name", "Strength", "Batch No", "Expiry Date", "Quantity", "Unit Price", "Actions"]
+    KEYS = ["name", "strength", "batch_no", "expiry_date", "quantity", "unit_price"]
+    ACTIONS_COLUMN = 6
+    RowRole = Qt.UserRole + 1  # the medicine dict behind a row
+
+    def __init__(self, block_size=100, parent=None):
+        super().__init__(parent)
+        self.block_size = block_size
+        self._rows = []
+        self._colors = []     # background per loaded row, computed once on load
+        self._positions = {}  # medicine id -> row, for in-place patches
+        self.errors = []      # data problems found in loaded rows
+        self._source = []     # in-memory mode: every row, exposed a block at a time
+        self._fetch = None    # query mode: fetch(after, limit) -> search result
+        self._next_key = None
+        self.total = 0
+        self._soon = 0        # expiry_days 30 days ahead: expiring-soon cutoff
+
+    # --- Loading ---
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._clear()
+        self._fetch = None
+        self._source = rows
+        self.total = len(rows)
+        self._append(rows[:self.block_size])
+        self.endResetModel()
+
+    def set_source(self, fetch, first=None):
+        """Query mode. first: an already fetched first block (background search)."""
+        if first is None:
+            first = fetch(None, self.block_size)
+        self.beginResetModel()
+        self._clear()
+        self._source = []
+        self._fetch = fetch
+        self._take(first)
+        self.endResetModel()
+
+    def reload(self):
+        """Re-read what is currently loaded (after an edit/delete)."""
+        if self._fetch is None:
+            self.set_rows(self._source)
+            return
+        self.set_source(self._fetch, self._fetch(None, max(len(self._rows), self.block_size)))
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        if self._fetch is not None:
+            return self._next_key is not None
+        return len(self._rows) < len(self._source)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self._fetch is not None:
+            try:
+                result = self._fetch(self._next_key, self.block_size)
+            except Exception as e:
+                self._next_key = None  # stop the view from retrying on every scroll
+                self.load_failed.emit(str(e))
+                return
+            rows = result["rows"]
+        else:
+            rows = self._source[len(self._rows):len(self._rows) + self.block_size]
+        if not rows:
+            self._next_key = None
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        if self._fetch is not None:
+            self._take(result)
+        else:
+            self._append(rows)
+        self.endInsertRows()
+
+    # --- In-place patches (InventoryCache) ---
+
+    def append_rows(self, meds):
+        """In-memory mode: new medicines go at the end, shown now if the list is fully loaded."""
+        if self._fetch is not None or not meds:
+            return
+        loaded_all = len(self._rows) == len(self._source)
+        self._source = self._source + list(meds)
+        self.total = len(self._source)
+        if loaded_all:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(meds) - 1)
+            self._append(meds)
+            self.endInsertRows()
+
+    def update_rows(self, meds):
+        """Replace loaded rows that have the same id; other medicines are ignored."""
+        for med in meds:
+            row = self._positions.get(med["id"])
+            if row is None:
+                continue
+            self._rows[row] = med
+            self._colors[row] = self._row_color(med)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.ACTIONS_COLUMN))
+        if self._fetch is None and self._source:
+            # Rows not scrolled into view yet must come up patched too
+            changed = {med["id"]: med for med in meds}
+            self._source = [changed.get(med.get("id"), med) for med in self._source]
+
+    def remove_ids(self, ids):
+        ids = set(ids)
+        rows = sorted((self._positions[i] for i in ids if i in self._positions), reverse=True)
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+            del self._colors[row]
+            self.endRemoveRows()
+        if self._fetch is None:
+            self._source = [med for med in self._source if med.get("id") not in ids]
+            self.total = len(self._source)
+        else:
+            self.total -= len(rows)
+            if isinstance(self._next_key, int):
+                self._next_key -= len(rows)  # ranked results page by offset
+        self._positions = {med.get("id"): row for row, med in enumerate(self._rows)}
+
+    def _clear(self):
+        self._rows = []
+        self._colors = []
+        self._positions = {}
+        self.errors = []
+        self._next_key = None
+        self._soon = day_number() + 30
+
+    def _take(self, result):
+        self.total = result["total"]
+        self._next_key = result["next_key"]
+        self._append(result["rows"])
+
+    def _append(self, rows):
+        for med in rows:
+            self._positions[med.get("id")] = len(self._rows)
+            self._rows.append(med)
+            self._colors.append(self._row_color(med))
+
+    def _row_color(self, med):
+        low_stock = False
+        expiry_soon = False
+        try:
+            low_stock = int(med.get("quantity", 0)) < 10
+        except (ValueError, TypeError):
+            self.errors.append(f"Invalid quantity for '{med.get('name', 'Unknown')}'.")
+        # expiry_days is precomputed in the database: no per-row date parsing
+        expiry_days = med.get("expiry_days")
+        if expiry_days is not None:
+            expiry_soon = expiry_days <= self._soon
+        elif med.get("expiry_date"):
+            self.errors.append(f"Invalid expiry date for '{med.get('name', 'Unknown')}': {med['expiry_date']}")
+        if low_stock and expiry_soon:
+            return LOW_STOCK_AND_EXPIRY
+        if low_stock:
+            return LOW_STOCK
+        if expiry_soon:
+            return EXPIRY_SOON
+        return NORMAL
+
+    # --- Model interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        med = self._rows[index.row()]
+        column = index.column()
+        if role == self.RowRole:
+            return med
+        if role == Qt.BackgroundRole:
+            return self._colors[index.row()]  # the Actions cell is coloured too
+        if column == self.ACTIONS_COLUMN:
+            return None
+        if role == Qt.DisplayRole:
+            value = med.get(self.KEYS[column], "")
+            if column == 5:
+                return "₨ {}".format(value)
+            return str(value)
+        return None
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Paints Edit/Delete buttons in the Actions column (no per-row widgets)."""
+    edit_clicked = pyqtSignal(dict)
+    delete_clicked = pyqtSignal(int)
+
+    BUTTONS = (("Edit", 64, QColor("#28a745")), ("Delete", 72, QColor("#e74c3c")))
+    BUTTON_HEIGHT = 26
+    SPACING = 6
+
+    def _button_rects(self, rect):
+        top = rect.top() + (rect.height() - self.BUTTON_HEIGHT) // 2
+        left = rect.left() + self.SPACING
+        rects = []
+        for _, width, _ in self.BUTTONS:
+            rects.append(QRect(left, top, width, self.BUTTON_HEIGHT))
+            left += width + self.SPACING
+        return rects
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        font = painter.font()
+        font.setBold(True)
+        painter.setFont(font)
+        for (label, _, color), rect in zip(self.BUTTONS, self._button_rects(option.rect)):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(rect, 8, 8)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignCenter, label)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            edit_rect, delete_rect = self._button_rects(option.rect)
+            med = index.data(MedicineTableModel.RowRole)
+            if edit_rect.contains(event.pos()):
+                self.edit_clicked.emit(med)
+                return True
+            if delete_rect.contains(event.pos()):
+                self.delete_clicked.emit(med.get("id", -1))
+                return True
+        return super().editorEvent(event, model, option, index)
+
 
 class PaginatedTable(QWidget):
     edit_requested = pyqtSignal(dict)     # emits medicine dict
     delete_requested = pyqtSignal(int)    # emits medicine id
+    query_loaded = pyqtSignal(int)        # total matches after a background search
 
-    PAGE_SIZE = 100
+    BLOCK_SIZE = 100  # rows fetched each time the view scrolls to the end
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setStyleSheet("""
-            QTableWidget { background: white; border-radius: 12px; font-size:14px;}
+            QTableView { background: white; border-radius: 12px; font-size:14px;}
             QHeaderView::section { background: #3a7bd5; color:white; font-weight: bold; font-size:15px;}
-            QPushButton, QToolButton {
-                border-radius: 8px; padding: 6px 16px; font-weight:bold; font-size:14px;
-            }
-            QPushButton#nav { background: #6c7ae0; color: white; border: none;}
-            QPushButton#nav:disabled { background: #d3dae0; color: #888;}
-            QPushButton#edit_btn { background:#28a745; color:white; min-width:64px; padding:5px 0; }
-            QPushButton#delete_btn { background:#e74c3c; color:white; min-width:72px; padding:5px 0; }
             QLabel#page_info { font-size:15px; font-weight:500; color: #444;}
         """)
 
         self._all_medicines = []
-        self._filtered_meds = []
-        self._current_page = 1
-        self._total_pages = 1
+        self._in_memory = False  # set_data mode
+        self._filter_text = ""
+        self._query = None    # query mode: rows are fetched from the DB (see set_query)
+        self._search = None   # SearchController, see attach_search
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(10)
 
-        # Table
-        self.table = QTableWidget(0, 7)
-        self.table.setHorizontalHeaderLabels([
-            "Name", "Strength", "Batch No", "Expiry Date", "Quantity", "Unit Price", "Actions"
-        ])
+        # Table: rows are loaded a block at a time as the user scrolls
+        self.model = MedicineTableModel(self.BLOCK_SIZE, self)
+        self.model.load_failed.connect(self._show_error)
+        self.model.modelReset.connect(self._update_info)
+        self.model.rowsInserted.connect(self._update_info)
+        self.model.rowsRemoved.connect(self._update_info)
+
+        # Patch loaded rows when a sale/purchase/edit touches them
+        inventory_cache.rows_changed.connect(self._on_rows_changed)
+        inventory_cache.rows_removed.connect(self._on_rows_removed)
+        inventory_cache.rows_added.connect(self._on_rows_added)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.action_delegate = ActionButtonsDelegate(self.table)
+        self.action_delegate.edit_clicked.connect(self.edit_requested)
+        self.action_delegate.delete_clicked.connect(self.delete_requested)
+        self.table.setItemDelegateForColumn(MedicineTableModel.ACTIONS_COLUMN, self.action_delegate)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(40)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         layout.addWidget(self.table, 1)
@@ -52,166 +323,129 @@ class PaginatedTable(QWidget):
         self.error_label.setStyleSheet("color: red; font-style: italic;")
         layout.addWidget(self.error_label)
 
-        # Pagination controls
-        nav_layout = QHBoxLayout()
-        nav_layout.setContentsMargins(0, 5, 0, 0)
-        nav_layout.setSpacing(12)
-
-        self.prev_btn = QPushButton("⟵ Previous")
-        self.prev_btn.setObjectName("nav")
-        self.prev_btn.clicked.connect(self.prev_page)
-        nav_layout.addWidget(self.prev_btn)
-
-        nav_layout.addItem(QSpacerItem(10, 10, QSizePolicy.Expanding, QSizePolicy.Minimum))
-
         self.page_info = QLabel("")
         self.page_info.setObjectName("page_info")
         self.page_info.setAlignment(Qt.AlignCenter)
-        nav_layout.addWidget(self.page_info)
-
-        nav_layout.addItem(QSpacerItem(10, 10, QSizePolicy.Expanding, QSizePolicy.Minimum))
-
-        self.next_btn = QPushButton("Next ⟶")
-        self.next_btn.setObjectName("nav")
-        self.next_btn.clicked.connect(self.next_page)
-        nav_layout.addWidget(self.next_btn)
-
-        layout.addLayout(nav_layout)
+        layout.addWidget(self.page_info)
 
         self.setLayout(layout)
 
     def set_data(self, medicines):
-        """Call this with the FULL medicine list. Actual display is paginated."""
+        """Call this with the FULL medicine list. Rows are shown as the user scrolls."""
         self.error_label.clear()
+        self._query = None
+        self._in_memory = True
+        self._filter_text = ""
         self._all_medicines = medicines if medicines else []
-        self._filtered_meds = self._all_medicines  # By default, no search filter
-        self._current_page = 1
-        self._total_pages = max(1, (len(self._filtered_meds) + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
-        self._update_page()
+        self.model.set_rows(self._all_medicines)
+
+    def set_query(self, search="", **filters):
+        """
+        Query mode: rows are fetched via db.search_medicines (ranked prefix
+        search) one block at a time. filters: in_stock, exclude_expired.
+        """
+        if self._search is not None:
+            self._search.cancel()  # this load supersedes any pending search
+        self.error_label.clear()
+        self._query = dict(filters, search=search.strip() or None)
+        self._in_memory = False
+        self._all_medicines = []
+        try:
+            self.model.set_source(self._fetcher(self._query))
+        except Exception as e:
+            self._show_error(str(e))
+
+    def attach_search(self, line_edit):
+        """
+        Debounced background search driven by line_edit (query mode): the first
+        block is fetched on a worker thread and only the latest result is shown.
+        """
+        self._search = SearchController(self._fetch_first_block, self)
+        self._search.result_ready.connect(self._show_first_block)
+        self._search.search_failed.connect(self._show_error)
+        self._search.attach(line_edit)
+
+    def refresh(self):
+        """Reload the loaded rows after an edit/delete."""
+        try:
+            self.model.reload()
+        except Exception as e:
+            self._show_error(str(e))
 
     def filter(self, search_text):
-        """Filter by search_text (case-insensitive, any field) and reset pagination."""
-        s = search_text.strip().lower()
-        if not s:
-            self._filtered_meds = self._all_medicines
+        """Filter by search_text (case-insensitive, any field) and scroll back to the top."""
+        if self._query is not None:
+            self.set_query(search_text, **self._query_filters())
+            return
+        self._filter_text = search_text.strip().lower()
+        if not self._filter_text:
+            filtered = self._all_medicines
         else:
-            keys = ["name", "strength", "batch_no", "expiry_date", "quantity", "unit_price"]
-            self._filtered_meds = [
-                m for m in self._all_medicines
-                if any(s in str(m.get(k, "")).lower() for k in keys)
-            ]
-        self._current_page = 1
-        self._total_pages = max(1, (len(self._filtered_meds) + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
-        self._update_page()
-
-    def _update_page(self):
-        meds = self._filtered_meds
-        start = (self._current_page - 1) * self.PAGE_SIZE
-        end = min(start + self.PAGE_SIZE, len(meds))
-        paged = meds[start:end]
-
-        self.table.setRowCount(0)
-        self.table.setRowCount(len(paged))
-
-        errors = []
-        today = datetime.today()
-
-        for row, med in enumerate(paged):
-            try:
-                self.table.setItem(row, 0, QTableWidgetItem(str(med.get("name", ""))))
-                self.table.setItem(row, 1, QTableWidgetItem(str(med.get("strength", ""))))
-                self.table.setItem(row, 2, QTableWidgetItem(str(med.get("batch_no", ""))))
-                self.table.setItem(row, 3, QTableWidgetItem(str(med.get("expiry_date", ""))))
-                self.table.setItem(row, 4, QTableWidgetItem(str(med.get("quantity", ""))))
-                self.table.setItem(row, 5, QTableWidgetItem("₨ {}".format(med.get("unit_price", ""))))
-
-                low_stock = False
-                expiry_soon = False
-
-                # Quantity check
-                try:
-                    quantity = int(med.get("quantity", 0))
-                    low_stock = quantity < 10
-                except (ValueError, TypeError):
-                    errors.append(f"Invalid quantity for '{med.get('name', 'Unknown')}'.")
-
-                # Expiry check
-                expiry_str = med.get("expiry_date", "")
-                if expiry_str:
-                    try:
-                        expiry_date = datetime.strptime(expiry_str, "%Y-%m-%d")
-                        if expiry_date > today and (expiry_date - today).days <= 30:
-                            expiry_soon = True
-                        if expiry_date <= today:
-                            expiry_soon = True
-                    except (ValueError, TypeError):
-                        errors.append(f"Invalid expiry date for '{med.get('name', 'Unknown')}': {expiry_str}")
-
-                # Highlight cells
-                for col in range(6):
-                    item = self.table.item(row, col)
-                    if not item:
-                        continue
-                    if low_stock and expiry_soon:
-                        item.setBackground(QColor("#ffcccc"))  # Light red
-                    elif low_stock:
-                        item.setBackground(QColor("#fff7e6"))  # Light orange
-                    elif expiry_soon:
-                        item.setBackground(QColor("#e6f7ff"))  # Light blue
-                    else:
-                        item.setBackground(QColor("white"))
-
-                # Action buttons
-                action_widget = QWidget()
-                actions = QHBoxLayout(action_widget)
-                actions.setContentsMargins(0, 0, 0, 0)
-                actions.setSpacing(6)
-
-                edit_btn = QPushButton("Edit")
-                edit_btn.setObjectName("edit_btn")
-                edit_btn.setCursor(Qt.PointingHandCursor)
-                edit_btn.setFixedWidth(64)
-                delete_btn = QPushButton("Delete")
-                delete_btn.setObjectName("delete_btn")
-                delete_btn.setCursor(Qt.PointingHandCursor)
-                delete_btn.setFixedWidth(72)
-
-                edit_btn.clicked.connect(lambda _, m=med: self.edit_requested.emit(m))
-                delete_btn.clicked.connect(lambda _, id=med.get("id", -1): self.delete_requested.emit(id))
-
-                actions.addWidget(edit_btn)
-                actions.addWidget(delete_btn)
-                actions.addStretch()
-                action_widget.setLayout(actions)
-                self.table.setCellWidget(row, 6, action_widget)
+            filtered = [m for m in self._all_medicines if self._matches(m)]
+        self.model.set_rows(filtered)
 
-            except Exception as e:
-                errors.append(f"Error processing row {row + 1}: {str(e)}")
+    def _matches(self, med):
+        s = self._filter_text
+        return not s or any(s in str(med.get(k, "")).lower() for k in MedicineTableModel.KEYS)
 
-        # Page info
-        total = len(self._filtered_meds)
-        start_show = (self._current_page - 1) * self.PAGE_SIZE + 1 if total > 0 else 0
-        end_show = min(self._current_page * self.PAGE_SIZE, total)
-        self.page_info.setText(f"Showing {start_show}-{end_show} of {total}   |   Page {self._current_page}/{self._total_pages}")
+    def total_count(self):
+        """Number of rows matching the current data/query (not just those loaded)."""
+        return self.model.total
 
-        # Navigation buttons
-        self.prev_btn.setDisabled(self._current_page <= 1)
-        self.next_btn.setDisabled(self._current_page >= self._total_pages)
+    def _query_filters(self):
+        return {k: v for k, v in (self._query or {}).items() if k != "search"}
 
-        if errors:
-            self.error_label.setText(" | ".join(errors))
-        else:
-            self.error_label.clear()
+    def _fetcher(self, query):
+        search = query["search"]
+        filters = {k: v for k, v in query.items() if k != "search"}
+        return lambda after, limit: search_medicines(search, after=after, limit=limit, **filters)
 
-    def next_page(self):
-        if self._current_page < self._total_pages:
-            self._current_page += 1
-            self._update_page()
+    def _fetch_first_block(self, text):
+        # Runs on a search worker thread: database only, no widget access
+        filters = self._query_filters()
+        query = dict(filters, search=text.strip() or None)
+        return query, search_medicines(query["search"], limit=self.BLOCK_SIZE, **filters)
 
-    def prev_page(self):
-        if self._current_page > 1:
-            self._current_page -= 1
-            self._update_page()
+    def _show_first_block(self, payload):
+        self.error_label.clear()
+        self._query, result = payload
+        self._in_memory = False
+        self.model.set_source(self._fetcher(self._query), result)
+        self.table.scrollToTop()
+        self.query_loaded.emit(self.model.total)
+
+    def _on_rows_changed(self, meds):
+        # set_data mode: filter() rebuilds from _all_medicines, so patch it as well
+        if self._query is None and self._all_medicines:
+            changed = {med["id"]: med for med in meds}
+            self._all_medicines = [changed.get(med.get("id"), med) for med in self._all_medicines]
+        self.model.update_rows(meds)
+
+    def _on_rows_removed(self, ids):
+        if self._query is None and self._all_medicines:
+            ids = set(ids)
+            self._all_medicines = [med for med in self._all_medicines if med.get("id") not in ids]
+        self.model.remove_ids(ids)
+
+    def _on_rows_added(self, meds):
+        # Where a new medicine sorts is up to the query: re-read the loaded window
+        if self._query is not None:
+            self.refresh()
+        elif self._in_memory:
+            self._all_medicines = self._all_medicines + list(meds)
+            self.model.append_rows([med for med in meds if self._matches(med)])
+            self._update_info()
+
+    def _show_error(self, message):
+        self.error_label.setText(f"Error loading medicines: {message}")
+
+    def _update_info(self, *args):
+        loaded = self.model.rowCount()
+        total = self.model.total
+        more = "   |   Scroll for more" if self.model.canFetchMore() else ""
+        self.page_info.setText(f"Showing {loaded} of {total}{more}")
+        if self.model.errors:
+            self.error_label.setText(" | ".join(self.model.errors))
 
     def sizeHint(self):
-        return self.table.sizeHint()
\ No newline at end of file
+        return self.table.sizeHint()
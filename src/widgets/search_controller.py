@@ -0,0 +1,115 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from db import interruptible
+
+_pool = None
+
+def search_pool():
+    """Thread pool shared by all background searches."""
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(2)
+        # Keep workers alive: each one holds a persistent DB connection (see db.py)
+        _pool.setExpiryTimeout(-1)
+    return _pool
+
+
+class _SearchSignals(QObject):
+    finished = pyqtSignal(int, object)  # generation, result
+    failed = pyqtSignal(int, str)       # generation, error message
+
+
+class _SearchTask(QRunnable):
+    def __init__(self, controller, generation, text):
+        super().__init__()
+        self.signals = _SearchSignals()
+        self._controller = controller
+        self._generation = generation
+        self._text = text
+
+    def _stale(self):
+        return not self._controller.is_current(self._generation)
+
+    def run(self):
+        if self._stale():
+            return  # a newer request arrived while this one was queued
+        try:
+            if self._controller.interrupt_sql:
+                with interruptible(self._stale):
+                    result = self._controller.search_func(self._text)
+            else:
+                result = self._controller.search_func(self._text)
+        except Exception as e:
+            if not self._stale():
+                self.signals.failed.emit(self._generation, str(e))
+            return
+        if not self._stale():
+            self.signals.finished.emit(self._generation, result)
+
+
+class SearchController(QObject):
+    """
+    Debounced background search shared by the search boxes.
+
+    Keystrokes restart a short timer; when it fires, search_func(text) runs on a
+    worker thread. Every request makes older ones stale: queued ones are skipped,
+    running SQL is interrupted and late results are dropped, so only the latest
+    result reaches result_ready (on the GUI thread).
+
+    search_func must not touch widgets -- it only fetches/filters data.
+    """
+    result_ready = pyqtSignal(object)
+    search_failed = pyqtSignal(str)
+
+    DEBOUNCE_MS = 250
+
+    def __init__(self, search_func, parent=None, delay_ms=None, interrupt_sql=True):
+        super().__init__(parent)
+        self.search_func = search_func
+        self.interrupt_sql = interrupt_sql
+        self._generation = 0
+        self._text = ""
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS if delay_ms is None else delay_ms)
+        self._timer.timeout.connect(self._dispatch)
+
+    def attach(self, line_edit):
+        """Drive this controller from a QLineEdit's textChanged signal."""
+        line_edit.textChanged.connect(self.request)
+        return self
+
+    def request(self, text):
+        """New input: supersede any pending search and restart the debounce timer."""
+        self._generation += 1
+        self._text = text
+        self._timer.start()
+
+    def search_now(self, text):
+        """Run immediately, skipping the debounce delay."""
+        self._generation += 1
+        self._text = text
+        self._timer.stop()
+        self._dispatch()
+
+    def cancel(self):
+        """Drop whatever is pending or running (e.g. a synchronous reload happened)."""
+        self._generation += 1
+        self._timer.stop()
+
+    def is_current(self, generation):
+        return generation == self._generation
+
+    def _dispatch(self):
+        task = _SearchTask(self, self._generation, self._text)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        search_pool().start(task)
+
+    def _on_finished(self, generation, result):
+        if self.is_current(generation):
+            self.result_ready.emit(result)
+
+    def _on_failed(self, generation, message):
+        if self.is_current(generation):
+            self.search_failed.emit(message)
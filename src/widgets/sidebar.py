@@ -1,15 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QSizePolicy, QDialog
 from PyQt5.QtCore import Qt
-from sale_purchase_dialog import PurchaseDialog, SaleDialog
-from widgets.supplier_customer_management import SupplierCustomerManagement
-from widgets.invoice_dialog import InvoiceDialog
-from ui.dashboard import Dashboard
-from ui.product_management import ProductManagement
-from ui.medicine_management import MedicineManagement
-from ui.orders_dialog import OrdersDialog
-from ui.sales_report import SalesDialog
-from ui.help_support import HelpSupportDialog
-from ui.settings_dialog import SettingsDialog
+from ui.screens import open_screen
 
 class Sidebar(QWidget):
     def __init__(self, user=None, parent=None):
@@ -40,6 +31,7 @@ class Sidebar(QWidget):
             ("Sales Report", "📈", True, "open_sales_report"),
             ("Help & Support", "❓", False, "open_help_support"),
             ("Settings", "⚙️", True, "open_settings_dialog"),
+            ("Diagnostics", "🩺", True, "open_diagnostics_dialog"),
         ]
 
         self.sidebar_buttons = {}
@@ -87,6 +79,8 @@ class Sidebar(QWidget):
                 btn.clicked.connect(self.open_help_support)
             elif custom_handler == "open_settings_dialog":
                 btn.clicked.connect(self.open_settings_dialog)
+            elif custom_handler == "open_diagnostics_dialog":
+                btn.clicked.connect(self.open_diagnostics_dialog)
 
         layout.addStretch()
         self.setLayout(layout)
@@ -94,44 +88,48 @@ class Sidebar(QWidget):
     def open_dashboard(self):
         """Switch to Dashboard content in MainWindow"""
         if self.main_window:
-            self.main_window.set_content(Dashboard(self.user, self.main_window))
+            self.main_window.set_content(open_screen("dashboard", self.user, self.main_window))
 
     def open_purchase_dialog(self):
-        dlg = PurchaseDialog(parent=self.main_window)
+        dlg = open_screen("purchase", parent=self.main_window)
         dlg.exec_()
 
     def open_sale_dialog(self):
-        dlg = SaleDialog(parent=self.main_window)
+        dlg = open_screen("sale", parent=self.main_window)
         dlg.exec_()
 
     def open_product_management(self):
-        dlg = ProductManagement(self.user, parent=self.main_window)
+        dlg = open_screen("product_management", self.user, parent=self.main_window)
         dlg.exec_()
 
     def open_supplier_customer_management(self):
-        dlg = SupplierCustomerManagement(parent=self.main_window)
+        dlg = open_screen("supplier_customer", parent=self.main_window)
         dlg.exec_()
 
     def open_medicine_management(self):
-        dlg = MedicineManagement(self.user, parent=self.main_window)
+        dlg = open_screen("medicine_management", self.user, parent=self.main_window)
         dlg.exec_()
 
     def open_invoice_dialog(self):
-        dlg = InvoiceDialog(self.user, parent=self.main_window)
+        dlg = open_screen("invoice", self.user, parent=self.main_window)
         dlg.exec_()
 
     def open_orders_dialog(self):
-        dlg = OrdersDialog(self.user, parent=self.main_window)
+        dlg = open_screen("orders", self.user, parent=self.main_window)
         dlg.exec_()
 
     def open_sales_report(self):
-        dlg = SalesDialog(self.user, parent=self.main_window)
+        dlg = open_screen("sales_report", self.user, parent=self.main_window)
         dlg.exec_()
 
     def open_help_support(self):
-        dlg = HelpSupportDialog(self.user, parent=self.main_window)
+        dlg = open_screen("help_support", self.user, parent=self.main_window)
         dlg.exec_()
 
     def open_settings_dialog(self):
-        dlg = SettingsDialog(self.user, parent=self.main_window)
-        dlg.exec_()
\ No newline at end of file
+        dlg = open_screen("settings", self.user, parent=self.main_window)
+        dlg.exec_()
+
+    def open_diagnostics_dialog(self):
+        dlg = open_screen("diagnostics", self.user, parent=self.main_window)
+        dlg.exec_()
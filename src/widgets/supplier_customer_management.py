@@ -3,12 +3,14 @@ from PyQt5.QtWidgets import (
     QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QLabel
 )
 from PyQt5.QtCore import Qt
+from tracing import traced
 from db import (
     get_suppliers, add_supplier, update_supplier, delete_supplier,
     get_customers, add_customer, update_customer, delete_customer
 )
 
 class SupplierCustomerManagement(QDialog):
+    @traced
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Supplier & Customer Management")